@@ -1,28 +1,56 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
+import numpy as np
 import pandas as pd
 
 from . import structural
 
+# Integer event keys: `bar_index` is the event's position in the symbol's
+# date-sorted bars and `day` its date as int64 days since epoch. They travel
+# with events through the harness so joins index arrays instead of parsing
+# dates, and are dropped when results are written.
+EVENT_INDEX_COLUMNS: List[str] = ["bar_index", "day"]
+EVENT_COLUMNS: List[str] = ["symbol", "date", "event", "score", *EVENT_INDEX_COLUMNS]
+
+
+def events_frame(
+    symbol: str,
+    bar_index: Sequence[int],
+    day: Sequence[int],
+    event: Sequence[str],
+    score: Sequence[float],
+) -> pd.DataFrame:
+    """Build a detector's events table; `date` is derived from `day` without parsing."""
+    day = np.asarray(day, dtype=np.int64)
+    return pd.DataFrame(
+        {
+            "symbol": symbol,
+            "date": day.astype("datetime64[D]").astype("datetime64[ns]"),
+            "event": list(event),
+            "score": np.asarray(score, dtype="float64"),
+            "bar_index": np.asarray(bar_index, dtype=np.int64),
+            "day": day,
+        },
+        columns=EVENT_COLUMNS,
+    )
+
 
 def run_baseline_structural(
-    df: pd.DataFrame, symbol: str, cfg: Optional[Any] = None
+    df: pd.DataFrame,
+    symbol: str,
+    cfg: Optional[Any] = None,
+    features: Optional[Dict[str, np.ndarray]] = None,
 ) -> pd.DataFrame:
-    result = structural.detect_structural_wyckoff(df, cfg)
+    # Only events are used here, so phases, bands and per-bar labels are skipped.
+    result = structural.detect_structural_wyckoff(df, cfg, output="events", features=features)
     events: List[Dict[str, Any]] = result.get("events", [])
 
-    rows: List[Dict[str, Any]] = []
-    for ev in events:
-        rows.append(
-            {
-                "symbol": symbol,
-                "date": ev.get("date"),
-                "event": ev.get("label"),
-                "score": ev.get("score"),
-            }
-        )
-
-    events_df = pd.DataFrame(rows, columns=["symbol", "date", "event", "score"])
-    return events_df
+    return events_frame(
+        symbol,
+        [ev["idx"] for ev in events],
+        [ev["day"] for ev in events],
+        [ev.get("label") for ev in events],
+        [ev.get("score") for ev in events],
+    )
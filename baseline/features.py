@@ -0,0 +1,134 @@
+"""
+Batched bar features for the structural detector.
+
+Inputs are ragged concatenations: one array per field holding many symbols
+back to back, plus `offsets` (length `n_symbols + 1`) marking where each
+symbol starts. Rolling windows reset at every symbol boundary, and the
+pandas window kernels are run with segment-aware bounds, so every value is
+bit-identical to computing that symbol alone with `Series.rolling`.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.indexers import BaseIndexer
+
+FEATURE_NAMES = ("tr", "close_pos", "tr_z", "vol_z", "sma_slope")
+# The subset `detect_structural_wyckoff` reads.
+KERNEL_FEATURE_NAMES = ("close_pos", "tr_z", "vol_z", "sma_slope")
+ATR_WINDOWS = (14, 60)
+ATR_FEATURE_NAMES = ("atr_14", "atr_60", "atr_ratio")
+
+
+class _SegmentWindows(BaseIndexer):
+    """Trailing windows of `window_size` bars clipped to the start of each segment."""
+
+    def get_window_bounds(self, num_values=0, min_periods=None, center=None, closed=None, step=None):
+        end = np.arange(1, num_values + 1, dtype=np.int64)
+        segment_start = np.repeat(self.offsets[:-1], np.diff(self.offsets))
+        start = np.maximum(end - self.window_size, segment_start)
+        return start, end
+
+
+def segment_offsets(lengths) -> np.ndarray:
+    """Offsets for a ragged concatenation of segments with these lengths."""
+    return np.concatenate(([0], np.cumsum(np.asarray(lengths, dtype=np.int64))))
+
+
+def _rolling(values: np.ndarray, offsets: np.ndarray, window: int):
+    indexer = _SegmentWindows(window_size=int(window), offsets=offsets)
+    return pd.Series(values, copy=False).rolling(indexer, min_periods=int(window))
+
+
+def rolling_mean(values: np.ndarray, offsets: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(values, offsets, window).mean().to_numpy()
+
+
+def rolling_zscore(values: np.ndarray, offsets: np.ndarray, window: int) -> np.ndarray:
+    """`(x - mean) / std` over trailing windows (population std; zero std gives NaN)."""
+    rolling = _rolling(values, offsets, window)
+    mean = rolling.mean().to_numpy()
+    std = rolling.std(ddof=0).to_numpy()
+    return (values - mean) / np.where(std == 0, np.nan, std)
+
+
+def feature_key(cfg) -> Tuple:
+    """The config fields features depend on; equal keys mean reusable features."""
+    return (
+        int(cfg.range_lookback),
+        int(cfg.vol_lookback),
+        int(cfg.lookback_trend),
+        float(cfg.range_z_scale),
+        float(cfg.volume_z_scale),
+    )
+
+
+def structural_features(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+    offsets: np.ndarray,
+    cfg,
+) -> Dict[str, np.ndarray]:
+    """
+    True range, close position, range/volume z-scores and SMA slope for
+    every bar of every segment, in one vectorized pass per feature.
+
+    Bars must be date-sorted within each segment. Returns arrays aligned
+    with the inputs, keyed by FEATURE_NAMES.
+    """
+    high, low, close, volume = (
+        np.asarray(values, dtype="float64") for values in (high, low, close, volume)
+    )
+    offsets = np.asarray(offsets, dtype=np.int64)
+    bar_range = high - low
+    tr = np.abs(bar_range)
+    close_pos = (close - low) / np.where(bar_range == 0, np.nan, bar_range)
+
+    sma_slope = np.diff(rolling_mean(close, offsets, cfg.lookback_trend), prepend=np.nan)
+    # A segment's first bar has no previous SMA of its own.
+    sma_slope[offsets[:-1][np.diff(offsets) > 0]] = np.nan
+
+    return {
+        "tr": tr,
+        "close_pos": close_pos,
+        "tr_z": rolling_zscore(tr, offsets, cfg.range_lookback) * cfg.range_z_scale,
+        "vol_z": rolling_zscore(volume, offsets, cfg.vol_lookback) * cfg.volume_z_scale,
+        "sma_slope": sma_slope,
+    }
+
+
+def average_true_range(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, offsets: np.ndarray, window: int
+) -> np.ndarray:
+    """Rolling mean of true range (max of high-low and the gaps to the previous close)."""
+    high, low, close = (np.asarray(values, dtype="float64") for values in (high, low, close))
+    offsets = np.asarray(offsets, dtype=np.int64)
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    prev_close[offsets[:-1][np.diff(offsets) > 0]] = np.nan
+    # fmax skips a missing previous close, like DataFrame.max(axis=1).
+    true_range = np.fmax.reduce(
+        [np.abs(high - low), np.abs(high - prev_close), np.abs(low - prev_close)]
+    )
+    return rolling_mean(true_range, offsets, window)
+
+
+def atr_features(high: np.ndarray, low: np.ndarray, close: np.ndarray, offsets: np.ndarray) -> Dict[str, np.ndarray]:
+    """ATR14, ATR60 and their ratio for every bar of every segment, keyed by ATR_FEATURE_NAMES."""
+    fast, slow = (average_true_range(high, low, close, offsets, window) for window in ATR_WINDOWS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = fast / slow
+    return {"atr_14": fast, "atr_60": slow, "atr_ratio": ratio}
+
+
+def split_features(features: Dict[str, np.ndarray], offsets: np.ndarray):
+    """Per-segment views of batched features, in segment order."""
+    offsets = np.asarray(offsets, dtype=np.int64)
+    return [
+        {name: values[start:stop] for name, values in features.items()}
+        for start, stop in zip(offsets[:-1], offsets[1:])
+    ]
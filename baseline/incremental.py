@@ -7,6 +7,7 @@ from collections import deque
 import numpy as np
 import pandas as pd
 
+from baseline.adapter import events_frame
 from baseline.structural import WyckoffStructuralConfig, _prepare_ohlcv
 
 
@@ -207,7 +208,7 @@ def update_detector_state(state: DetectorState, bar: dict) -> Optional[dict]:
     if state.sow_deadline is not None and state.sow_idx is None and idx > state.sow_deadline:
         state.sow_locked = True
 
-    date_str = bar["date"].strftime("%Y-%m-%d")
+    bar_date = bar["date"]
     close_pos = bar["close_pos"]
 
     # Event order follows the baseline sequence; only one event is emitted per bar.
@@ -231,7 +232,7 @@ def update_detector_state(state: DetectorState, bar: dict) -> Optional[dict]:
                 state.last_event_label = "SC"
                 _apply_regime_transition(state, "SC", idx)
                 state.regime_bars += 1
-                return {"date": date_str, "event": "SC", "score": float(vol_z)}
+                return {"idx": idx, "date": bar_date, "event": "SC", "score": float(vol_z)}
 
     if not state.bc_locked and state.bc_idx is None:
         if (
@@ -253,7 +254,7 @@ def update_detector_state(state: DetectorState, bar: dict) -> Optional[dict]:
                 state.last_event_label = "BC"
                 _apply_regime_transition(state, "BC", idx)
                 state.regime_bars += 1
-                return {"date": date_str, "event": "BC", "score": float(vol_z)}
+                return {"idx": idx, "date": bar_date, "event": "BC", "score": float(vol_z)}
 
     if state.sc_idx is not None and state.ar_idx is None and not state.ar_locked:
         if state.ar_deadline is None or idx <= state.ar_deadline:
@@ -269,7 +270,7 @@ def update_detector_state(state: DetectorState, bar: dict) -> Optional[dict]:
                     state.last_event_label = "AR"
                     _apply_regime_transition(state, "AR", idx)
                     state.regime_bars += 1
-                    return {"date": date_str, "event": "AR", "score": float(tr_z)}
+                    return {"idx": idx, "date": bar_date, "event": "AR", "score": float(tr_z)}
 
     if state.bc_idx is not None and state.ar_top_idx is None and not state.ar_top_locked:
         if state.ar_top_deadline is None or idx <= state.ar_top_deadline:
@@ -285,7 +286,7 @@ def update_detector_state(state: DetectorState, bar: dict) -> Optional[dict]:
                     state.last_event_label = "AR_TOP"
                     _apply_regime_transition(state, "AR_TOP", idx)
                     state.regime_bars += 1
-                    return {"date": date_str, "event": "AR_TOP", "score": float(tr_z)}
+                    return {"idx": idx, "date": bar_date, "event": "AR_TOP", "score": float(tr_z)}
 
     if state.support_level is not None and state.spring_idx is None and not state.spring_locked:
         if state.spring_deadline is None or idx <= state.spring_deadline:
@@ -304,7 +305,7 @@ def update_detector_state(state: DetectorState, bar: dict) -> Optional[dict]:
                     state.last_event_label = "SPRING"
                     _apply_regime_transition(state, "SPRING", event_idx)
                     state.regime_bars += 1
-                    return {"date": event_date, "event": "SPRING", "score": event_score}
+                    return {"idx": event_idx, "date": event_date, "event": "SPRING", "score": event_score}
             if idx >= state.cfg.min_bars_in_range:
                 if float(bar["low"]) < state.support_level * (1 - state.cfg.spring_break_pct):
                     if (
@@ -319,10 +320,10 @@ def update_detector_state(state: DetectorState, bar: dict) -> Optional[dict]:
                             state.last_event_label = "SPRING"
                             _apply_regime_transition(state, "SPRING", idx)
                             state.regime_bars += 1
-                            return {"date": date_str, "event": "SPRING", "score": float(vol_z)}
+                            return {"idx": idx, "date": bar_date, "event": "SPRING", "score": float(vol_z)}
                         state.pending_spring = {
                             "idx": float(idx),
-                            "date": date_str,
+                            "date": bar_date,
                             "score": float(vol_z),
                             "deadline": float(idx + state.cfg.spring_reentry_bars),
                         }
@@ -342,7 +343,7 @@ def update_detector_state(state: DetectorState, bar: dict) -> Optional[dict]:
                     state.last_event_label = "UT"
                     _apply_regime_transition(state, "UT", event_idx)
                     state.regime_bars += 1
-                    return {"date": event_date, "event": "UT", "score": event_score}
+                    return {"idx": event_idx, "date": event_date, "event": "UT", "score": event_score}
             if idx >= state.cfg.min_bars_in_range:
                 if float(bar["high"]) > state.resistance_level * (1 + state.cfg.ut_break_pct):
                     if _is_valid(close_pos) and close_pos <= state.cfg.ut_close_pos:
@@ -353,10 +354,10 @@ def update_detector_state(state: DetectorState, bar: dict) -> Optional[dict]:
                             state.last_event_label = "UT"
                             _apply_regime_transition(state, "UT", idx)
                             state.regime_bars += 1
-                            return {"date": date_str, "event": "UT", "score": score}
+                            return {"idx": idx, "date": bar_date, "event": "UT", "score": score}
                         state.pending_ut = {
                             "idx": float(idx),
-                            "date": date_str,
+                            "date": bar_date,
                             "score": score,
                             "deadline": float(idx + state.cfg.ut_reentry_bars),
                         }
@@ -370,7 +371,7 @@ def update_detector_state(state: DetectorState, bar: dict) -> Optional[dict]:
                     state.last_event_label = "SOS"
                     _apply_regime_transition(state, "SOS", idx)
                     state.regime_bars += 1
-                    return {"date": date_str, "event": "SOS", "score": float(tr_z)}
+                    return {"idx": idx, "date": bar_date, "event": "SOS", "score": float(tr_z)}
 
     if state.support_level is not None and state.sow_idx is None and not state.sow_locked:
         if state.sow_deadline is None or idx <= state.sow_deadline:
@@ -381,7 +382,7 @@ def update_detector_state(state: DetectorState, bar: dict) -> Optional[dict]:
                     state.last_event_label = "SOW"
                     _apply_regime_transition(state, "SOW", idx)
                     state.regime_bars += 1
-                    return {"date": date_str, "event": "SOW", "score": float(tr_z)}
+                    return {"idx": idx, "date": bar_date, "event": "SOW", "score": float(tr_z)}
 
     state.regime_bars += 1
     state.prev_close = float(bar["close"])
@@ -417,8 +418,12 @@ class IncrementalWyckoffDetector:
             }
             self.update(bar)
 
-        rows = [
-            {"symbol": symbol, "date": ev["date"], "event": ev["event"], "score": ev["score"]}
-            for ev in self.events
-        ]
-        return pd.DataFrame(rows, columns=["symbol", "date", "event", "score"])
+        days = prepared["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+        bar_index = [int(ev["idx"]) for ev in self.events]
+        return events_frame(
+            symbol,
+            bar_index,
+            days[bar_index],
+            [ev["event"] for ev in self.events],
+            [ev["score"] for ev in self.events],
+        )
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Literal, Optional, Dict, List, Any
+from typing import Literal, Optional, Dict, List, Any, Tuple
 
 import numpy as np
 import pandas as pd
 
+from .features import structural_features
+
 
 PhaseName = Literal["Accumulation", "Markup", "Distribution", "Markdown"]
+# How much of the result `detect_structural_wyckoff` builds; see its docstring.
+OutputLevel = Literal["events", "phases", "full"]
+OUTPUT_LEVELS = ("events", "phases", "full")
 
 
 @dataclass
@@ -72,7 +77,8 @@ def _prepare_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
     Required columns (case-insensitive):
       - date, open, high, low, close, volume
     """
-    df = df.copy()
+    # Shallow copy: only new columns are added below, callers' arrays are never written.
+    df = df.copy(deep=False)
 
     # Normalize column names to lowercase
     rename_map: Dict[str, str] = {}
@@ -95,7 +101,10 @@ def _prepare_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
     if not pd.api.types.is_datetime64_any_dtype(df["date"]):
         df["date"] = pd.to_datetime(df["date"])
 
-    df = df.sort_values("date").reset_index(drop=True)
+    if df["date"].is_monotonic_increasing:
+        df = df.reset_index(drop=True)
+    else:
+        df = df.sort_values("date").reset_index(drop=True)
 
     # True range etc.
     df["tr"] = (df["high"] - df["low"]).abs()
@@ -106,16 +115,64 @@ def _prepare_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+_OUTPUT_KEYS: Dict[str, Tuple[str, ...]] = {
+    "events": ("events",),
+    "phases": ("events", "phases"),
+    "full": ("events", "phases", "bands", "per_bar_phase"),
+}
+
+
+def _format_day(day: np.int64) -> str:
+    """`YYYY-MM-DD` for an int64 day number."""
+    return str(np.datetime64(int(day), "D"))
+
+
+def _first_hit(mask: np.ndarray, start: int, stop: int) -> Optional[int]:
+    """First index in `[start, stop)` where `mask` is true, or None."""
+    stop = min(stop, mask.shape[0])
+    if start >= stop:
+        return None
+    offset = int(np.argmax(mask[start:stop]))
+    return start + offset if mask[start + offset] else None
+
+
+def _last_hit(mask: np.ndarray) -> Optional[int]:
+    hits = np.flatnonzero(mask)
+    return int(hits[-1]) if hits.size else None
+
+
+def _any_within(hit: np.ndarray, bars: int) -> np.ndarray:
+    """For each bar `i`, whether `hit` is true anywhere in bars `i..i + bars`."""
+    n = hit.shape[0]
+    counts = np.concatenate(([0], np.cumsum(hit)))
+    ends = np.minimum(np.arange(n) + bars + 1, n)
+    return counts[ends] - counts[:n] > 0
+
+
 def detect_structural_wyckoff(
     df: pd.DataFrame,
     cfg: Optional[WyckoffStructuralConfig] = None,
+    output: OutputLevel = "full",
+    features: Optional[Dict[str, np.ndarray]] = None,
 ) -> Dict[str, Any]:
     """
     Detect structural Wyckoff events + phases from OHLCV.
 
+    `idx` is the event's position in the date-sorted bars and `day` its
+    date as int64 days since epoch; `date` is the same day formatted for
+    charts.
+
+    `output` selects how much is built: `"events"` returns only `events`
+    (the benchmark path), `"phases"` adds `phases`, and `"full"` (default)
+    is the whole chart payload below. Events are identical at every level.
+
+    `features` may carry this symbol's precomputed `baseline.features`
+    arrays (e.g. a slice of a batched cross-symbol pass); they must match
+    `cfg`'s windows and the date-sorted bars.
+
     Returns:
         {
-          "events": [ { "idx": int, "date": str, "label": str, "score": float }, ... ],
+          "events": [ { "idx": int, "day": int, "date": str, "label": str, "score": float }, ... ],
           "phases": {
              "accumulation": { "name": "Accumulation", "start_idx": int, "end_idx": int,
                                "start_date": str, "end_date": str },
@@ -125,6 +182,8 @@ def detect_structural_wyckoff(
           "per_bar_phase": [ "Accumulation" | "Markup" | "Distribution" | "Markdown" | None, ... ]
         }
     """
+    if output not in OUTPUT_LEVELS:
+        raise ValueError(f"output must be one of {OUTPUT_LEVELS}, got {output!r}")
     if cfg is None:
         cfg = WyckoffStructuralConfig()
 
@@ -132,17 +191,22 @@ def detect_structural_wyckoff(
 
     n = len(df)
     if n < cfg.min_bars_in_range:
-        return {"events": [], "phases": {}, "bands": [], "per_bar_phase": [None] * n}
-
-    # Rolling z-scores
-    tr_series: pd.Series = df["tr"]
-    vol_series: pd.Series = df["volume"]
-    df["tr_z"] = _compute_zscore(tr_series, cfg.range_lookback) * cfg.range_z_scale
-    df["vol_z"] = _compute_zscore(vol_series, cfg.vol_lookback) * cfg.volume_z_scale
-
-    # Simple trend proxy: SMA slope
-    df["sma_trend"] = df["close"].rolling(cfg.lookback_trend).mean()
-    df["sma_slope"] = df["sma_trend"].diff()
+        empty: Dict[str, Any] = {"events": [], "phases": {}, "bands": [], "per_bar_phase": [None] * n}
+        return {key: empty[key] for key in _OUTPUT_KEYS[output]}
+
+    close = df["close"].to_numpy(dtype="float64")
+    low = df["low"].to_numpy(dtype="float64")
+    high = df["high"].to_numpy(dtype="float64")
+
+    # Rolling z-scores and SMA slope (simple trend proxy); the scans below run
+    # on plain arrays indexed by bar position.
+    if features is None:
+        features = structural_features(high, low, close, df["volume"], np.array([0, n]), cfg)
+    elif len(features["tr_z"]) != n:
+        raise ValueError(f"features cover {len(features['tr_z'])} bars, expected {n}")
+    tr_z, vol_z = features["tr_z"], features["vol_z"]
+    sma_slope, close_pos = features["sma_slope"], features["close_pos"]
+    days = df["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
 
     events: List[Dict[str, Any]] = []
 
@@ -154,7 +218,8 @@ def detect_structural_wyckoff(
     ) -> None:
         ev: Dict[str, Any] = {
             "idx": int(idx),
-            "date": df.loc[idx, "date"].strftime("%Y-%m-%d"),
+            "day": int(days[idx]),
+            "date": _format_day(days[idx]),
             "label": label,
             "score": float(score),
         }
@@ -163,142 +228,91 @@ def detect_structural_wyckoff(
         events.append(ev)
 
     # --- Selling Climax (SC) ---
-    sc_candidates = df[
-        (df["tr_z"] >= cfg.sc_tr_z)
-        & (df["vol_z"] >= cfg.sc_vol_z)
-        & (df["close_pos"] >= 0.5)  # closes off the low
-    ].index.tolist()
-
-    sc_idx: Optional[int] = None
-    if sc_candidates:
-        # pick latest candidate that sits after a downtrend if required
-        for idx in reversed(sc_candidates):
-            if not cfg.require_prior_trend_for_sc_bc:
-                sc_idx = int(idx)
-                break
-            # crude downtrend: SMA slope negative going into SC
-            if df.loc[idx, "sma_slope"] < 0:
-                sc_idx = int(idx)
-                break
-        if sc_idx is not None:
-            add_event(sc_idx, "SC", score=float(df.loc[sc_idx, "vol_z"]))
+    # Latest candidate, after a downtrend (negative SMA slope) if required.
+    sc_mask = (tr_z >= cfg.sc_tr_z) & (vol_z >= cfg.sc_vol_z) & (close_pos >= 0.5)  # closes off the low
+    if cfg.require_prior_trend_for_sc_bc:
+        sc_mask &= sma_slope < 0
+    sc_idx = _last_hit(sc_mask)
+    if sc_idx is not None:
+        add_event(sc_idx, "SC", score=float(vol_z[sc_idx]))
 
     # --- Buying Climax (BC) ---
-    bc_candidates = df[
-        (df["tr_z"] >= cfg.bc_tr_z)
-        & (df["vol_z"] >= cfg.bc_vol_z)
-        & (df["close_pos"] >= 0.6)  # closes near high
-    ].index.tolist()
-
-    bc_idx: Optional[int] = None
-    if bc_candidates:
-        for idx in reversed(bc_candidates):
-            if not cfg.require_prior_trend_for_sc_bc:
-                bc_idx = int(idx)
-                break
-            if df.loc[idx, "sma_slope"] > 0:  # crude uptrend
-                bc_idx = int(idx)
-                break
-        if bc_idx is not None:
-            add_event(bc_idx, "BC", score=float(df.loc[bc_idx, "vol_z"]))
+    bc_mask = (tr_z >= cfg.bc_tr_z) & (vol_z >= cfg.bc_vol_z) & (close_pos >= 0.6)  # closes near high
+    if cfg.require_prior_trend_for_sc_bc:
+        bc_mask &= sma_slope > 0  # crude uptrend
+    bc_idx = _last_hit(bc_mask)
+    if bc_idx is not None:
+        add_event(bc_idx, "BC", score=float(vol_z[bc_idx]))
 
     # --- Simple AR / AR_TOP (first strong reaction after climax) ---
     ar_idx: Optional[int] = None
     ar_top_idx: Optional[int] = None
+    up_close = np.zeros(n, dtype=bool)
+    up_close[1:] = close[1:] > close[:-1]
+    down_close = np.zeros(n, dtype=bool)
+    down_close[1:] = close[1:] < close[:-1]
 
     if sc_idx is not None:
-        window = range(sc_idx + 1, min(sc_idx + cfg.min_bars_in_range, n))
-        ar_candidates = [
-            i
-            for i in window
-            if df.loc[i, "close"] > df.loc[i - 1, "close"] and df.loc[i, "tr_z"] > 0.5
-        ]
-        if ar_candidates:
-            ar_idx = ar_candidates[0]
-            add_event(ar_idx, "AR", score=float(df.loc[ar_idx, "tr_z"]))
+        ar_idx = _first_hit(up_close & (tr_z > 0.5), sc_idx + 1, sc_idx + cfg.min_bars_in_range)
+        if ar_idx is not None:
+            add_event(ar_idx, "AR", score=float(tr_z[ar_idx]))
 
     if bc_idx is not None:
-        window = range(bc_idx + 1, min(bc_idx + cfg.min_bars_in_range, n))
-        ar_top_candidates = [
-            i
-            for i in window
-            if df.loc[i, "close"] < df.loc[i - 1, "close"] and df.loc[i, "tr_z"] > 0.5
-        ]
-        if ar_top_candidates:
-            ar_top_idx = ar_top_candidates[0]
-            add_event(ar_top_idx, "AR_TOP", score=float(df.loc[ar_top_idx, "tr_z"]))
+        ar_top_idx = _first_hit(down_close & (tr_z > 0.5), bc_idx + 1, bc_idx + cfg.min_bars_in_range)
+        if ar_top_idx is not None:
+            add_event(ar_top_idx, "AR_TOP", score=float(tr_z[ar_top_idx]))
 
     # --- Springs and Upthrusts (simplified) ---
     support_level: Optional[float] = None
     resistance_level: Optional[float] = None
 
+    # fmin/fmax skip NaN like pandas' min/max.
     if sc_idx is not None and ar_idx is not None:
-        support_level = float(df.loc[sc_idx:ar_idx, "low"].min())
+        support_level = float(np.fmin.reduce(low[sc_idx : ar_idx + 1]))
     if bc_idx is not None and ar_top_idx is not None:
-        resistance_level = float(df.loc[bc_idx:ar_top_idx, "high"].max())
+        resistance_level = float(np.fmax.reduce(high[bc_idx : ar_top_idx + 1]))
 
-    # Detect Springs: break below support then re-enter
+    # Springs: break below support, close back into range within spring_reentry_bars,
+    # close position high in bar and volume confirmation; only the first is marked.
+    # NaN close_pos / vol_z do not disqualify a bar (the checks are "not below").
     if support_level is not None:
-        for i in range(cfg.min_bars_in_range, n):
-            low = float(df.loc[i, "low"])
-            if low < support_level * (1 - cfg.spring_break_pct):
-                # need close back into range within spring_reentry_bars
-                reentry = False
-                for j in range(i, min(i + cfg.spring_reentry_bars + 1, n)):
-                    if float(df.loc[j, "close"]) >= support_level:
-                        reentry = True
-                        break
-                if not reentry:
-                    continue
-
-                # close position high in bar
-                if float(df.loc[i, "close_pos"]) < cfg.spring_close_pos:
-                    continue
-
-                if float(df.loc[i, "vol_z"]) < cfg.spring_vol_z:
-                    continue
-
-                add_event(i, "SPRING", score=float(df.loc[i, "vol_z"]))
-                break  # only mark first Spring for now
-
-    # Detect Upthrusts: break above resistance then fall back
+        spring_mask = (
+            (low < support_level * (1 - cfg.spring_break_pct))
+            & _any_within(close >= support_level, cfg.spring_reentry_bars)
+            & ~(close_pos < cfg.spring_close_pos)
+            & ~(vol_z < cfg.spring_vol_z)
+        )
+        spring_idx = _first_hit(spring_mask, cfg.min_bars_in_range, n)
+        if spring_idx is not None:
+            add_event(spring_idx, "SPRING", score=float(vol_z[spring_idx]))
+
+    # Upthrusts: break above resistance then fall back
     if resistance_level is not None:
-        for i in range(cfg.min_bars_in_range, n):
-            high = float(df.loc[i, "high"])
-            if high > resistance_level * (1 + cfg.ut_break_pct):
-                reentry = False
-                for j in range(i, min(i + cfg.ut_reentry_bars + 1, n)):
-                    if float(df.loc[j, "close"]) <= resistance_level:
-                        reentry = True
-                        break
-                if not reentry:
-                    continue
-
-                if float(df.loc[i, "close_pos"]) > cfg.ut_close_pos:
-                    continue
-
-                add_event(i, "UT", score=float(df.loc[i, "tr_z"]))
-                break
+        ut_mask = (
+            (high > resistance_level * (1 + cfg.ut_break_pct))
+            & _any_within(close <= resistance_level, cfg.ut_reentry_bars)
+            & ~(close_pos > cfg.ut_close_pos)
+        )
+        ut_idx = _first_hit(ut_mask, cfg.min_bars_in_range, n)
+        if ut_idx is not None:
+            add_event(ut_idx, "UT", score=float(tr_z[ut_idx]))
 
     # --- SOW (Sign of Weakness) & SOS (Sign of Strength) proxies ---
     sow_idx: Optional[int] = None
     sos_idx: Optional[int] = None
 
     if resistance_level is not None:
-        candidates = df[
-            (df["close"] > resistance_level) & (df["tr_z"] >= cfg.sos_tr_z)
-        ].index.tolist()
-        if candidates:
-            sos_idx = int(candidates[0])
-            add_event(sos_idx, "SOS", score=float(df.loc[sos_idx, "tr_z"]))
+        sos_idx = _first_hit((close > resistance_level) & (tr_z >= cfg.sos_tr_z), 0, n)
+        if sos_idx is not None:
+            add_event(sos_idx, "SOS", score=float(tr_z[sos_idx]))
 
     if support_level is not None:
-        candidates = df[
-            (df["close"] < support_level) & (df["tr_z"] >= cfg.sow_tr_z)
-        ].index.tolist()
-        if candidates:
-            sow_idx = int(candidates[0])
-            add_event(sow_idx, "SOW", score=float(df.loc[sow_idx, "tr_z"]))
+        sow_idx = _first_hit((close < support_level) & (tr_z >= cfg.sow_tr_z), 0, n)
+        if sow_idx is not None:
+            add_event(sow_idx, "SOW", score=float(tr_z[sow_idx]))
+
+    if output == "events":
+        return {"events": events}
 
     # --- Phase construction (v1) ---
     phases: Dict[str, Dict[str, Any]] = {}
@@ -314,8 +328,8 @@ def detect_structural_wyckoff(
             "name": name,
             "start_idx": start_idx,
             "end_idx": end_idx,
-            "start_date": df.loc[start_idx, "date"].strftime("%Y-%m-%d"),
-            "end_date": df.loc[end_idx, "date"].strftime("%Y-%m-%d"),
+            "start_date": _format_day(days[start_idx]),
+            "end_date": _format_day(days[end_idx]),
         }
 
     # Accumulation: SC → (SOS or AR)
@@ -366,12 +380,15 @@ def detect_structural_wyckoff(
         if cfg.extend_first_phase_to_start:
             first_key = min(phases.keys(), key=lambda k: phases[k]["start_idx"])
             phases[first_key]["start_idx"] = 0
-            phases[first_key]["start_date"] = df.loc[0, "date"].strftime("%Y-%m-%d")
+            phases[first_key]["start_date"] = _format_day(days[0])
         
         if cfg.extend_last_phase_to_end:
             last_key = max(phases.keys(), key=lambda k: phases[k]["end_idx"])
             phases[last_key]["end_idx"] = n - 1
-            phases[last_key]["end_date"] = df.loc[n - 1, "date"].strftime("%Y-%m-%d")
+            phases[last_key]["end_date"] = _format_day(days[n - 1])
+
+    if output == "phases":
+        return {"events": events, "phases": phases}
 
     # Build bands for chart shading
     phase_colors = {
@@ -396,8 +413,8 @@ def detect_structural_wyckoff(
     per_bar_phase: List[Optional[PhaseName]] = [None] * n
     for info in phases.values():
         nm2: PhaseName = info["name"]  # type: ignore
-        for i in range(info["start_idx"], info["end_idx"] + 1):
-            per_bar_phase[i] = nm2
+        start, end = info["start_idx"], info["end_idx"] + 1
+        per_bar_phase[start:end] = [nm2] * (end - start)
 
     return {
         "events": events,
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import pyarrow as pa
+
+from harness import io as _io
+from harness.bars import PRICE_FIELDS, SymbolBars
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+class BarCache:
+    """
+    Run-scoped cache of decoded per-symbol `SymbolBars`.
+
+    Each symbol is decoded from Parquet once and spilled to an uncompressed
+    Arrow IPC file under `spill_dir`, which worker processes share by path.
+    `get` also holds bars in an in-memory LRU bounded by `max_bytes`; evicted
+    symbols are reloaded zero-copy from the memory-mapped spill instead of
+    Parquet. With `spill=False` (single-process runs, where nothing else
+    reads the spill) no files are written and the LRU alone serves repeats.
+    """
+
+    def __init__(
+        self,
+        ohlcv_path: str,
+        lookback_days: int,
+        spill_dir: Optional[str] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        base_dir: Optional[str] = None,
+        spill: bool = True,
+    ) -> None:
+        self.ohlcv_path = ohlcv_path
+        self.lookback_days = lookback_days
+        self.max_bytes = max(0, int(max_bytes))
+        self._tmp: Optional[tempfile.TemporaryDirectory] = None
+        self.spill_dir: Optional[str] = None
+        if spill and spill_dir is None:
+            if base_dir is not None:
+                Path(base_dir).mkdir(parents=True, exist_ok=True)
+            self._tmp = tempfile.TemporaryDirectory(prefix="wfb_bars_", dir=base_dir)
+            spill_dir = self._tmp.name
+        if spill_dir is not None:
+            self.spill_dir = str(spill_dir)
+        self._frames: "OrderedDict[str, SymbolBars]" = OrderedDict()
+        self._sizes: dict = {}
+        self._bytes = 0
+        # Read-ahead threads call `get` concurrently; the LRU is shared.
+        self._lock = threading.Lock()
+
+    def _spill_path(self, symbol: str) -> Path:
+        return Path(self.spill_dir) / f"{symbol}.arrow"
+
+    def _empty_marker(self, symbol: str) -> Path:
+        return Path(self.spill_dir) / f"{symbol}.empty"
+
+    def _write_spill(self, symbol: str, bars: Optional[SymbolBars]) -> None:
+        if bars is None or bars.empty:
+            self._empty_marker(symbol).touch()
+            return
+        path = self._spill_path(symbol)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        columns = {"date": bars.date}
+        columns.update({name: getattr(bars, name) for name in PRICE_FIELDS})
+        columns.update(bars.extra)
+        table = pa.table(columns, metadata={"symbol": bars.symbol})
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def _read_spill(self, symbol: str) -> SymbolBars:
+        source = pa.memory_map(str(self._spill_path(symbol)), "r")
+        table = pa.ipc.open_file(source).read_all().combine_chunks()
+        columns = {
+            name: table.column(name).chunk(0).to_numpy(zero_copy_only=True)
+            for name in table.column_names
+        }
+        extra = {name: values for name, values in columns.items() if name not in {"date", *PRICE_FIELDS}}
+        return SymbolBars(
+            symbol, columns["date"], *(columns[name] for name in PRICE_FIELDS), extra=extra
+        )
+
+    def remember(self, symbol: str, bars: SymbolBars) -> None:
+        """Add bars obtained through `load` to the in-memory LRU."""
+        size = bars.nbytes
+        with self._lock:
+            if symbol in self._frames:
+                self._frames.move_to_end(symbol)
+                return
+            if size > self.max_bytes:
+                return
+            self._frames[symbol] = bars
+            self._sizes[symbol] = size
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._frames:
+                evicted, _ = self._frames.popitem(last=False)
+                self._bytes -= self._sizes.pop(evicted)
+
+    def load(self, symbol: str) -> Optional[SymbolBars]:
+        """
+        Decode a symbol into the spill (or reopen its spill) without touching the LRU.
+
+        Only per-symbol files are written, so read-ahead threads may call this
+        concurrently for distinct symbols. Without a spill this just decodes.
+        """
+        if self.spill_dir is None:
+            bars = _io.read_symbol_bars(symbol, self.ohlcv_path, self.lookback_days)
+            return None if bars is None or bars.empty else bars
+        if self._empty_marker(symbol).exists():
+            return None
+        if self._spill_path(symbol).exists():
+            return self._read_spill(symbol)
+        bars = _io.read_symbol_bars(symbol, self.ohlcv_path, self.lookback_days)
+        self._write_spill(symbol, bars)
+        if bars is None or bars.empty:
+            return None
+        return bars
+
+    def get(self, symbol: str) -> Optional[SymbolBars]:
+        with self._lock:
+            bars = self._frames.get(symbol)
+            if bars is not None:
+                self._frames.move_to_end(symbol)
+                return bars
+
+        bars = self.load(symbol)
+        if bars is not None:
+            self.remember(symbol, bars)
+        return bars
+
+    def close(self) -> None:
+        self._frames.clear()
+        self._sizes.clear()
+        self._bytes = 0
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
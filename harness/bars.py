@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Hashable, Iterable, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+PRICE_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def _frozen(values: np.ndarray, dtype: str) -> np.ndarray:
+    arr = np.ascontiguousarray(values, dtype=dtype)
+    if arr.flags.writeable:
+        if arr is values or arr.base is not None:
+            arr = arr.copy()
+        arr.flags.writeable = False
+    return arr
+
+
+def to_day_numbers(dates: Union[pd.Series, pd.Index, np.ndarray, Iterable]) -> np.ndarray:
+    """Convert dates (strings, datetimes) to int64 days since epoch; NaT becomes INT64 min."""
+    parsed = pd.to_datetime(pd.Series(dates), errors="coerce")
+    if getattr(parsed.dt, "tz", None) is not None:
+        parsed = parsed.dt.tz_localize(None)
+    values = parsed.to_numpy(dtype="datetime64[ns]")
+    days = values.astype("datetime64[D]")
+    return days.astype(np.int64)
+
+
+def day_numbers_to_datetime(days: np.ndarray) -> np.ndarray:
+    return np.asarray(days, dtype=np.int64).astype("datetime64[D]").astype("datetime64[ns]")
+
+
+class SymbolBars:
+    """
+    Immutable daily OHLCV bars for one symbol, backed by contiguous read-only arrays.
+
+    Bars are sorted by date and validated once at construction; `date` holds
+    int64 days since epoch. Consumers that still need a DataFrame use
+    `to_frame()`, a cached view over the same arrays.
+    """
+
+    __slots__ = (
+        "symbol", "date", "open", "high", "low", "close", "volume", "extra", "_frame", "_forward", "_derived"
+    )
+
+    def __init__(
+        self,
+        symbol: str,
+        date: np.ndarray,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
+        extra: Optional[Mapping[str, np.ndarray]] = None,
+    ) -> None:
+        date = np.asarray(date, dtype=np.int64)
+        columns = {"open": open, "high": high, "low": low, "close": close, "volume": volume}
+        n = date.shape[0]
+        for name, values in list(columns.items()) + list((extra or {}).items()):
+            if np.shape(values) != (n,):
+                raise ValueError(f"Column '{name}' has shape {np.shape(values)}, expected ({n},)")
+
+        order = None
+        if n > 1 and np.any(date[1:] < date[:-1]):
+            order = np.argsort(date, kind="mergesort")
+
+        def _prepare(values: np.ndarray) -> np.ndarray:
+            values = np.asarray(values)
+            if order is not None:
+                values = values[order]
+            return _frozen(values, "float64")
+
+        set_ = object.__setattr__
+        set_(self, "symbol", str(symbol))
+        set_(self, "date", _frozen(date[order] if order is not None else date, "int64"))
+        for name, values in columns.items():
+            set_(self, name, _prepare(values))
+        set_(self, "extra", {name: _prepare(values) for name, values in (extra or {}).items()})
+        set_(self, "_frame", None)
+        set_(self, "_forward", {})
+        set_(self, "_derived", {})
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError("SymbolBars is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("SymbolBars is immutable")
+
+    def __reduce__(self):
+        return (
+            SymbolBars,
+            (self.symbol, self.date, self.open, self.high, self.low, self.close, self.volume, self.extra),
+        )
+
+    def __len__(self) -> int:
+        return int(self.date.shape[0])
+
+    def __repr__(self) -> str:
+        if len(self) == 0:
+            return f"SymbolBars(symbol={self.symbol!r}, n=0)"
+        first, last = day_numbers_to_datetime(self.date[[0, -1]])
+        return (
+            f"SymbolBars(symbol={self.symbol!r}, n={len(self)}, "
+            f"range={str(first)[:10]}->{str(last)[:10]})"
+        )
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    @property
+    def nbytes(self) -> int:
+        total = self.date.nbytes + sum(getattr(self, name).nbytes for name in PRICE_FIELDS)
+        return int(total + sum(values.nbytes for values in self.extra.values()))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, symbol: Optional[str] = None) -> "SymbolBars":
+        """Validate a `date, open, high, low, close, volume` frame; rows with unparseable dates are dropped."""
+        missing = {"date", *PRICE_FIELDS} - set(df.columns)
+        if missing:
+            raise ValueError(f"Missing OHLCV columns: {missing}")
+        if symbol is None:
+            if "symbol" in df.columns and not df["symbol"].isna().all():
+                symbol = str(df["symbol"].dropna().iloc[0])
+            else:
+                symbol = "UNKNOWN"
+
+        dates = pd.to_datetime(df["date"], errors="coerce")
+        if getattr(dates.dt, "tz", None) is not None:
+            dates = dates.dt.tz_localize(None)
+        valid = dates.notna().to_numpy()
+        dates = dates[valid]
+        if not (dates == dates.dt.normalize()).all():
+            raise ValueError(f"SymbolBars expects daily bars; '{symbol}' has intraday timestamps")
+
+        extra = {
+            col: pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64")[valid]
+            for col in df.columns
+            if col not in {"symbol", "date", *PRICE_FIELDS}
+            and pd.api.types.is_numeric_dtype(df[col])
+        }
+        return cls(
+            symbol,
+            dates.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64),
+            *(df[name].to_numpy(dtype="float64")[valid] for name in PRICE_FIELDS),
+            extra=extra,
+        )
+
+    def dates(self) -> np.ndarray:
+        return day_numbers_to_datetime(self.date)
+
+    def positions(self, days: np.ndarray) -> np.ndarray:
+        """Bar index of each day number, or -1 where no bar exists on that day."""
+        days = np.asarray(days, dtype=np.int64)
+        if len(self) == 0:
+            return np.full(days.shape, -1, dtype=np.int64)
+        pos = np.searchsorted(self.date, days, side="left")
+        pos = np.minimum(pos, len(self) - 1)
+        return np.where(self.date[pos] == days, pos, -1).astype(np.int64)
+
+    def forward_return_matrix(self, windows: Iterable[int]) -> np.ndarray:
+        """
+        Cached read-only `(n_bars, n_windows)` forward returns for sorted unique `windows`.
+
+        Computed once per symbol and window set; events look up their rows by
+        bar index, so every stage shares the same matrix.
+        """
+        key = tuple(sorted({int(w) for w in windows}))
+        matrix = self._forward.get(key)
+        if matrix is None:
+            matrix = np.full((len(self), len(key)), np.nan, dtype="float64")
+            for column, window in enumerate(key):
+                if 0 < window < len(self):
+                    matrix[:-window, column] = self.close[window:] / self.close[:-window] - 1.0
+            matrix.flags.writeable = False
+            self._forward[key] = matrix
+        return matrix
+
+    def derived(self, key: Hashable, compute: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Per-symbol memo for values derived from the bars (e.g. detector features).
+
+        Returns the value stored under `key`, computing and storing it with
+        `compute` when missing (None if missing and no `compute`). Values
+        are shared by every consumer of these bars; treat them as read-only.
+        """
+        if key not in self._derived and compute is not None:
+            self._derived[key] = compute()
+        return self._derived.get(key)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Cached DataFrame view (`symbol, date, open, high, low, close, volume, ...`); treat as read-only."""
+        if self._frame is None:
+            data: Dict[str, object] = {"symbol": self.symbol, "date": self.dates()}
+            for name in PRICE_FIELDS:
+                data[name] = getattr(self, name)
+            data.update(self.extra)
+            object.__setattr__(self, "_frame", pd.DataFrame(data, copy=False))
+        return self._frame
+
+
+BarsLike = Union[pd.DataFrame, SymbolBars]
+
+
+def as_frame(bars: BarsLike) -> pd.DataFrame:
+    return bars.to_frame() if isinstance(bars, SymbolBars) else bars
+
+
+def bars_symbol(bars: BarsLike, cfg: Optional[Dict] = None) -> str:
+    if isinstance(bars, SymbolBars):
+        return bars.symbol
+    if "symbol" in bars.columns and not bars["symbol"].isna().all():
+        return str(bars["symbol"].iloc[0])
+    return str((cfg or {}).get("symbol", "UNKNOWN"))
@@ -13,6 +13,8 @@ def attach_prior_regime(
 ) -> pd.DataFrame:
     """
     Adds prior_regime column to each event (optionally filtered by event type).
+
+    Events' `bar_index`/`day` columns, when present, are kept in the output.
     """
     columns = ["symbol", "date", "event", "prior_regime"]
     if events_df is None or events_df.empty:
@@ -29,6 +31,7 @@ def attach_prior_regime(
         events = ["SOS", "SOW", "BC", "SPRING"]
     allowed_events = {str(event).upper() for event in events}
     data = data[data["event"].isin(allowed_events)]
+    columns = columns + [c for c in ("bar_index", "day") if c in data.columns]
     if data.empty:
         return pd.DataFrame(columns=columns)
 
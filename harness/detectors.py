@@ -1,40 +1,79 @@
 from __future__ import annotations
 
-from typing import Callable, Dict
+from typing import Callable, Dict, Iterable, List, Set, Tuple
 
 import pandas as pd
 
 from baseline.adapter import run_baseline_structural
+from baseline.features import KERNEL_FEATURE_NAMES
 from baseline.incremental import IncrementalWyckoffDetector
 from baseline.structural import WyckoffStructuralConfig
+from harness.bars import BarsLike, as_frame, bars_symbol
+from harness.features import structural_features
 from spring_after_sc.detector import spring_after_sc_detector
 from spring_after_ATR_compression_ratio.detector import (
+    FEATURE_COLUMNS as ATR_FEATURE_COLUMNS,
     spring_after_ATR_compression_ratio_detector,
 )
 
-DetectorFn = Callable[[pd.DataFrame, Dict], pd.DataFrame]
+# Detectors with upstream dependencies are also passed `upstream=`, a dict of
+# each dependency's raw events for the same bars.
+DetectorFn = Callable[..., pd.DataFrame]
 
 
-def baseline_detector(df: pd.DataFrame, cfg: Dict) -> pd.DataFrame:
-    if "symbol" in df.columns and not df["symbol"].isna().all():
-        symbol = str(df["symbol"].iloc[0])
-    else:
-        symbol = str(cfg.get("symbol", "UNKNOWN"))
-    return run_baseline_structural(df, symbol, None)
+def baseline_detector(df: BarsLike, cfg: Dict) -> pd.DataFrame:
+    return run_baseline_structural(
+        as_frame(df), bars_symbol(df, cfg), None, features=structural_features(df)
+    )
 
 
-def incremental_baseline_detector(df: pd.DataFrame, cfg: Dict) -> pd.DataFrame:
-    if "symbol" in df.columns and not df["symbol"].isna().all():
-        symbol = str(df["symbol"].iloc[0])
-    else:
-        symbol = str(cfg.get("symbol", "UNKNOWN"))
+def incremental_baseline_detector(df: BarsLike, cfg: Dict) -> pd.DataFrame:
     detector = IncrementalWyckoffDetector(WyckoffStructuralConfig())
-    return detector.run(df, symbol)
+    return detector.run(as_frame(df), bars_symbol(df, cfg))
 
 
+# Feature sets (see `harness.features.FEATURE_SETS`) and the columns of each
+# a detector reads; the harness primes them for whole batches of symbols at
+# once, loading only those columns from the feature store when configured.
+DETECTOR_FEATURES: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "baseline": {"structural": KERNEL_FEATURE_NAMES},
+    "spring_after_ATR_compression_ratio": {"atr": ATR_FEATURE_COLUMNS},
+}
+
 DETECTORS: Dict[str, DetectorFn] = {
     "baseline": baseline_detector,
     "spring_after_sc": spring_after_sc_detector,
     "spring_after_ATR_compression_ratio": spring_after_ATR_compression_ratio_detector,
     "incremental_baseline": incremental_baseline_detector,
 }
+
+# Upstream detectors whose events a detector filters instead of recomputing.
+# The harness runs each upstream once per symbol, before its dependents, even
+# when the upstream itself is not in the configured detector list.
+DETECTOR_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+    "spring_after_sc": ("baseline",),
+    "spring_after_ATR_compression_ratio": ("baseline",),
+}
+
+
+def detector_order(names: Iterable[str]) -> List[str]:
+    """`names` plus their upstream detectors, each listed after everything it depends on."""
+    order: List[str] = []
+    visiting: Set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in order:
+            return
+        if name not in DETECTORS:
+            raise ValueError(f"Detector '{name}' not found. Available: {list(DETECTORS)}")
+        if name in visiting:
+            raise ValueError(f"Detector dependency cycle through '{name}'")
+        visiting.add(name)
+        for dependency in DETECTOR_DEPENDENCIES.get(name, ()):
+            visit(dependency)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
@@ -1,13 +1,48 @@
 from __future__ import annotations
 
-from typing import Iterable
+import hashlib
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
+from harness.bars import BarsLike, SymbolBars, to_day_numbers
+from harness.sketch import QuantileSketch
+
+# A result table, or a re-iterable of its chunks (e.g. `io.ResultRowGroups`).
+ForwardSource = Union[pd.DataFrame, Iterable[pd.DataFrame]]
+
+
+# Resample-matrix cells drawn per block (int64 indices plus gathered values).
+BOOTSTRAP_BLOCK_CELLS = 1 << 21
+
+# Largest baseline/incremental date gap (calendar days) still treated as the same event.
+DEFAULT_PATH_TOLERANCE_DAYS = 20
+
+
+def _group_seed(base_seed: int, key: Tuple) -> np.random.SeedSequence:
+    """Seed stream for one summary group, independent of which other groups exist or their order."""
+    spawn_key = tuple(
+        int.from_bytes(hashlib.blake2b(str(part).encode("utf-8"), digest_size=4).digest(), "little")
+        for part in key
+    )
+    return np.random.SeedSequence(int(base_seed), spawn_key=spawn_key)
+
+
+def _partition_medians(samples: np.ndarray, n: int) -> np.ndarray:
+    """Row medians of an `(rows, n)` matrix via `np.partition` (matches `np.median`)."""
+    lo_k, hi_k = (n - 1) // 2, n // 2
+    part = np.partition(samples, sorted({lo_k, hi_k}), axis=1)
+    return (part[:, lo_k] + part[:, hi_k]) / 2.0
+
 
 def _bootstrap_ci(
-    data: np.ndarray, n_bootstrap: int = 1000, ci: float = 0.95
+    data: np.ndarray,
+    n_bootstrap: int = 1000,
+    ci: float = 0.95,
+    seed: Optional[Union[int, np.random.SeedSequence]] = None,
 ) -> tuple[float, float]:
     values = np.asarray(data, dtype=float)
     values = values[~np.isnan(values)]
@@ -15,11 +50,15 @@ def _bootstrap_ci(
         return np.nan, np.nan
 
     n_bootstrap = max(1, int(n_bootstrap))
-    rng = np.random.default_rng()
+    n = values.size
+    rng = np.random.default_rng(seed)
     medians = np.empty(n_bootstrap, dtype=float)
-    for i in range(n_bootstrap):
-        sample = rng.choice(values, size=values.size, replace=True)
-        medians[i] = np.median(sample)
+    # Draw resample index matrices in memory-bounded blocks of rows.
+    rows = max(1, BOOTSTRAP_BLOCK_CELLS // n)
+    for start in range(0, n_bootstrap, rows):
+        stop = min(n_bootstrap, start + rows)
+        samples = values[rng.integers(0, n, size=(stop - start, n))]
+        medians[start:stop] = _partition_medians(samples, n)
 
     alpha = (1.0 - ci) / 2.0
     low = np.quantile(medians, alpha)
@@ -27,14 +66,131 @@ def _bootstrap_ci(
     return float(low), float(high)
 
 
+def _bootstrap_ci_sketch(
+    sketch: QuantileSketch,
+    n_bootstrap: int = 1000,
+    ci: float = 0.95,
+    seed: Optional[Union[int, np.random.SeedSequence]] = None,
+) -> tuple[float, float]:
+    """Bootstrap median CI; approximate sketches resample bucket counts instead of values."""
+    if sketch.exact:
+        return _bootstrap_ci(sketch.values(), n_bootstrap, ci, seed)
+    if sketch.count == 0:
+        return np.nan, np.nan
+
+    values, counts = sketch.buckets()
+    n = int(counts.sum())
+    n_bootstrap = max(1, int(n_bootstrap))
+    rng = np.random.default_rng(seed)
+    medians = np.empty(n_bootstrap, dtype=float)
+    rows = max(1, BOOTSTRAP_BLOCK_CELLS // len(values))
+    for start in range(0, n_bootstrap, rows):
+        stop = min(n_bootstrap, start + rows)
+        draws = np.cumsum(rng.multinomial(n, counts / n, size=stop - start), axis=1)
+        low_mid = values[np.minimum((draws <= (n - 1) // 2).sum(axis=1), len(values) - 1)]
+        high_mid = values[np.minimum((draws <= n // 2).sum(axis=1), len(values) - 1)]
+        medians[start:stop] = (low_mid + high_mid) / 2.0
+
+    alpha = (1.0 - ci) / 2.0
+    return float(np.quantile(medians, alpha)), float(np.quantile(medians, 1.0 - alpha))
+
+
+def _bootstrap_task(task: Tuple[QuantileSketch, int, np.random.SeedSequence]) -> tuple[float, float]:
+    sketch, n_bootstrap, seed = task
+    return _bootstrap_ci_sketch(sketch, n_bootstrap, seed=seed)
+
+
+def _bootstrap_intervals(
+    sketches: Dict[Tuple, QuantileSketch], n_bootstrap: int, base_seed: int, workers: int = 1
+) -> Dict[Tuple, tuple[float, float]]:
+    """
+    Median CIs for every group, fanned out over `workers` processes.
+
+    Each group draws from its own seed stream (`_group_seed`), so results do
+    not depend on the worker count or on which groups are present.
+    """
+    keys = list(sketches)
+    tasks = [(sketches[key], n_bootstrap, _group_seed(base_seed, key)) for key in keys]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            intervals = list(executor.map(_bootstrap_task, tasks))
+    else:
+        intervals = [_bootstrap_task(task) for task in tasks]
+    return dict(zip(keys, intervals))
+
+
+class _ReturnStats:
+    """Mergeable count / win count / quantile sketch over one population of forward returns."""
+
+    __slots__ = ("count", "wins", "sketch")
+
+    def __init__(self, relative_accuracy: float = 0.0) -> None:
+        self.count = 0
+        self.wins = 0
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        self.count += int(values.shape[0])
+        self.wins += int((values > 0).sum())
+        self.sketch.add(values)
+
+    def merge(self, other: "_ReturnStats") -> None:
+        self.count += other.count
+        self.wins += other.wins
+        self.sketch.merge(other.sketch)
+
+    def without(self, part: "_ReturnStats") -> "_ReturnStats":
+        """Stats of this population minus `part`, which must have been merged into it."""
+        remainder = _ReturnStats(self.sketch.relative_accuracy)
+        remainder.count = self.count - part.count
+        remainder.wins = self.wins - part.wins
+        remainder.sketch = self.sketch.without(part.sketch)
+        return remainder
+
+    @property
+    def median(self) -> float:
+        return self.sketch.median() if self.count else np.nan
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.count if self.count else np.nan
+
+    @property
+    def p5(self) -> float:
+        return self.sketch.quantile(0.05) if self.count else np.nan
+
+
+def _frames(source: ForwardSource) -> Iterable[pd.DataFrame]:
+    return [source] if isinstance(source, pd.DataFrame) else source
+
+
 def add_forward_returns(
-    events_df: pd.DataFrame, price_df: pd.DataFrame, forward_windows: Iterable[int]
+    events_df: pd.DataFrame, price_df: BarsLike, forward_windows: Iterable[int]
 ) -> pd.DataFrame:
     forward_windows = sorted(set(int(w) for w in forward_windows))
     base_columns = list(events_df.columns) + [f"fwd_{w}" for w in forward_windows]
     if events_df.empty:
         return pd.DataFrame(columns=base_columns)
 
+    if isinstance(price_df, SymbolBars):
+        events = events_df
+        if "bar_index" not in events.columns:
+            events = events.assign(date=pd.to_datetime(events["date"]))
+        events = events.sort_values("date")
+        if "bar_index" in events.columns:
+            # Detector and stage events carry their bar index: rows of the matrix directly.
+            pos = events["bar_index"].to_numpy(dtype=np.int64)
+        else:
+            pos = price_df.positions(to_day_numbers(events["date"]))
+        hit = pos >= 0
+        values = np.full((len(events), len(forward_windows)), np.nan)
+        values[hit] = price_df.forward_return_matrix(forward_windows)[pos[hit]]
+        events = events[["date", *(c for c in events.columns if c != "date")]].reset_index(drop=True)
+        for column, window in enumerate(forward_windows):
+            events[f"fwd_{window}"] = values[:, column]
+        return events
+
     price = price_df[["date", "close"]].copy()
     price["date"] = pd.to_datetime(price["date"])
     price = price.sort_values("date").reset_index(drop=True)
@@ -54,11 +210,22 @@ def add_forward_returns(
 
 
 def summarize_forward_returns(
-    forward_df: pd.DataFrame,
+    forward_df: ForwardSource,
     coverage_years: float,
     bootstrap_ci_enabled: bool = False,
     bootstrap_resamples: int = 1000,
+    relative_accuracy: float = 0.0,
+    bootstrap_seed: int = 0,
+    bootstrap_workers: int = 1,
 ) -> pd.DataFrame:
+    """
+    Per (detector, event) density, fwd_20 median / win rate / p5, stability and CI.
+
+    `forward_df` may be a frame or a re-iterable of chunks; it is read
+    twice (stability needs each group's date range first). Statistics are
+    folded from per-chunk partials, so with `relative_accuracy > 0` only
+    quantile sketches are held and quantiles carry that relative error.
+    """
     columns = [
         "detector",
         "event",
@@ -71,45 +238,79 @@ def summarize_forward_returns(
     ]
     if bootstrap_ci_enabled:
         columns.extend(["median_ci_low", "median_ci_high"])
-    if forward_df.empty:
+
+    groups: Dict[Tuple, Dict] = {}
+    for frame in _frames(forward_df):
+        if frame.empty:
+            continue
+        dates = pd.to_datetime(frame["date"])
+        fwd20 = frame["fwd_20"].to_numpy(dtype="float64")
+        for key, idx in frame.groupby(["detector", "event"]).indices.items():
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {
+                    "rows": 0,
+                    "t_min": pd.NaT,
+                    "t_max": pd.NaT,
+                    "fwd20": _ReturnStats(relative_accuracy),
+                    "first": _ReturnStats(relative_accuracy),
+                    "second": _ReturnStats(relative_accuracy),
+                }
+            group["rows"] += len(idx)
+            group["fwd20"].add(fwd20[idx])
+            group_dates = dates.iloc[idx]
+            for bound, pick in (("t_min", min), ("t_max", max)):
+                value = getattr(group_dates, bound[2:])()
+                if pd.notna(value):
+                    group[bound] = value if pd.isna(group[bound]) else pick(group[bound], value)
+
+    if not groups:
         return pd.DataFrame(columns=columns)
 
-    fwd = forward_df.copy()
-    fwd["date"] = pd.to_datetime(fwd["date"])
+    for group in groups.values():
+        group["midpoint"] = (
+            group["t_min"] + (group["t_max"] - group["t_min"]) / 2 if pd.notna(group["t_min"]) else pd.NaT
+        )
+    for frame in _frames(forward_df):
+        if frame.empty:
+            continue
+        dates = pd.to_datetime(frame["date"])
+        fwd20 = frame["fwd_20"].to_numpy(dtype="float64")
+        for key, idx in frame.groupby(["detector", "event"]).indices.items():
+            group = groups[key]
+            if pd.isna(group["midpoint"]):
+                continue
+            group_dates = dates.iloc[idx]
+            group["first"].add(fwd20[idx][(group_dates <= group["midpoint"]).to_numpy()])
+            group["second"].add(fwd20[idx][(group_dates > group["midpoint"]).to_numpy()])
 
-    results = []
-    grouped = fwd.groupby(["detector", "event"])
-    for (detector, event), grp in grouped:
-        fwd20 = grp["fwd_20"].dropna()
-        median_20 = fwd20.median() if not fwd20.empty else np.nan
-        win_rate_20 = (fwd20 > 0).mean() if not fwd20.empty else np.nan
-        p5 = fwd20.quantile(0.05) if not fwd20.empty else np.nan
-
-        if grp["date"].empty:
-            stability_delta = np.nan
-        else:
-            t_min, t_max = grp["date"].min(), grp["date"].max()
-            midpoint = t_min + (t_max - t_min) / 2
-            first = grp[grp["date"] <= midpoint]["fwd_20"].dropna()
-            second = grp[grp["date"] > midpoint]["fwd_20"].dropna()
-            stability_delta = (
-                second.median() - first.median() if not first.empty and not second.empty else np.nan
-            )
+    intervals: Dict[Tuple, tuple[float, float]] = {}
+    if bootstrap_ci_enabled:
+        intervals = _bootstrap_intervals(
+            {key: group["fwd20"].sketch for key, group in groups.items()},
+            bootstrap_resamples,
+            bootstrap_seed,
+            bootstrap_workers,
+        )
 
-        density = len(grp) / coverage_years if coverage_years else np.nan
+    results = []
+    for (detector, event), group in sorted(groups.items()):
+        first, second = group["first"], group["second"]
+        stability_delta = second.median - first.median if first.count and second.count else np.nan
+        density = group["rows"] / coverage_years if coverage_years else np.nan
 
         row = {
             "detector": detector,
             "event": event,
             "density": density,
-            "median_fwd_20": median_20,
-            "win_rate_20": win_rate_20,
-            "p5_fwd_20": p5,
+            "median_fwd_20": group["fwd20"].median,
+            "win_rate_20": group["fwd20"].win_rate,
+            "p5_fwd_20": group["fwd20"].p5,
             "stability_delta": stability_delta,
-            "event_count": len(grp),
+            "event_count": group["rows"],
         }
         if bootstrap_ci_enabled:
-            ci_low, ci_high = _bootstrap_ci(fwd20.to_numpy(), bootstrap_resamples)
+            ci_low, ci_high = intervals[(detector, event)]
             row["median_ci_low"] = ci_low
             row["median_ci_high"] = ci_high
         results.append(row)
@@ -124,27 +325,9 @@ def build_comparison_table(summary_df: pd.DataFrame) -> pd.DataFrame:
     return summary_df[columns].copy()
 
 
-def evaluate_bc_effect(forward_df: pd.DataFrame, forward_windows: list[int]) -> pd.DataFrame:
-    rows = []
-    if forward_df.empty:
-        return pd.DataFrame(
-            columns=[
-                "window",
-                "count_bc",
-                "count_baseline",
-                "median_bc",
-                "median_baseline",
-                "median_delta",
-                "win_rate_bc",
-                "win_rate_baseline",
-                "win_rate_delta",
-                "p5_bc",
-                "p5_baseline",
-                "p5_delta",
-            ]
-        )
-
-    bc_df = evaluate_event_effect(forward_df, forward_windows, "BC").rename(
+def bc_effect_table(event_effect_df: pd.DataFrame) -> pd.DataFrame:
+    """Reshape the BC rows of an event-effect table into the `bc_effect_summary` layout."""
+    bc_df = event_effect_df.rename(
         columns={
             "count_event": "count_bc",
             "median_event": "median_bc",
@@ -169,14 +352,59 @@ def evaluate_bc_effect(forward_df: pd.DataFrame, forward_windows: list[int]) ->
             "p5_baseline",
             "p5_delta",
         ]
-    ]
+    ].reset_index(drop=True)
 
 
-def evaluate_event_effect(
-    forward_df: pd.DataFrame, forward_windows: list[int], event_name: str
+def evaluate_bc_effect(
+    forward_df: ForwardSource, forward_windows: list[int], relative_accuracy: float = 0.0
+) -> pd.DataFrame:
+    return bc_effect_table(evaluate_event_effect(forward_df, forward_windows, "BC", relative_accuracy))
+
+
+def _event_window_stats(
+    forward_df: ForwardSource, forward_windows: list[int], relative_accuracy: float
+) -> Tuple[int, Dict[int, Dict[Optional[str], _ReturnStats]]]:
+    """Row count plus `{window: {event label: stats}}`; rows without a label are keyed by None."""
+    rows = 0
+    stats: Dict[int, Dict[Optional[str], _ReturnStats]] = {int(w): {} for w in forward_windows}
+    for frame in _frames(forward_df):
+        if frame.empty:
+            continue
+        rows += len(frame)
+        codes, labels = pd.factorize(frame["event"], sort=False)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        for window in forward_windows:
+            col = f"fwd_{int(window)}"
+            if col not in frame.columns:
+                continue
+            values = frame[col].to_numpy(dtype="float64")[order]
+            for chunk_codes, chunk in zip(np.split(codes[order], bounds), np.split(values, bounds)):
+                label = labels[chunk_codes[0]] if chunk_codes[0] >= 0 else None
+                window_stats = stats[int(window)]
+                if label not in window_stats:
+                    window_stats[label] = _ReturnStats(relative_accuracy)
+                window_stats[label].add(chunk)
+    return rows, stats
+
+
+def evaluate_event_effects(
+    forward_df: ForwardSource,
+    forward_windows: list[int],
+    event_names: Iterable[str],
+    relative_accuracy: float = 0.0,
 ) -> pd.DataFrame:
+    """
+    Forward-return stats of each event in `event_names` against every other event, per window.
+
+    The table is grouped by event label once and the labels' partials are
+    merged into one total per window; an event's "baseline" population is
+    that total minus the event, so each extra event costs no pass over the
+    rest. Rows are ordered by event (as given, repeats dropped), then window.
+    """
     rows = []
-    if forward_df.empty:
+    total_rows, stats = _event_window_stats(forward_df, forward_windows, relative_accuracy)
+    if total_rows == 0:
         return pd.DataFrame(
             columns=[
                 "window",
@@ -195,188 +423,316 @@ def evaluate_event_effect(
             ]
         )
 
-    for window in forward_windows:
-        col = f"fwd_{int(window)}"
-        if col not in forward_df.columns:
-            event_vals = pd.Series(dtype="float64")
-            base_vals = pd.Series(dtype="float64")
-        else:
-            event_vals = forward_df.loc[forward_df["event"] == event_name, col].dropna()
-            base_vals = forward_df.loc[forward_df["event"] != event_name, col].dropna()
+    totals: Dict[int, _ReturnStats] = {}
+    for window, window_stats in stats.items():
+        totals[window] = _ReturnStats(relative_accuracy)
+        for label_stats in window_stats.values():
+            totals[window].merge(label_stats)
+
+    for event_name in dict.fromkeys(event_names):
+        for window in forward_windows:
+            window_stats = stats[int(window)]
+            event_stats = window_stats.get(event_name, _ReturnStats(relative_accuracy))
+            base_stats = totals[int(window)].without(event_stats)
+
+            median_event, median_base = event_stats.median, base_stats.median
+            win_event, win_base = event_stats.win_rate, base_stats.win_rate
+            p5_event, p5_base = event_stats.p5, base_stats.p5
+
+            rows.append(
+                {
+                    "window": int(window),
+                    "event": event_name,
+                    "count_event": event_stats.count,
+                    "count_baseline": base_stats.count,
+                    "median_event": median_event,
+                    "median_baseline": median_base,
+                    "median_delta": median_event - median_base
+                    if pd.notna(median_event) and pd.notna(median_base)
+                    else np.nan,
+                    "win_rate_event": win_event,
+                    "win_rate_baseline": win_base,
+                    "win_rate_delta": win_event - win_base
+                    if pd.notna(win_event) and pd.notna(win_base)
+                    else np.nan,
+                    "p5_event": p5_event,
+                    "p5_baseline": p5_base,
+                    "p5_delta": p5_event - p5_base if pd.notna(p5_event) and pd.notna(p5_base) else np.nan,
+                }
+            )
 
-        median_event = event_vals.median() if not event_vals.empty else np.nan
-        median_base = base_vals.median() if not base_vals.empty else np.nan
-        win_event = (event_vals > 0).mean() if not event_vals.empty else np.nan
-        win_base = (base_vals > 0).mean() if not base_vals.empty else np.nan
-        p5_event = event_vals.quantile(0.05) if not event_vals.empty else np.nan
-        p5_base = base_vals.quantile(0.05) if not base_vals.empty else np.nan
+    return pd.DataFrame(rows)
 
-        rows.append(
-            {
-                "window": int(window),
-                "event": event_name,
-                "count_event": int(event_vals.shape[0]),
-                "count_baseline": int(base_vals.shape[0]),
-                "median_event": median_event,
-                "median_baseline": median_base,
-                "median_delta": median_event - median_base
-                if pd.notna(median_event) and pd.notna(median_base)
-                else np.nan,
-                "win_rate_event": win_event,
-                "win_rate_baseline": win_base,
-                "win_rate_delta": win_event - win_base if pd.notna(win_event) and pd.notna(win_base) else np.nan,
-                "p5_event": p5_event,
-                "p5_baseline": p5_base,
-                "p5_delta": p5_event - p5_base if pd.notna(p5_event) and pd.notna(p5_base) else np.nan,
-            }
-        )
 
-    return pd.DataFrame(rows)
+def evaluate_event_effect(
+    forward_df: ForwardSource,
+    forward_windows: list[int],
+    event_name: str,
+    relative_accuracy: float = 0.0,
+) -> pd.DataFrame:
+    """Forward-return stats of `event_name` against every other event, per window."""
+    return evaluate_event_effects(forward_df, forward_windows, [event_name], relative_accuracy)
 
 
-def evaluate_sos_after_bc_effect(
-    forward_df: pd.DataFrame, forward_windows: list[int], lookback_days: int
+def evaluate_conditional_effects(
+    forward_df: pd.DataFrame,
+    forward_windows: list[int],
+    rules: Iterable[Tuple[str, str, int]],
+    relative_accuracy: float = 0.0,
 ) -> pd.DataFrame:
+    """
+    Effects of "event A within N days after event B" for each `(A, B, N)` rule.
+
+    An A event counts when the latest B of the same symbol strictly before
+    its date is at most N days earlier; it is compared against all B events (or every
+    non-A event when there are none). Rows are keyed once by (symbol, day),
+    and each rule is matched with one `searchsorted` of its A keys into its
+    sorted B keys. Output rows are ordered by rule, then window.
+    """
     rows = []
+    columns = [
+        "window",
+        "event",
+        "lookback_days",
+        "count_event",
+        "count_baseline",
+        "median_event",
+        "median_baseline",
+        "median_delta",
+        "win_rate_event",
+        "win_rate_baseline",
+        "win_rate_delta",
+        "p5_event",
+        "p5_baseline",
+        "p5_delta",
+    ]
     if forward_df.empty:
-        return pd.DataFrame(
-            columns=[
-                "window",
-                "event",
-                "lookback_days",
-                "count_event",
-                "count_baseline",
-                "median_event",
-                "median_baseline",
-                "median_delta",
-                "win_rate_event",
-                "win_rate_baseline",
-                "win_rate_delta",
-                "p5_event",
-                "p5_baseline",
-                "p5_delta",
-            ]
-        )
-
-    df = forward_df.copy()
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.dropna(subset=["date"])
-
-    sos_after_bc_mask = pd.Series(False, index=df.index)
-    for _, group in df.groupby("symbol", sort=False):
-        group = group.sort_values("date")
-        last_bc_date = None
-        for idx, row in group.iterrows():
-            if row["event"] == "BC":
-                last_bc_date = row["date"]
-                continue
-            if row["event"] == "SOS" and last_bc_date is not None:
-                delta_days = (row["date"] - last_bc_date).days
-                if 0 < delta_days <= lookback_days:
-                    sos_after_bc_mask.at[idx] = True
-
-    sos_after_bc_df = df.loc[sos_after_bc_mask]
-    base_df = df.loc[df["event"] == "BC"]
-    if base_df.empty:
-        base_df = df.loc[df["event"] != "SOS"]
+        return pd.DataFrame(columns=columns)
 
-    for window in forward_windows:
-        col = f"fwd_{int(window)}"
-        if col not in df.columns:
-            event_vals = pd.Series(dtype="float64")
-            base_vals = pd.Series(dtype="float64")
-        else:
-            event_vals = sos_after_bc_df[col].dropna()
-            base_vals = base_df[col].dropna()
+    dates = pd.to_datetime(forward_df["date"], errors="coerce")
+    df = forward_df.loc[dates.notna().to_numpy()]
+    days = to_day_numbers(dates[dates.notna()])
+    codes, _ = pd.factorize(df["symbol"], sort=False)
+    span = int(days.max() - days.min()) + 1 if days.size else 1
+    keys = codes.astype(np.int64) * span + (days - (days.min() if days.size else 0))
+    labels = np.asarray(df["event"].astype(object))
+
+    label_rows: Dict[str, np.ndarray] = {}
+
+    def rows_of(label: str) -> np.ndarray:
+        if label not in label_rows:
+            label_rows[label] = np.flatnonzero(labels == label)
+        return label_rows[label]
+
+    for event_name, after_name, lookback_days in rules:
+        a_rows, b_rows = rows_of(event_name), rows_of(after_name)
+        b_rows = b_rows[np.argsort(keys[b_rows], kind="stable")]
+        matched = np.zeros(0, dtype=np.int64)
+        if a_rows.size and b_rows.size:
+            # Latest B strictly before each A; a B on the A's own day never counts.
+            pos = np.searchsorted(keys[b_rows], keys[a_rows], side="left") - 1
+            prev = b_rows[np.maximum(pos, 0)]
+            delta = days[a_rows] - days[prev]
+            hit = (pos >= 0) & (codes[prev] == codes[a_rows]) & (delta <= int(lookback_days))
+            matched = a_rows[hit]
+        base_rows = b_rows if b_rows.size else np.flatnonzero(labels != event_name)
+
+        for window in forward_windows:
+            col = f"fwd_{int(window)}"
+            event_stats = _ReturnStats(relative_accuracy)
+            base_stats = _ReturnStats(relative_accuracy)
+            if col in df.columns:
+                values = df[col].to_numpy(dtype="float64")
+                event_stats.add(values[matched])
+                base_stats.add(values[base_rows])
+
+            median_event, median_base = event_stats.median, base_stats.median
+            win_event, win_base = event_stats.win_rate, base_stats.win_rate
+            p5_event, p5_base = event_stats.p5, base_stats.p5
+
+            rows.append(
+                {
+                    "window": int(window),
+                    "event": f"{event_name}_AFTER_{after_name}",
+                    "lookback_days": int(lookback_days),
+                    "count_event": event_stats.count,
+                    "count_baseline": base_stats.count,
+                    "median_event": median_event,
+                    "median_baseline": median_base,
+                    "median_delta": median_event - median_base
+                    if pd.notna(median_event) and pd.notna(median_base)
+                    else np.nan,
+                    "win_rate_event": win_event,
+                    "win_rate_baseline": win_base,
+                    "win_rate_delta": win_event - win_base
+                    if pd.notna(win_event) and pd.notna(win_base)
+                    else np.nan,
+                    "p5_event": p5_event,
+                    "p5_baseline": p5_base,
+                    "p5_delta": p5_event - p5_base if pd.notna(p5_event) and pd.notna(p5_base) else np.nan,
+                }
+            )
 
-        median_event = event_vals.median() if not event_vals.empty else np.nan
-        median_base = base_vals.median() if not base_vals.empty else np.nan
-        win_event = (event_vals > 0).mean() if not event_vals.empty else np.nan
-        win_base = (base_vals > 0).mean() if not base_vals.empty else np.nan
-        p5_event = event_vals.quantile(0.05) if not event_vals.empty else np.nan
-        p5_base = base_vals.quantile(0.05) if not base_vals.empty else np.nan
+    return pd.DataFrame(rows, columns=columns)
 
-        rows.append(
-            {
-                "window": int(window),
-                "event": "SOS_AFTER_BC",
-                "lookback_days": int(lookback_days),
-                "count_event": int(event_vals.shape[0]),
-                "count_baseline": int(base_vals.shape[0]),
-                "median_event": median_event,
-                "median_baseline": median_base,
-                "median_delta": median_event - median_base
-                if pd.notna(median_event) and pd.notna(median_base)
-                else np.nan,
-                "win_rate_event": win_event,
-                "win_rate_baseline": win_base,
-                "win_rate_delta": win_event - win_base if pd.notna(win_event) and pd.notna(win_base) else np.nan,
-                "p5_event": p5_event,
-                "p5_baseline": p5_base,
-                "p5_delta": p5_event - p5_base if pd.notna(p5_event) and pd.notna(p5_base) else np.nan,
-            }
-        )
 
-    return pd.DataFrame(rows)
+def evaluate_sos_after_bc_effect(
+    forward_df: pd.DataFrame, forward_windows: list[int], lookback_days: int
+) -> pd.DataFrame:
+    return evaluate_conditional_effects(forward_df, forward_windows, [("SOS", "BC", lookback_days)])
+
+
+def _match_nearest(
+    base_keys: np.ndarray, inc_keys: np.ndarray, tolerance: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    One-to-one nearest matching of two int64 key arrays within `tolerance`.
+
+    Pairs are accepted closest first (ties go to the lower key), as a greedy
+    match over all candidate pairs would. The closest unmatched cross pair
+    is always adjacent in the merged key order, so only adjacent
+    (base, incremental) pairs are heaped; accepting one unlinks both keys
+    and heaps the pair of keys that become adjacent. One sort plus one heap
+    pass: O(n log n). Returns the matched positions into `base_keys` and
+    `inc_keys`, ordered by base position.
+    """
+    n_base = base_keys.size
+    keys = np.concatenate([base_keys, inc_keys]).astype(np.int64, copy=False)
+    side = np.concatenate([np.zeros(n_base, dtype=np.int8), np.ones(inc_keys.size, dtype=np.int8)])
+    order = np.lexsort((side, keys))
+    keys, side = keys[order], side[order]
+
+    gaps = np.diff(keys)
+    left = np.flatnonzero((side[1:] != side[:-1]) & (gaps <= tolerance))
+    heap = list(zip(gaps[left].tolist(), left.tolist(), (left + 1).tolist()))
+    heapq.heapify(heap)
+
+    n = keys.size
+    key_list, side_list = keys.tolist(), side.tolist()
+    prev, nxt = list(range(-1, n - 1)), list(range(1, n + 1))
+    alive = [True] * n
+    pairs: List[Tuple[int, int]] = []
+    while heap:
+        _, lo, hi = heapq.heappop(heap)
+        # Keys are only ever unlinked, so a heaped pair is adjacent while both are alive.
+        if not (alive[lo] and alive[hi]):
+            continue
+        alive[lo] = alive[hi] = False
+        pairs.append((lo, hi))
+        p, q = prev[lo], nxt[hi]
+        if p >= 0:
+            nxt[p] = q
+        if q < n:
+            prev[q] = p
+        if p >= 0 and q < n and side_list[p] != side_list[q] and key_list[q] - key_list[p] <= tolerance:
+            heapq.heappush(heap, (key_list[q] - key_list[p], p, q))
+
+    if not pairs:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    lo, hi = np.asarray(pairs, dtype=np.int64).T
+    base_merged = np.where(side[lo] == 0, lo, hi)
+    inc_merged = np.where(side[lo] == 0, hi, lo)
+    base_pos, inc_pos = order[base_merged], order[inc_merged] - n_base
+    by_base = np.argsort(base_pos, kind="stable")
+    return base_pos[by_base], inc_pos[by_base]
 
 
 def evaluate_path_dependency(
-    baseline_df: pd.DataFrame, incremental_df: pd.DataFrame
+    baseline_df: pd.DataFrame,
+    incremental_df: pd.DataFrame,
+    tolerance_days: int = DEFAULT_PATH_TOLERANCE_DAYS,
 ) -> pd.DataFrame:
+    """
+    Per-event-type agreement between baseline and incremental events.
+
+    Events of each (symbol, event) are matched one-to-one to the nearest
+    event of the other side at most `tolerance_days` calendar days away
+    (see `_match_nearest`); all groups are matched together on
+    composite (group, day) keys. One row per event type plus an `ALL` row
+    reports match rate (matched / baseline events), moved events (matched
+    at a different date) and the absolute date-delta distribution; signed
+    deltas are incremental minus baseline.
+    """
     columns = [
+        "event",
         "total_events",
+        "incremental_events",
         "matched_events",
+        "match_rate",
         "moved_events",
         "mean_date_delta",
         "median_date_delta",
+        "p90_date_delta",
+        "max_date_delta",
+        "mean_signed_delta",
         "unmatched_baseline",
         "unmatched_incremental",
     ]
 
-    if baseline_df is None:
-        baseline_df = pd.DataFrame(columns=["symbol", "event", "date"])
-    if incremental_df is None:
-        incremental_df = pd.DataFrame(columns=["symbol", "event", "date"])
-
-    base = baseline_df.copy()
-    inc = incremental_df.copy()
-
-    if "date" in base.columns:
-        base["date"] = pd.to_datetime(base["date"], errors="coerce")
-    if "date" in inc.columns:
-        inc["date"] = pd.to_datetime(inc["date"], errors="coerce")
-
-    base = base[["symbol", "event", "date"]] if not base.empty else base
-    inc = inc[["symbol", "event", "date"]] if not inc.empty else inc
+    frames = []
+    for side, df in enumerate((baseline_df, incremental_df)):
+        if df is None or df.empty:
+            continue
+        days = to_day_numbers(df["date"])
+        valid = days != np.iinfo(np.int64).min
+        frames.append(
+            pd.DataFrame(
+                {
+                    "side": side,
+                    "symbol": df["symbol"].astype(str).to_numpy()[valid],
+                    "event": df["event"].astype(str).to_numpy()[valid],
+                    "day": days[valid],
+                }
+            )
+        )
+    if not frames:
+        return pd.DataFrame(columns=columns)
 
-    merged = base.merge(
-        inc, on=["symbol", "event"], how="outer", suffixes=("_baseline", "_incremental")
+    events = pd.concat(frames, ignore_index=True)
+    tolerance = max(0, int(tolerance_days))
+    group = events.groupby(["symbol", "event"], sort=True).ngroup().to_numpy(dtype=np.int64)
+    day = events["day"].to_numpy(dtype=np.int64)
+    # Groups sit further apart than the tolerance, so keys never match across groups.
+    span = int(day.max() - day.min()) + 2 * tolerance + 2
+    keys = group * span + (day - day.min())
+    side = events["side"].to_numpy()
+
+    base_rows, inc_rows = np.flatnonzero(side == 0), np.flatnonzero(side == 1)
+    base_rows = base_rows[np.argsort(keys[base_rows], kind="stable")]
+    inc_rows = inc_rows[np.argsort(keys[inc_rows], kind="stable")]
+    base_pos, inc_pos = _match_nearest(keys[base_rows], keys[inc_rows], tolerance)
+    base_matched, inc_matched = base_rows[base_pos], inc_rows[inc_pos]
+
+    labels = events["event"].to_numpy()
+    matched = pd.DataFrame(
+        {"event": labels[base_matched], "signed": day[inc_matched] - day[base_matched]}
     )
+    matched["delta"] = matched["signed"].abs()
 
-    date_delta = (
-        merged["date_baseline"] - merged["date_incremental"]
-        if "date_baseline" in merged.columns and "date_incremental" in merged.columns
-        else pd.Series(dtype="float64")
-    )
-    date_delta = date_delta.abs().dt.days if not date_delta.empty else pd.Series(dtype="float64")
-
-    matched_mask = merged["date_baseline"].notna() & merged["date_incremental"].notna()
-    moved_mask = matched_mask & (date_delta > 0)
-    unmatched_baseline = merged["date_baseline"].notna() & merged["date_incremental"].isna()
-    unmatched_incremental = merged["date_baseline"].isna() & merged["date_incremental"].notna()
-
-    metrics = {
-        "total_events": int(base.shape[0]),
-        "matched_events": int(matched_mask.sum()),
-        "moved_events": int(moved_mask.sum()),
-        "mean_date_delta": float(date_delta[matched_mask].mean())
-        if matched_mask.any()
-        else np.nan,
-        "median_date_delta": float(date_delta[matched_mask].median())
-        if matched_mask.any()
-        else np.nan,
-        "unmatched_baseline": int(unmatched_baseline.sum()),
-        "unmatched_incremental": int(unmatched_incremental.sum()),
-    }
-
-    return pd.DataFrame([metrics], columns=columns)
+    def summarize(event: str, n_base: int, n_inc: int, pairs: pd.DataFrame) -> dict:
+        n_matched = int(pairs.shape[0])
+        delta = pairs["delta"].to_numpy(dtype="float64")
+        return {
+            "event": event,
+            "total_events": n_base,
+            "incremental_events": n_inc,
+            "matched_events": n_matched,
+            "match_rate": n_matched / n_base if n_base else np.nan,
+            "moved_events": int((delta > 0).sum()),
+            "mean_date_delta": float(delta.mean()) if n_matched else np.nan,
+            "median_date_delta": float(np.median(delta)) if n_matched else np.nan,
+            "p90_date_delta": float(np.quantile(delta, 0.9)) if n_matched else np.nan,
+            "max_date_delta": float(delta.max()) if n_matched else np.nan,
+            "mean_signed_delta": float(pairs["signed"].mean()) if n_matched else np.nan,
+            "unmatched_baseline": n_base - n_matched,
+            "unmatched_incremental": n_inc - n_matched,
+        }
+
+    counts = pd.crosstab(events["event"], events["side"]).reindex(columns=[0, 1], fill_value=0)
+    pairs_by_event = dict(tuple(matched.groupby("event", sort=False)))
+    rows = [summarize("ALL", int(counts[0].sum()), int(counts[1].sum()), matched)]
+    for event, (n_base, n_inc) in zip(counts.index, counts.to_numpy()):
+        rows.append(
+            summarize(event, int(n_base), int(n_inc), pairs_by_event.get(event, matched.iloc[:0]))
+        )
+    return pd.DataFrame(rows, columns=columns)
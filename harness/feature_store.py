@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from harness.bars import PRICE_FIELDS, SymbolBars
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+# Code that decides feature values; editing it invalidates stored features.
+_FEATURE_SOURCES = (_REPO_ROOT / "baseline" / "features.py",)
+
+
+def _code_version() -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for path in _FEATURE_SOURCES:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def bars_fingerprint(bars: SymbolBars) -> str:
+    """Content hash of the bars' dates and prices (memoized on the bars)."""
+
+    def compute() -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for name in ("date",) + PRICE_FIELDS:
+            digest.update(name.encode("utf-8"))
+            digest.update(getattr(bars, name).tobytes())
+        return digest.hexdigest()
+
+    return bars.derived("fingerprint", compute)
+
+
+class FeatureStore:
+    """
+    Persistent on-disk store of per-symbol rolling features.
+
+    Each entry is one Parquet file holding a feature set's columns for every
+    bar of one symbol, keyed by the bars' content hash, the feature set name,
+    its parameters and the feature code version, so runs that only change
+    detector thresholds read features back instead of recomputing them.
+    Reads can select a subset of columns. Hits refresh the entry's mtime;
+    `evict` trims least recently used entries down to `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max(0, int(max_bytes))
+        self._code_version = _code_version()
+
+    def key(self, bars: SymbolBars, feature_set: str, params: Sequence) -> str:
+        parts = [bars_fingerprint(bars), feature_set, json.dumps(list(params)), self._code_version]
+        return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=20).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.parquet"
+
+    def get(self, key: str, columns: Optional[Iterable[str]] = None) -> Optional[Dict[str, np.ndarray]]:
+        """Stored feature columns (all, or just `columns`) as read-only arrays; None on a miss."""
+        path = self._path(key)
+        try:
+            table = pq.read_table(path, columns=list(columns) if columns is not None else None)
+        except (FileNotFoundError, OSError, pa.ArrowInvalid, KeyError):
+            return None
+        os.utime(path)
+        features: Dict[str, np.ndarray] = {}
+        for name in table.column_names:
+            values = table.column(name).to_numpy()
+            values.flags.writeable = False
+            features[name] = values
+        return features
+
+    def put(self, key: str, features: Dict[str, np.ndarray]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        table = pa.table({name: np.asarray(values, dtype="float64") for name, values in features.items()})
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the store fits; returns entries removed."""
+        entries = []
+        for path in self.cache_dir.glob("*/*.parquet"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from baseline import features as _features
+from baseline.structural import WyckoffStructuralConfig
+from harness.bars import BarsLike, SymbolBars
+from harness.feature_store import FeatureStore
+
+BatchFn = Callable[[List[SymbolBars], np.ndarray], Dict[str, np.ndarray]]
+
+
+def _concat(bars_list: List[SymbolBars], name: str) -> np.ndarray:
+    return np.concatenate([getattr(bars, name) for bars in bars_list])
+
+
+def _memo_key(feature_set: str, params: Sequence, column: str) -> Tuple:
+    return (feature_set, tuple(params), column)
+
+
+def _memoized(bars: SymbolBars, feature_set: str, params: Sequence, columns: Sequence[str]) -> Dict[str, np.ndarray]:
+    return {column: bars.derived(_memo_key(feature_set, params, column)) for column in columns}
+
+
+def _prime(
+    bars_list: Iterable[Optional[SymbolBars]],
+    feature_set: str,
+    params: Sequence,
+    columns: Sequence[str],
+    compute: BatchFn,
+    store: Optional[FeatureStore] = None,
+    eligible: Callable[[SymbolBars], bool] = lambda bars: True,
+) -> None:
+    """
+    Memoize `columns` of one feature set on every `SymbolBars` that lacks them.
+
+    Symbols are served from `store` when it holds their features (reading
+    only `columns`); the rest are concatenated and computed in one batched
+    pass (windows reset at symbol boundaries), then written back to `store`
+    with every column of the set.
+    """
+    pending: List[SymbolBars] = []
+    for bars in bars_list:
+        if not isinstance(bars, SymbolBars) or bars.empty or not eligible(bars):
+            continue
+        if all(value is not None for value in _memoized(bars, feature_set, params, columns).values()):
+            continue
+        stored = store.get(store.key(bars, feature_set, params), columns) if store is not None else None
+        if stored is None:
+            pending.append(bars)
+            continue
+        for column, values in stored.items():
+            bars.derived(_memo_key(feature_set, params, column), lambda values=values: values)
+    if not pending:
+        return
+
+    offsets = _features.segment_offsets([len(bars) for bars in pending])
+    batched = compute(pending, offsets)
+    for values in batched.values():
+        values.flags.writeable = False
+    for bars, part in zip(pending, _features.split_features(batched, offsets)):
+        for column, values in part.items():
+            bars.derived(_memo_key(feature_set, params, column), lambda values=values: values)
+        if store is not None:
+            store.put(store.key(bars, feature_set, params), part)
+
+
+def _structural_params(cfg: WyckoffStructuralConfig) -> Tuple:
+    return _features.feature_key(cfg)
+
+
+def prime_structural_features(
+    bars_list: Iterable[Optional[SymbolBars]],
+    cfg: Optional[WyckoffStructuralConfig] = None,
+    store: Optional[FeatureStore] = None,
+    columns: Sequence[str] = _features.KERNEL_FEATURE_NAMES,
+) -> None:
+    """Compute (or load `columns` from `store`) the structural detector's features for several symbols at once."""
+    cfg = cfg or WyckoffStructuralConfig()
+
+    def compute(pending: List[SymbolBars], offsets: np.ndarray) -> Dict[str, np.ndarray]:
+        prices = (_concat(pending, name) for name in ("high", "low", "close", "volume"))
+        return _features.structural_features(*prices, offsets, cfg)
+
+    _prime(bars_list, "structural", _structural_params(cfg), columns, compute, store)
+
+
+def structural_features(
+    bars: BarsLike,
+    cfg: Optional[WyckoffStructuralConfig] = None,
+    columns: Sequence[str] = _features.KERNEL_FEATURE_NAMES,
+) -> Optional[Dict[str, np.ndarray]]:
+    """Memoized features for `SymbolBars` (None for DataFrames, which the detector prepares itself)."""
+    if not isinstance(bars, SymbolBars) or bars.empty:
+        return None
+    cfg = cfg or WyckoffStructuralConfig()
+    prime_structural_features([bars], cfg, columns=columns)
+    return _memoized(bars, "structural", _structural_params(cfg), columns)
+
+
+def _computes_atr(bars: SymbolBars) -> bool:
+    # Source data that ships its own ATR columns is used as-is by the detector.
+    return not any(name.startswith("atr.") for name in bars.extra)
+
+
+def prime_atr_features(
+    bars_list: Iterable[Optional[SymbolBars]],
+    store: Optional[FeatureStore] = None,
+    columns: Sequence[str] = _features.ATR_FEATURE_NAMES,
+) -> None:
+    """Compute (or load `columns` from `store`) ATR14, ATR60 and their ratio for several symbols at once."""
+
+    def compute(pending: List[SymbolBars], offsets: np.ndarray) -> Dict[str, np.ndarray]:
+        prices = (_concat(pending, name) for name in ("high", "low", "close"))
+        return _features.atr_features(*prices, offsets)
+
+    _prime(bars_list, "atr", _features.ATR_WINDOWS, columns, compute, store, eligible=_computes_atr)
+
+
+def atr_features(
+    bars: BarsLike, columns: Sequence[str] = _features.ATR_FEATURE_NAMES
+) -> Optional[Dict[str, np.ndarray]]:
+    """Memoized ATR features for `SymbolBars`; None for DataFrames or bars with their own ATR columns."""
+    if not isinstance(bars, SymbolBars) or bars.empty or not _computes_atr(bars):
+        return None
+    prime_atr_features([bars], columns=columns)
+    return _memoized(bars, "atr", _features.ATR_WINDOWS, columns)
+
+
+# Feature sets the harness can prime for a batch, by name; each takes the
+# bars, the feature store and the columns its consumers read.
+FEATURE_SETS: Dict[str, Callable[..., None]] = {
+    "structural": lambda bars_list, store=None, columns=_features.KERNEL_FEATURE_NAMES: (
+        prime_structural_features(bars_list, store=store, columns=columns)
+    ),
+    "atr": prime_atr_features,
+}
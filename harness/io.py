@@ -1,11 +1,59 @@
 from __future__ import annotations
 
+import argparse
+import datetime as _dt
+import hashlib
+import heapq
+import json
+import os
+import struct
+import tempfile
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import yaml
 
+from harness.bars import PRICE_FIELDS, SymbolBars
+
+
+# Data contract columns, plus optional precomputed indicator prefixes that
+# detectors consume when present (e.g. `atr.average_true_range_14`).
+OHLCV_COLUMNS: List[str] = ["symbol", "date", "open", "high", "low", "close", "volume"]
+OPTIONAL_COLUMN_PREFIXES = ("atr.",)
+
+# Low-cardinality label columns stored with Parquet dictionary encoding.
+RESULT_DICTIONARY_COLUMNS = (
+    "symbol",
+    "event",
+    "detector",
+    "regime",
+    "transition",
+    "prior_regime",
+    "new_regime",
+    "sequence_id",
+)
+# Row group size for merged result files; fixed so output bytes do not
+# depend on how rows were batched or sharded upstream.
+RESULT_ROW_GROUP_ROWS = 64 * 1024
+
+PACK_MAGIC = b"WFBPACK1"
+PACK_ALIGN = 64
+PACK_COLUMNS: Dict[str, str] = {
+    "day": "<i4",
+    "open": "<f8",
+    "high": "<f8",
+    "low": "<f8",
+    "close": "<f8",
+    "volume": "<f8",
+}
+
 
 def load_config(path: Union[str, Path] = "config.yaml") -> Dict:
     with open(path, "r") as f:
@@ -19,6 +67,8 @@ def ensure_output_path(path: str) -> Path:
 
 
 def list_symbols(ohlcv_path: str) -> List[str]:
+    if is_pack_path(ohlcv_path):
+        return list(open_pack(ohlcv_path).symbols)
     base = Path(ohlcv_path)
     symbols: List[str] = []
     if not base.exists():
@@ -29,16 +79,112 @@ def list_symbols(ohlcv_path: str) -> List[str]:
     return sorted(symbols)
 
 
-def read_symbol_data(symbol: str, ohlcv_path: str, lookback_days: int) -> Optional[pd.DataFrame]:
+def _symbol_dataset(symbol: str, ohlcv_path: str) -> Optional[ds.Dataset]:
     path = Path(ohlcv_path) / f"symbol={symbol}"
     if not path.exists():
         return None
+    return ds.dataset(path, format="parquet", partitioning="hive")
 
-    df = pd.read_parquet(path)
-    if df.empty:
+
+def _is_temporal(data_type: pa.DataType) -> bool:
+    return pa.types.is_timestamp(data_type) or pa.types.is_date(data_type)
+
+
+def _stats_max_date(dataset: ds.Dataset) -> Optional[pd.Timestamp]:
+    """Max `date` from Parquet row-group statistics; None if any row group lacks them."""
+    max_value: Optional[pd.Timestamp] = None
+    for fragment in dataset.get_fragments():
+        metadata = fragment.metadata
+        for rg in range(metadata.num_row_groups):
+            row_group = metadata.row_group(rg)
+            if row_group.num_rows == 0:
+                continue
+            stats = None
+            for col in range(row_group.num_columns):
+                column = row_group.column(col)
+                if column.path_in_schema == "date":
+                    stats = column.statistics
+                    break
+            if stats is None or not stats.has_min_max:
+                return None
+            if not isinstance(stats.max, (_dt.date, _dt.datetime)):
+                return None
+            value = pd.Timestamp(stats.max)
+            if max_value is None or value > max_value:
+                max_value = value
+    return max_value
+
+
+def _dataset_max_date(dataset: ds.Dataset) -> Optional[pd.Timestamp]:
+    if "date" not in dataset.schema.names:
+        return None
+    if _is_temporal(dataset.schema.field("date").type):
+        max_value = _stats_max_date(dataset)
+        if max_value is not None:
+            return max_value
+
+    dates = pd.to_datetime(dataset.to_table(columns=["date"]).column("date").to_pandas())
+    if dates.empty or dates.isna().all():
+        return None
+    return dates.max()
+
+
+def read_symbol_max_date(symbol: str, ohlcv_path: str) -> Optional[pd.Timestamp]:
+    if is_pack_path(ohlcv_path):
+        return open_pack(ohlcv_path).max_date(symbol)
+    dataset = _symbol_dataset(symbol, ohlcv_path)
+    if dataset is None:
         return None
+    return _dataset_max_date(dataset)
 
-    df = df.copy()
+
+def _date_cutoff_filter(
+    dataset: ds.Dataset, lookback_days: int
+) -> Optional[ds.Expression]:
+    date_type = dataset.schema.field("date").type
+    if not _is_temporal(date_type):
+        return None
+    max_date = _dataset_max_date(dataset)
+    if max_date is None:
+        return None
+    cutoff = max_date - pd.Timedelta(days=int(lookback_days))
+    if pa.types.is_date(date_type):
+        # Round down so the in-memory cutoff below still sees every candidate bar.
+        return ds.field("date") >= pa.scalar(cutoff.date(), type=date_type)
+    return ds.field("date") >= pa.scalar(cutoff, type=date_type)
+
+
+def read_symbol_data(
+    symbol: str,
+    ohlcv_path: str,
+    lookback_days: int,
+    columns: Optional[List[str]] = None,
+) -> Optional[pd.DataFrame]:
+    if is_pack_path(ohlcv_path):
+        return open_pack(ohlcv_path).read_symbol_data(symbol, lookback_days)
+    dataset = _symbol_dataset(symbol, ohlcv_path)
+    if dataset is None:
+        return None
+
+    names = dataset.schema.names
+    if columns is None:
+        wanted = set(OHLCV_COLUMNS)
+        projection = [
+            name for name in names if name in wanted or name.startswith(OPTIONAL_COLUMN_PREFIXES)
+        ]
+    else:
+        wanted = set(columns) | {"date"}
+        projection = [name for name in names if name in wanted]
+
+    row_filter = None
+    if lookback_days and lookback_days > 0 and "date" in names:
+        row_filter = _date_cutoff_filter(dataset, lookback_days)
+
+    table = dataset.to_table(columns=projection, filter=row_filter)
+    if table.num_rows == 0:
+        return None
+
+    df = table.to_pandas()
     df["date"] = pd.to_datetime(df["date"])
     if "symbol" not in df.columns:
         df["symbol"] = symbol
@@ -49,9 +195,278 @@ def read_symbol_data(symbol: str, ohlcv_path: str, lookback_days: int) -> Option
 
     return df.reset_index(drop=True)
 
-def compute_years_covered(df: pd.DataFrame) -> float:
+
+def symbol_data_fingerprint(symbol: str, ohlcv_path: str) -> Optional[str]:
+    """Content hash of a symbol's source data (Parquet file bytes or packed slice)."""
+    digest = hashlib.blake2b(digest_size=16)
+    # Results carry the symbol, so identical bytes under two symbols must not collide.
+    digest.update(symbol.encode("utf-8"))
+    if is_pack_path(ohlcv_path):
+        arrays = open_pack(ohlcv_path).get_arrays(symbol)
+        if arrays is None:
+            return None
+        for name, values in arrays.items():
+            digest.update(name.encode("utf-8"))
+            digest.update(values.tobytes())
+        return digest.hexdigest()
+
+    path = Path(ohlcv_path) / f"symbol={symbol}"
+    if not path.exists():
+        return None
+    for file in sorted(p for p in path.rglob("*") if p.is_file() and not p.name.startswith((".", "_"))):
+        digest.update(str(file.relative_to(path)).encode("utf-8"))
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def symbol_source_signature(symbol: str, ohlcv_path: str) -> Optional[List]:
+    """Cheap change detector: `[relative path, size, mtime_ns]` per source file, or None if absent."""
+    if is_pack_path(ohlcv_path):
+        if symbol not in open_pack(ohlcv_path):
+            return None
+        stat = Path(ohlcv_path).stat()
+        return [[Path(ohlcv_path).name, stat.st_size, stat.st_mtime_ns]]
+
+    path = Path(ohlcv_path) / f"symbol={symbol}"
+    if not path.exists():
+        return None
+    signature = []
+    for file in sorted(p for p in path.rglob("*") if p.is_file() and not p.name.startswith((".", "_"))):
+        stat = file.stat()
+        signature.append([str(file.relative_to(path)), stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+def count_symbol_rows(symbol: str, ohlcv_path: str) -> int:
+    """Row count from Parquet footers (or the pack index); no data pages are read."""
+    if is_pack_path(ohlcv_path):
+        arrays = open_pack(ohlcv_path).get_arrays(symbol)
+        return 0 if arrays is None else int(len(arrays["day"]))
+    dataset = _symbol_dataset(symbol, ohlcv_path)
+    return 0 if dataset is None else int(dataset.count_rows())
+
+
+def read_symbol_bars(symbol: str, ohlcv_path: str, lookback_days: int) -> Optional[SymbolBars]:
+    if is_pack_path(ohlcv_path):
+        return open_pack(ohlcv_path).read_symbol_bars(symbol, lookback_days)
+    df = read_symbol_data(symbol, ohlcv_path, lookback_days)
+    if df is None:
+        return None
+    bars = SymbolBars.from_frame(df, symbol)
+    return bars if len(bars) else None
+
+
+# ----------------------------------------------------------------------
+# Packed universe archive
+#
+# Layout: PACK_MAGIC, little-endian uint64 header length, JSON header, then
+# 64-byte aligned blocks for the per-symbol row offsets (int64, n_symbols + 1)
+# and one contiguous block per PACK_COLUMNS entry, plus one float64 block per
+# optional numeric column (`OPTIONAL_COLUMN_PREFIXES`) any symbol carries;
+# `symbol_extras` in the header lists which of those each symbol has (rows
+# of symbols without the column are NaN). Rows are grouped by symbol
+# (sorted) and by day within a symbol; `day` counts days since epoch.
+# ----------------------------------------------------------------------
+
+
+def is_pack_path(ohlcv_path: Union[str, Path]) -> bool:
+    return Path(ohlcv_path).is_file()
+
+
+class PackedUniverse:
+    """Memory-mapped reader over a packed universe; symbol slices are zero-copy views."""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = str(path)
+        self._buffer = np.memmap(self.path, dtype=np.uint8, mode="r")
+        magic = bytes(self._buffer[: len(PACK_MAGIC)])
+        if magic != PACK_MAGIC:
+            raise ValueError(f"Not a packed universe file: {self.path}")
+        start = len(PACK_MAGIC) + 8
+        (header_len,) = struct.unpack("<Q", bytes(self._buffer[len(PACK_MAGIC) : start]))
+        header = json.loads(bytes(self._buffer[start : start + header_len]).decode("utf-8"))
+
+        self.symbols: List[str] = header["symbols"]
+        self._positions: Dict[str, int] = {sym: i for i, sym in enumerate(self.symbols)}
+        self._offsets = self._block(header["offsets"])
+        self._columns: Dict[str, np.ndarray] = {
+            name: self._block(block) for name, block in header["columns"].items()
+        }
+        self._extra_columns: Dict[str, np.ndarray] = {
+            name: self._block(block) for name, block in header.get("extra_columns", {}).items()
+        }
+        self._symbol_extras: List[List[str]] = header.get("symbol_extras") or [[] for _ in self.symbols]
+
+    def _block(self, block: Dict) -> np.ndarray:
+        return np.frombuffer(
+            self._buffer, dtype=np.dtype(block["dtype"]), count=int(block["count"]), offset=int(block["offset"])
+        )
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._positions
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def get_arrays(self, symbol: str) -> Optional[Dict[str, np.ndarray]]:
+        pos = self._positions.get(symbol)
+        if pos is None:
+            return None
+        lo, hi = int(self._offsets[pos]), int(self._offsets[pos + 1])
+        arrays = {name: column[lo:hi] for name, column in self._columns.items()}
+        arrays.update((name, self._extra_columns[name][lo:hi]) for name in self._symbol_extras[pos])
+        return arrays
+
+    def max_date(self, symbol: str) -> Optional[pd.Timestamp]:
+        arrays = self.get_arrays(symbol)
+        if arrays is None or arrays["day"].size == 0:
+            return None
+        return pd.Timestamp(int(arrays["day"][-1]), unit="D")
+
+    def read_symbol_bars(self, symbol: str, lookback_days: int) -> Optional[SymbolBars]:
+        arrays = self.get_arrays(symbol)
+        if arrays is None or arrays["day"].size == 0:
+            return None
+        days = arrays["day"]
+        start = 0
+        if lookback_days and lookback_days > 0:
+            cutoff = int(days[-1]) - int(lookback_days)
+            start = int(np.searchsorted(days, cutoff, side="left"))
+
+        # Price and optional columns stay zero-copy views into the read-only memory map.
+        return SymbolBars(
+            symbol,
+            days[start:].astype(np.int64),
+            *(arrays[name][start:] for name in ("open", "high", "low", "close", "volume")),
+            extra={name: values[start:] for name, values in arrays.items() if name not in PACK_COLUMNS},
+        )
+
+    def read_symbol_data(self, symbol: str, lookback_days: int) -> Optional[pd.DataFrame]:
+        bars = self.read_symbol_bars(symbol, lookback_days)
+        return None if bars is None else bars.to_frame()
+
+
+@lru_cache(maxsize=None)
+def _open_pack_cached(path: str, mtime_ns: int) -> PackedUniverse:
+    return PackedUniverse(path)
+
+
+def open_pack(path: Union[str, Path]) -> PackedUniverse:
+    resolved = str(Path(path).resolve())
+    return _open_pack_cached(resolved, os.stat(resolved).st_mtime_ns)
+
+
+def _align(offset: int) -> int:
+    return (offset + PACK_ALIGN - 1) // PACK_ALIGN * PACK_ALIGN
+
+
+def pack_universe(ohlcv_path: str, pack_path: Union[str, Path]) -> int:
+    """Convert a `symbol=` partitioned tree into a single packed file. Returns rows packed."""
+    pack_path = Path(pack_path)
+    pack_path.parent.mkdir(parents=True, exist_ok=True)
+
+    symbols: List[str] = []
+    symbol_extras: List[List[str]] = []
+    offsets: List[int] = [0]
+    with tempfile.TemporaryDirectory(prefix="wfb_pack_", dir=pack_path.parent) as tmp:
+        spools = {name: open(Path(tmp) / name, "wb") for name in PACK_COLUMNS}
+        # Optional columns are discovered as symbols are read; a column first
+        # seen mid-way is back-filled with NaN for the rows already packed.
+        extra_paths: Dict[str, Path] = {}
+        extra_spools: Dict[str, BinaryIO] = {}
+
+        def write_nan(spool: BinaryIO, rows: int) -> None:
+            spool.write(np.full(rows, np.nan, dtype="<f8").tobytes())
+
+        try:
+            for symbol in list_symbols(ohlcv_path):
+                df = read_symbol_data(symbol, ohlcv_path, 0)
+                if df is None:
+                    continue
+                # Same validation, ordering and optional columns as read_symbol_bars.
+                bars = SymbolBars.from_frame(df, symbol)
+                if bars.empty:
+                    continue
+                values = {"day": bars.date}
+                values.update((name, getattr(bars, name)) for name in PRICE_FIELDS)
+                for name, dtype in PACK_COLUMNS.items():
+                    spools[name].write(np.ascontiguousarray(values[name], dtype=dtype).tobytes())
+                for name in bars.extra:
+                    if name not in extra_spools:
+                        extra_paths[name] = Path(tmp) / f"extra-{len(extra_paths)}"
+                        extra_spools[name] = open(extra_paths[name], "wb")
+                        write_nan(extra_spools[name], offsets[-1])
+                for name, spool in extra_spools.items():
+                    if name in bars.extra:
+                        spool.write(np.ascontiguousarray(bars.extra[name], dtype="<f8").tobytes())
+                    else:
+                        write_nan(spool, len(bars))
+                symbols.append(symbol)
+                symbol_extras.append(list(bars.extra))
+                offsets.append(offsets[-1] + len(bars))
+        finally:
+            for spool in [*spools.values(), *extra_spools.values()]:
+                spool.close()
+
+        n_rows = offsets[-1]
+        offsets_bytes = np.asarray(offsets, dtype="<i8").tobytes()
+        header: Dict = {
+            "version": 2,
+            "n_rows": n_rows,
+            "symbols": symbols,
+            "symbol_extras": symbol_extras,
+            "columns": {},
+            "extra_columns": {},
+        }
+
+        # Header length feeds back into block offsets; iterate until stable.
+        header_len = 0
+        while True:
+            cursor = _align(len(PACK_MAGIC) + 8 + header_len)
+            header["offsets"] = {"dtype": "<i8", "count": len(offsets), "offset": cursor}
+            cursor = _align(cursor + len(offsets_bytes))
+            for name, dtype in PACK_COLUMNS.items():
+                header["columns"][name] = {"dtype": dtype, "count": n_rows, "offset": cursor}
+                cursor = _align(cursor + n_rows * np.dtype(dtype).itemsize)
+            for name in extra_paths:
+                header["extra_columns"][name] = {"dtype": "<f8", "count": n_rows, "offset": cursor}
+                cursor = _align(cursor + n_rows * 8)
+            encoded = json.dumps(header).encode("utf-8")
+            if len(encoded) == header_len:
+                break
+            header_len = len(encoded)
+
+        tmp_pack = Path(tmp) / "universe.pack"
+        with open(tmp_pack, "wb") as out:
+            out.write(PACK_MAGIC)
+            out.write(struct.pack("<Q", header_len))
+            out.write(encoded)
+            blocks = [(header["offsets"]["offset"], None)]
+            blocks += [(header["columns"][name]["offset"], Path(tmp) / name) for name in PACK_COLUMNS]
+            blocks += [(header["extra_columns"][name]["offset"], path) for name, path in extra_paths.items()]
+            for offset, source in blocks:
+                out.write(b"\0" * (offset - out.tell()))
+                if source is None:
+                    out.write(offsets_bytes)
+                    continue
+                with open(source, "rb") as spool:
+                    while True:
+                        chunk = spool.read(1 << 24)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+        os.replace(tmp_pack, pack_path)
+
+    return n_rows
+
+
+def compute_years_covered(df: Union[pd.DataFrame, SymbolBars]) -> float:
     if df.empty:
         return 0.0
+    if isinstance(df, SymbolBars):
+        return max(1, int(df.date[-1] - df.date[0])) / 365.25
     date_min, date_max = df["date"].min(), df["date"].max()
     days = max(1, (date_max - date_min).days)
     return days / 365.25
@@ -63,3 +478,243 @@ def append_to_csv(df: pd.DataFrame, path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     header = not path.exists()
     df.to_csv(path, mode="a", header=header, index=False)
+
+
+def _open_result_writer(path: Path, schema: pa.Schema) -> pq.ParquetWriter:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    return pq.ParquetWriter(
+        path,
+        schema,
+        use_dictionary=[c for c in RESULT_DICTIONARY_COLUMNS if c in schema.names],
+    )
+
+
+class ParquetSink:
+    """
+    Streaming result writer: each `write` call appends one row group.
+
+    The schema is fixed by the first non-empty frame; `date` is stored as a
+    timestamp and label columns (RESULT_DICTIONARY_COLUMNS) are dictionary
+    encoded. While a column has only held nulls (typed `null` by pyarrow),
+    frames are held back and the schema is fixed, with that column promoted,
+    by the first frame that carries values for it (or on close). Nothing is
+    written for a sink that never receives rows.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.rows = 0
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._schema: Optional[pa.Schema] = None
+        self._pending: List[pa.Table] = []
+
+    def write(self, df: pd.DataFrame) -> None:
+        if df is None or df.empty:
+            return
+        if "date" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["date"]):
+            df = df.assign(date=pd.to_datetime(df["date"]))
+        if self._writer is not None:
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            self._writer.write_table(table, row_group_size=max(1, table.num_rows))
+            self.rows += table.num_rows
+            return
+
+        table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+        schemas = [self._schema, table.schema] if self._schema is not None else [table.schema]
+        self._schema = pa.unify_schemas(schemas, promote_options="permissive")
+        self._pending.append(table)
+        self.rows += table.num_rows
+        if not any(pa.types.is_null(field.type) for field in self._schema):
+            self._open()
+
+    def _open(self) -> None:
+        self._writer = _open_result_writer(self.path, self._schema)
+        for table in self._pending:
+            self._writer.write_table(_conform(table, self._schema), row_group_size=max(1, table.num_rows))
+        self._pending = []
+
+    def close(self) -> None:
+        if self._writer is None and self._pending:
+            self._open()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> "ParquetSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def write_results(df: pd.DataFrame, path: Path) -> None:
+    """Write a whole result frame; empty frames still produce a schema-only file."""
+    path = Path(path)
+    if df is None or df.empty:
+        columns = list(df.columns) if df is not None else []
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(pd.DataFrame(columns=columns), preserve_index=False), path)
+        return
+    with ParquetSink(path) as sink:
+        sink.write(df)
+
+
+def read_results(path: Path, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """Read a result file written by ParquetSink, projecting `columns` that exist."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    if columns is not None:
+        names = pq.read_schema(path).names
+        columns = [c for c in columns if c in names]
+    return pq.read_table(path, columns=columns).to_pandas()
+
+
+def iter_results(path: Path, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Stream a result file one row group at a time; yields nothing if it does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return
+    parquet_file = pq.ParquetFile(path)
+    if columns is not None:
+        columns = [c for c in columns if c in parquet_file.schema_arrow.names]
+    for rg in range(parquet_file.num_row_groups):
+        yield parquet_file.read_row_group(rg, columns=columns).to_pandas()
+
+
+class ResultRowGroups:
+    """Re-iterable view of a result file's row groups, for summaries that stream it more than once."""
+
+    def __init__(self, path: Path, columns: Optional[List[str]] = None) -> None:
+        self.path = Path(path)
+        self.columns = columns
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        return iter_results(self.path, self.columns)
+
+
+def export_csv(parquet_path: Path, csv_path: Path) -> None:
+    """Stream a result file to CSV one row group at a time (export only; not re-read)."""
+    parquet_path, csv_path = Path(parquet_path), Path(csv_path)
+    if csv_path.exists():
+        csv_path.unlink()
+    if not parquet_path.exists():
+        return
+    parquet_file = pq.ParquetFile(parquet_path)
+    if parquet_file.metadata.num_rows == 0:
+        pd.DataFrame(columns=parquet_file.schema_arrow.names).to_csv(csv_path, index=False)
+        return
+    for rg in range(parquet_file.num_row_groups):
+        append_to_csv(parquet_file.read_row_group(rg).to_pandas(), csv_path)
+
+
+def _symbol_runs(path: Path, excluded: Optional[pa.Array] = None) -> Iterator[Tuple[str, pa.Table]]:
+    """Stream a result file as runs of consecutive rows sharing one symbol."""
+    parquet_file = pq.ParquetFile(path)
+    for rg in range(parquet_file.num_row_groups):
+        table = parquet_file.read_row_group(rg)
+        if "symbol" not in table.column_names:
+            yield "", table
+            continue
+        if excluded is not None and len(excluded):
+            symbols = table.column("symbol").cast(pa.string())
+            table = table.filter(pc.invert(pc.is_in(symbols, value_set=excluded)))
+        if table.num_rows == 0:
+            continue
+        symbols = table.column("symbol").to_numpy(zero_copy_only=False)
+        bounds = np.concatenate(([0], np.flatnonzero(symbols[1:] != symbols[:-1]) + 1, [len(symbols)]))
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            yield str(symbols[lo]), table.slice(lo, hi - lo)
+
+
+def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    columns = [
+        table.column(field.name).cast(field.type)
+        if field.name in table.column_names
+        else pa.nulls(table.num_rows, field.type)
+        for field in schema
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _merge_sorted(sources: List[Tuple[Path, Optional[pa.Array]]], path: Path) -> int:
+    """
+    Streaming k-way merge of symbol-ordered result files into `path`.
+
+    Runs are merged by symbol, ties keep source order, and rows are re-chunked
+    into RESULT_ROW_GROUP_ROWS row groups, so the bytes written depend only on
+    the rows, not on how they were split across sources. Sources may include
+    `path` itself. Returns the row count.
+    """
+    path = Path(path)
+    sources = [(Path(source), excluded) for source, excluded in sources if Path(source).exists()]
+    if not sources:
+        path.unlink(missing_ok=True)
+        return 0
+    schemas = [pq.read_schema(source).remove_metadata() for source, _ in sources]
+    schema = pa.unify_schemas(schemas, promote_options="permissive")
+
+    tmp_path = path.with_name(f"{path.name}.merge.tmp")
+    writer = _open_result_writer(tmp_path, schema)
+    pending: List[pa.Table] = []
+    pending_rows = 0
+    total = 0
+    runs = heapq.merge(
+        *(_symbol_runs(source, excluded) for source, excluded in sources), key=lambda run: run[0]
+    )
+    try:
+        for _, run in runs:
+            pending.append(_conform(run, schema))
+            pending_rows += run.num_rows
+            while pending_rows >= RESULT_ROW_GROUP_ROWS:
+                combined = pa.concat_tables(pending)
+                writer.write_table(
+                    combined.slice(0, RESULT_ROW_GROUP_ROWS), row_group_size=RESULT_ROW_GROUP_ROWS
+                )
+                rest = combined.slice(RESULT_ROW_GROUP_ROWS)
+                pending, pending_rows = [rest], rest.num_rows
+                total += RESULT_ROW_GROUP_ROWS
+        if pending_rows:
+            writer.write_table(pa.concat_tables(pending), row_group_size=pending_rows)
+            total += pending_rows
+    finally:
+        writer.close()
+    os.replace(tmp_path, path)
+    return total
+
+
+def merge_shards(shard_paths: Iterable[Path], path: Path) -> int:
+    """Merge symbol-sorted shard files (e.g. one per worker batch) into one result file."""
+    return _merge_sorted([(shard, None) for shard in shard_paths], path)
+
+
+def merge_results(path: Path, refreshed_path: Path, replaced_symbols: Iterable[str]) -> int:
+    """
+    Replace the rows of `replaced_symbols` in `path` with the rows of `refreshed_path`.
+
+    Both files are streamed and k-way merged by symbol, so a symbol-ordered
+    file stays symbol-ordered. `refreshed_path` is consumed. Returns the
+    merged row count.
+    """
+    path, refreshed_path = Path(path), Path(refreshed_path)
+    replaced = pa.array(sorted(set(replaced_symbols)), type=pa.string())
+    rows = _merge_sorted([(path, replaced), (refreshed_path, None)], path)
+    refreshed_path.unlink(missing_ok=True)
+    return rows
+
+
+def _main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m harness.io")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pack = sub.add_parser("pack", help="pack a symbol= partitioned Parquet tree into one file")
+    pack.add_argument("ohlcv_path", help="Parquet root with symbol=XXXX partitions")
+    pack.add_argument("pack_path", help="destination packed file")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        n_rows = pack_universe(args.ohlcv_path, args.pack_path)
+        print(f"Packed {len(open_pack(args.pack_path))} symbols ({n_rows} rows) into {args.pack_path}")
+
+
+if __name__ == "__main__":
+    _main()
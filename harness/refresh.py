@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from harness import io as _io
+from harness.result_cache import _REPO_ROOT, _hash_sources, detector_code_version
+
+MANIFEST_VERSION = 1
+STATE_DIRNAME = ".incremental"
+
+# Config keys that change how a run executes but not what it writes.
+EXECUTION_CONFIG_KEYS = (
+    "workers",
+    "read_ahead_threads",
+    "read_ahead_depth",
+    "batch_rows",
+    "export_csv",
+    "bar_cache_max_mb",
+    "bar_cache_dir",
+    "result_cache",
+    "result_cache_dir",
+    "result_cache_max_mb",
+    "feature_store",
+    "feature_store_dir",
+    "feature_store_max_mb",
+)
+
+
+def run_fingerprint(cfg: Dict, detector_names: List[str]) -> str:
+    """Fingerprint of everything besides the price data that shapes a run's outputs."""
+    relevant = {key: value for key, value in cfg.items() if key not in EXECUTION_CONFIG_KEYS}
+    parts = [
+        json.dumps(relevant, sort_keys=True, default=str),
+        _hash_sources((_REPO_ROOT / "harness", _REPO_ROOT / "baseline")),
+    ]
+    parts.extend(f"{name}={detector_code_version(name)}" for name in detector_names)
+    return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class RefreshManifest:
+    """
+    Per-symbol record of the source data an output directory was built from.
+
+    Lives in `<output_path>/.incremental/` together with the partial results
+    incremental runs merge into. Each entry keeps the symbol's last seen max
+    date, row count, file signature (size + mtime) and content hash. `diff`
+    only hashes symbols whose signature moved, so checking an unchanged
+    universe reads no data. A manifest written under a different run
+    fingerprint is ignored and the next run rebuilds everything.
+    """
+
+    def __init__(self, output_path: Path, fingerprint: str) -> None:
+        self.state_dir = Path(output_path) / STATE_DIRNAME
+        self.path = self.state_dir / "manifest.json"
+        self.fingerprint = fingerprint
+        self.symbols: Dict[str, Dict] = {}
+        self.valid = False
+        self._observed: Dict[str, Tuple[Optional[List], Optional[str]]] = {}
+
+    @classmethod
+    def load(cls, output_path: Path, fingerprint: str) -> "RefreshManifest":
+        manifest = cls(output_path, fingerprint)
+        try:
+            payload = json.loads(manifest.path.read_text())
+        except (FileNotFoundError, ValueError):
+            return manifest
+        if payload.get("version") == MANIFEST_VERSION and payload.get("fingerprint") == fingerprint:
+            manifest.symbols = payload.get("symbols", {})
+            manifest.valid = True
+        return manifest
+
+    @staticmethod
+    def discard(output_path: Path) -> None:
+        """Drop incremental state; used by full runs, which rewrite outputs without it."""
+        shutil.rmtree(Path(output_path) / STATE_DIRNAME, ignore_errors=True)
+
+    def diff(self, symbols: List[str], ohlcv_path: str) -> Tuple[List[str], List[str]]:
+        """Return `(changed, removed)`: symbols to recompute, and symbols no longer in the universe."""
+        changed: List[str] = []
+        for symbol in symbols:
+            entry = self.symbols.get(symbol)
+            signature = _io.symbol_source_signature(symbol, ohlcv_path)
+            if entry is not None and entry.get("signature") == signature:
+                continue
+            content_hash = _io.symbol_data_fingerprint(symbol, ohlcv_path)
+            self._observed[symbol] = (signature, content_hash)
+            if entry is not None and entry.get("hash") == content_hash:
+                # Rewritten with identical bytes; remember the new signature only.
+                entry["signature"] = signature
+                continue
+            changed.append(symbol)
+        current = set(symbols)
+        removed = sorted(symbol for symbol in self.symbols if symbol not in current)
+        return changed, removed
+
+    def record(self, symbol: str, ohlcv_path: str, years_covered: float) -> None:
+        observed = self._observed.pop(symbol, None)
+        if observed is None:
+            observed = (
+                _io.symbol_source_signature(symbol, ohlcv_path),
+                _io.symbol_data_fingerprint(symbol, ohlcv_path),
+            )
+        max_date = _io.read_symbol_max_date(symbol, ohlcv_path)
+        self.symbols[symbol] = {
+            "max_date": None if max_date is None else str(max_date.date()),
+            "rows": _io.count_symbol_rows(symbol, ohlcv_path),
+            "signature": observed[0],
+            "hash": observed[1],
+            "years_covered": float(years_covered),
+        }
+
+    def drop(self, symbols: List[str]) -> None:
+        for symbol in symbols:
+            self.symbols.pop(symbol, None)
+
+    def coverage_years(self, symbols: List[str]) -> float:
+        return float(sum(self.symbols.get(symbol, {}).get("years_covered", 0.0) for symbol in symbols))
+
+    def save(self) -> None:
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        payload = {"version": MANIFEST_VERSION, "fingerprint": self.fingerprint, "symbols": self.symbols}
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(payload, sort_keys=True))
+        os.replace(tmp_path, self.path)
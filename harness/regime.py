@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 
+from harness.bars import BarsLike, SymbolBars, to_day_numbers
+
 
 REGIMES: List[str] = ["UNKNOWN", "ACCUMULATION", "MARKUP", "DISTRIBUTION", "MARKDOWN"]
 
@@ -18,14 +21,50 @@ _EVENT_TO_REGIME: Dict[str, str] = {
 }
 
 
-def classify_regime_daily(price_df: pd.DataFrame, events_df: pd.DataFrame) -> pd.DataFrame:
+def _classify_bars(bars: SymbolBars, events_df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    n = len(bars)
+    codes = np.full(n, -1, dtype=np.int64)
+    if events_df is not None and not events_df.empty:
+        labels = events_df["event"].astype(str).str.upper().to_numpy()
+        if "bar_index" in events_df.columns:
+            positions = events_df["bar_index"].to_numpy(dtype=np.int64)
+        else:
+            positions = bars.positions(to_day_numbers(events_df["date"]))
+        # Later entries of _EVENT_ORDER win when several events share a bar.
+        for event in _EVENT_ORDER:
+            at = positions[(labels == event) & (positions >= 0)]
+            codes[at] = REGIMES.index(_EVENT_TO_REGIME[event])
+
+    # Carry each bar's regime forward until the next regime event.
+    last = np.maximum.accumulate(np.where(codes >= 0, np.arange(n), -1))
+    regime_codes = np.where(last >= 0, codes[np.maximum(last, 0)], 0)
+    return pd.DataFrame(
+        {
+            "symbol": bars.symbol,
+            "date": bars.dates(),
+            "regime": np.asarray(REGIMES)[regime_codes],
+            "bar_index": np.arange(n, dtype=np.int64),
+            "day": bars.date,
+        }
+    )
+
+
+def classify_regime_daily(price_df: BarsLike, events_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-bar regime labels from structural events.
+
+    With `SymbolBars` the result also carries `bar_index` and `day`, and
+    events are placed by their `bar_index` when they have one.
+    """
     if price_df is None or price_df.empty:
         return pd.DataFrame(columns=["symbol", "date", "regime"])
 
+    if isinstance(price_df, SymbolBars):
+        return _classify_bars(price_df, events_df)
+
     data = price_df.copy()
     data["date"] = pd.to_datetime(data["date"], errors="coerce")
     data = data.sort_values("date").reset_index(drop=True)
-
     symbol = str(data["symbol"].iloc[0]) if "symbol" in data.columns else ""
 
     if events_df is None or events_df.empty:
@@ -1,15 +1,28 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, Iterable, List, Tuple
 
 import numpy as np
 import pandas as pd
 
+from harness.bars import BarsLike, SymbolBars
+from harness.sketch import QuantileSketch
 
-def add_forward_returns_daily(price_df: pd.DataFrame, windows: List[int]) -> pd.DataFrame:
+REGIME_SUMMARY_COLUMNS = ["regime", "window", "count", "median", "win_rate", "p5"]
+
+
+def add_forward_returns_daily(price_df: BarsLike, windows: List[int]) -> pd.DataFrame:
     if price_df is None or price_df.empty:
         return pd.DataFrame()
 
+    if isinstance(price_df, SymbolBars):
+        out = {"symbol": price_df.symbol, "date": price_df.dates()}
+        windows = sorted({int(w) for w in windows})
+        matrix = price_df.forward_return_matrix(windows)
+        for column, window in enumerate(windows):
+            out[f"fwd_{window}"] = matrix[:, column]
+        return pd.DataFrame(out)
+
     data = price_df.copy()
     data["date"] = pd.to_datetime(data["date"], errors="coerce")
     data = data.sort_values("date").reset_index(drop=True)
@@ -24,33 +37,93 @@ def add_forward_returns_daily(price_df: pd.DataFrame, windows: List[int]) -> pd.
     return data[cols]
 
 
-def summarize_regimes(regime_daily_df: pd.DataFrame, daily_fwd_df: pd.DataFrame) -> pd.DataFrame:
+def regime_partials(
+    regime_daily_df: pd.DataFrame, daily_fwd_df: pd.DataFrame, relative_accuracy: float = 0.0
+) -> pd.DataFrame:
+    """
+    Mergeable per-(regime, window) aggregates for one symbol's bars.
+
+    Each row holds the non-null count, the count of positive returns and a
+    serialized `QuantileSketch`; `summarize_regime_partials` folds any
+    number of these into the regime summary table.
+    """
+    columns = ["symbol", "regime", "window", "count", "wins", "sketch"]
     if regime_daily_df is None or daily_fwd_df is None or regime_daily_df.empty or daily_fwd_df.empty:
-        return pd.DataFrame(columns=["regime", "window", "count", "median", "win_rate", "p5"])
+        return pd.DataFrame(columns=columns)
 
-    join_cols = ["date"]
-    if "symbol" in regime_daily_df.columns and "symbol" in daily_fwd_df.columns:
-        join_cols = ["symbol", "date"]
-
-    merged = regime_daily_df.merge(daily_fwd_df, on=join_cols, how="inner")
-    fwd_cols = [c for c in merged.columns if c.startswith("fwd_")]
+    merged = regime_daily_df.merge(daily_fwd_df, on=["symbol", "date"], how="inner")
+    fwd_cols = sorted((c for c in merged.columns if c.startswith("fwd_")), key=lambda x: int(x.split("_")[1]))
+    # Regimes in order of first appearance within the symbol's bars.
+    codes, regimes = pd.factorize(merged["regime"], sort=False)
+    symbol = regime_daily_df["symbol"].iloc[0]
 
     rows = []
-    for col in sorted(fwd_cols, key=lambda x: int(x.split("_")[1])):
-        window = int(col.split("_")[1])
-        for regime, grp in merged.groupby("regime", sort=False):
-            vals = grp[col].dropna()
+    for col in fwd_cols:
+        values = merged[col].to_numpy(dtype="float64")
+        for code, regime in enumerate(regimes):
+            vals = values[codes == code]
+            vals = vals[~np.isnan(vals)]
             rows.append(
                 {
+                    "symbol": symbol,
                     "regime": regime,
-                    "window": window,
+                    "window": int(col.split("_")[1]),
                     "count": int(vals.shape[0]),
-                    "median": vals.median() if not vals.empty else np.nan,
-                    "win_rate": (vals > 0).mean() if not vals.empty else np.nan,
-                    "p5": vals.quantile(0.05) if not vals.empty else np.nan,
+                    "wins": int((vals > 0).sum()),
+                    "sketch": QuantileSketch.from_values(vals, relative_accuracy).to_bytes(),
                 }
             )
+    return pd.DataFrame(rows, columns=columns)
+
+
+def summarize_regime_partials(partials: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Fold streamed `regime_partials` frames into the regime summary table.
+
+    Only one sketch per (regime, window) is held. With `relative_accuracy > 0`
+    those sketches are bucketed, so memory does not grow with the number of
+    symbols or bars; in exact mode (0) they keep every value, as the
+    partials do. Frames must arrive in symbol order
+    for regimes to be listed in order of first appearance.
+    """
+    totals: Dict[Tuple[str, int], List] = {}
+    regimes: Dict[str, None] = {}
+    windows = set()
+    for frame in partials:
+        for regime, window, count, wins, payload in zip(
+            frame["regime"], frame["window"], frame["count"], frame["wins"], frame["sketch"]
+        ):
+            regimes.setdefault(regime, None)
+            windows.add(int(window))
+            sketch = QuantileSketch.from_bytes(payload)
+            total = totals.get((regime, int(window)))
+            if total is None:
+                totals[(regime, int(window))] = [int(count), int(wins), sketch]
+            else:
+                total[0] += int(count)
+                total[1] += int(wins)
+                total[2].merge(sketch)
+
+    if not totals:
+        return pd.DataFrame(columns=REGIME_SUMMARY_COLUMNS)
 
+    rows = []
+    for window in sorted(windows):
+        for regime in regimes:
+            total = totals.get((regime, window))
+            if total is None:
+                continue
+            count, wins, sketch = total
+            rows.append(
+                {
+                    "regime": regime,
+                    "window": window,
+                    "count": count,
+                    "median": sketch.median() if count else np.nan,
+                    "win_rate": wins / count if count else np.nan,
+                    "p5": sketch.quantile(0.05) if count else np.nan,
+                }
+            )
     return pd.DataFrame(rows)
 
 
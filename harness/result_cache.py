@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Config keys that change per-symbol detector output. Detectors only read
+# `symbol` from cfg today; add keys here if a detector starts reading more.
+RESULT_CONFIG_KEYS = ("lookback_days", "forward_windows")
+
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+# Shared code every detector's events and forward returns flow through,
+# including the readers that decide which bars a detector sees.
+_SHARED_SOURCES = (
+    _REPO_ROOT / "baseline",
+    _REPO_ROOT / "harness" / "bars.py",
+    _REPO_ROOT / "harness" / "detectors.py",
+    _REPO_ROOT / "harness" / "eval.py",
+    _REPO_ROOT / "harness" / "features.py",
+    _REPO_ROOT / "harness" / "io.py",
+)
+
+
+def _hash_sources(paths) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    files = []
+    for path in paths:
+        path = Path(path)
+        files.extend(sorted(path.rglob("*.py")) if path.is_dir() else [path])
+    for path in files:
+        digest.update(str(path.relative_to(_REPO_ROOT)).encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def detector_code_version(detector_name: str) -> str:
+    """Fingerprint of the detector's and its upstreams' modules plus the shared baseline/eval code."""
+    from harness.detectors import DETECTORS, detector_order
+
+    module_files = {Path(inspect.getsourcefile(DETECTORS[name])) for name in detector_order([detector_name])}
+    return _hash_sources(tuple(sorted(module_files)) + _SHARED_SOURCES)
+
+
+def config_fingerprint(cfg: Dict) -> str:
+    relevant = {key: cfg.get(key) for key in RESULT_CONFIG_KEYS}
+    if relevant.get("forward_windows") is not None:
+        relevant["forward_windows"] = sorted({int(w) for w in relevant["forward_windows"]})
+    return hashlib.blake2b(
+        json.dumps(relevant, sort_keys=True, default=str).encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent on-disk cache of per-(symbol, detector) events and forward returns.
+
+    Entries are keyed by the symbol's data fingerprint, the detector name, the
+    detector code version and the relevant config, so reruns only recompute
+    symbols or detectors whose inputs changed. Hits refresh the entry's mtime;
+    `evict` trims least recently used entries down to `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max(0, int(max_bytes))
+
+    def key(self, data_fingerprint: str, detector_name: str, cfg: Dict) -> str:
+        parts = [
+            data_fingerprint,
+            detector_name,
+            detector_code_version(detector_name),
+            config_fingerprint(cfg),
+        ]
+        return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=20).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        bucket = self.cache_dir / key[:2]
+        return bucket / f"{key}.events.parquet", bucket / f"{key}.forward.parquet"
+
+    def get(self, key: str) -> Optional[Tuple[float, pd.DataFrame, pd.DataFrame]]:
+        events_path, forward_path = self._paths(key)
+        try:
+            events_table = pq.read_table(events_path)
+            forward = pq.read_table(forward_path).to_pandas()
+        except (FileNotFoundError, OSError, pa.ArrowInvalid):
+            return None
+        metadata = events_table.schema.metadata or {}
+        years_covered = float(metadata.get(b"years_covered", b"0"))
+        for path in (events_path, forward_path):
+            os.utime(path)
+        return years_covered, events_table.to_pandas(), forward
+
+    def put(self, key: str, years_covered: float, events: pd.DataFrame, forward: pd.DataFrame) -> None:
+        events_path, forward_path = self._paths(key)
+        events_path.parent.mkdir(parents=True, exist_ok=True)
+        tables = [
+            (forward_path, pa.Table.from_pandas(forward, preserve_index=False)),
+            (events_path, pa.Table.from_pandas(events, preserve_index=False)),
+        ]
+        # Events are written last so a readable events file implies a complete entry.
+        for path, table in tables:
+            metadata = dict(table.schema.metadata or {})
+            metadata[b"years_covered"] = repr(float(years_covered)).encode("utf-8")
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+            os.replace(tmp_path, path)
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits; returns entries removed."""
+        entries: Dict[str, list] = {}
+        for path in self.cache_dir.glob("*/*.parquet"):
+            key = path.name.split(".", 1)[0]
+            stat = path.stat()
+            entry = entries.setdefault(key, [0, 0.0, []])
+            entry[0] += stat.st_size
+            entry[1] = max(entry[1], stat.st_mtime)
+            entry[2].append(path)
+
+        total = sum(entry[0] for entry in entries.values())
+        removed = 0
+        for key, (size, _, paths) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            # Events first, mirroring put(): a dangling forward file is never served.
+            for path in sorted(paths, key=lambda p: ".events." not in p.name):
+                path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
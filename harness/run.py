@@ -1,32 +1,60 @@
 from __future__ import annotations
 
+import argparse
 import logging
 import sys
+import tempfile
+from collections import defaultdict, deque
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
 from tqdm import tqdm
 
+from baseline.adapter import EVENT_INDEX_COLUMNS
 from harness import io as _io
-from harness.detectors import DETECTORS, DetectorFn
+from harness.bar_cache import DEFAULT_MAX_BYTES, BarCache
+from harness.bars import SymbolBars
+from harness.detectors import (
+    DETECTOR_DEPENDENCIES,
+    DETECTOR_FEATURES,
+    DETECTORS,
+    DetectorFn,
+    detector_order,
+)
 from harness.eval import (
+    DEFAULT_PATH_TOLERANCE_DAYS,
     add_forward_returns,
     build_comparison_table,
-    evaluate_bc_effect,
-    evaluate_event_effect,
+    bc_effect_table,
+    evaluate_event_effects,
+    evaluate_conditional_effects,
     evaluate_path_dependency,
-    evaluate_sos_after_bc_effect,
     summarize_forward_returns,
 )
 from harness.contextual_event_eval import attach_prior_regime
+from harness.feature_store import DEFAULT_MAX_BYTES as FEATURE_STORE_MAX_BYTES, FeatureStore
+from harness.features import FEATURE_SETS
 from harness.regime import classify_regime_daily
-from harness.regime_eval import add_forward_returns_daily, pairwise_vs_baseline, summarize_regimes
+from harness.refresh import RefreshManifest, run_fingerprint
+from harness.regime_eval import (
+    add_forward_returns_daily,
+    pairwise_vs_baseline,
+    regime_partials,
+    summarize_regime_partials,
+)
+from harness.result_cache import DEFAULT_MAX_BYTES as RESULT_CACHE_MAX_BYTES, ResultCache
 from harness.sequence_labels import label_event_sequences
 from harness.transition_labels import label_regime_transitions
 
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+DEFAULT_READ_AHEAD_THREADS = 4
+DEFAULT_BATCH_ROWS = 50_000
+DEFAULT_EFFECT_EVENTS = ["AR", "AR_TOP", "SOW", "SOS"]
+
+# Per-process state installed by `_init_worker`; only used inside pool workers.
+_WORKER_STATE: Dict[str, object] = {}
 
 
 def _resolve_detectors(requested: List[str]) -> List[Tuple[str, DetectorFn]]:
@@ -40,127 +68,515 @@ def _resolve_detectors(requested: List[str]) -> List[Tuple[str, DetectorFn]]:
 
 
 def _flush_buffers(
-    events_buffer: List[pd.DataFrame],
-    forward_buffer: List[pd.DataFrame],
-    events_path: Path,
-    forward_path: Path,
+    buffers: Dict[str, List[pd.DataFrame]],
+    sinks: Dict[str, _io.ParquetSink],
+    shard_dir: str,
 ) -> None:
-    if events_buffer:
-        _io.append_to_csv(pd.concat(events_buffer, ignore_index=True), events_path)
-    if forward_buffer:
-        _io.append_to_csv(pd.concat(forward_buffer, ignore_index=True), forward_path)
+    """Write buffered frames to each artifact's serial shard, opening sinks on first use."""
+    for name, frames in buffers.items():
+        if not frames:
+            continue
+        sink = sinks.get(name)
+        if sink is None:
+            sink = sinks[name] = _io.ParquetSink(_shard_path(shard_dir, name, 0))
+        sink.write(pd.concat(frames, ignore_index=True))
+        frames.clear()
 
 
-def _process_symbol(
-    symbol: str,
-    ohlcv_path: str,
-    lookback_days: int,
+def _detect_symbol(
+    load_bars: Callable[[], Optional[SymbolBars]],
+    detectors: List[Tuple[str, DetectorFn]],
     cfg: dict,
-    detector_names: List[str],
-):
-    from harness import io as _io
-    from harness.detectors import DETECTORS
-    from harness.eval import add_forward_returns
-
-    df = _io.read_symbol_data(symbol, ohlcv_path, lookback_days)
-    if df is None or df.empty:
-        return symbol, 0.0, [], []
-
-    detectors = [(name, DETECTORS[name]) for name in detector_names]
-
-    events_out = []
-    forward_out = []
+    result_cache: Optional[ResultCache] = None,
+    data_fingerprint: Optional[str] = None,
+) -> Tuple[float, List[pd.DataFrame], List[pd.DataFrame]]:
+    """Run detectors + forward returns for one symbol, serving unchanged inputs from the cache."""
     forward_windows = cfg.get("forward_windows", [5, 10, 20, 40])
-    years_covered = _io.compute_years_covered(df)
 
-    for detector_name, detector_fn in detectors:
-        events = detector_fn(df, cfg)
+    keys: Dict[str, str] = {}
+    cached: Dict[str, Tuple[pd.DataFrame, pd.DataFrame]] = {}
+    years_covered = 0.0
+    if result_cache is not None and data_fingerprint is not None:
+        for detector_name, _ in detectors:
+            keys[detector_name] = result_cache.key(data_fingerprint, detector_name, cfg)
+            hit = result_cache.get(keys[detector_name])
+            if hit is not None:
+                years_covered, events, forward = hit
+                cached[detector_name] = (events, forward)
+
+    df = None
+    if len(cached) < len(detectors):
+        df = load_bars()
+        if df is None or df.empty:
+            return 0.0, [], []
+        years_covered = _io.compute_years_covered(df)
+
+    # Run what the cache could not serve, upstreams first; each detector runs
+    # once and its raw events are handed to every dependent.
+    results = dict(cached)
+    fns = dict(detectors)
+    raw: Dict[str, pd.DataFrame] = {}
+    for detector_name in detector_order(name for name, _ in detectors if name not in cached):
+        detector_fn = fns.get(detector_name, DETECTORS[detector_name])
+        dependencies = DETECTOR_DEPENDENCIES.get(detector_name, ())
+        if dependencies:
+            events = detector_fn(df, cfg, upstream={name: raw[name] for name in dependencies})
+        else:
+            events = detector_fn(df, cfg)
+        raw[detector_name] = events
+        if detector_name not in fns:
+            continue
+        forward = events
+        if not events.empty:
+            # `assign` leaves the raw frame untouched for later dependents.
+            events = events.assign(detector=detector_name)
+            forward = add_forward_returns(events, df, forward_windows)
+            forward["detector"] = detector_name
+        if detector_name in keys:
+            result_cache.put(keys[detector_name], years_covered, events, forward)
+        results[detector_name] = (events, forward)
+
+    events_out: List[pd.DataFrame] = []
+    forward_out: List[pd.DataFrame] = []
+    for detector_name, _ in detectors:
+        events, forward = results[detector_name]
         if events.empty:
             continue
-
-        events["detector"] = detector_name
-        forward = add_forward_returns(events, df, forward_windows)
-        forward["detector"] = detector_name
-
         events_out.append(events)
         forward_out.append(forward)
 
-    return symbol, years_covered, events_out, forward_out
+    return years_covered, events_out, forward_out
 
 
-def _read_csv_or_empty(path: Path, columns: List[str]) -> pd.DataFrame:
-    if not path.exists():
-        return pd.DataFrame(columns=columns)
-    df = pd.read_csv(path, parse_dates=["date"] if "date" in columns else None)
-    if df.empty:
-        return pd.DataFrame(columns=columns)
-    return df[columns].copy()
+def _quantile_accuracy(cfg: dict) -> float:
+    """`summary_quantile_accuracy` for every summary (0 = exact); the old regime-only key is still read."""
+    if "summary_quantile_accuracy" not in cfg and "regime_quantile_accuracy" in cfg:
+        return float(cfg["regime_quantile_accuracy"])
+    return float(cfg.get("summary_quantile_accuracy", 0.0))
 
 
-def _build_forward_returns_for_events(
-    events_df: pd.DataFrame,
-    symbols: List[str],
-    ohlcv_path: str,
-    lookback_days: int,
-    forward_windows: List[int],
-) -> pd.DataFrame:
-    if events_df is None or events_df.empty:
-        base_columns = list(events_df.columns) if events_df is not None else []
-        return pd.DataFrame(columns=base_columns + [f"fwd_{w}" for w in forward_windows])
-
-    events_by_symbol = {
-        symbol: group.copy() for symbol, group in events_df.groupby("symbol", sort=False)
+def _stage_settings(cfg: dict) -> Dict[str, object]:
+    """Config for the per-symbol regime, transition, sequence and contextual stages."""
+    sequence_max_gap_map = cfg.get("sequence_max_gap_map", {}) or {}
+    if not isinstance(sequence_max_gap_map, dict):
+        sequence_max_gap_map = {}
+    disabled_sequences = cfg.get("disabled_sequences", []) or []
+    if isinstance(disabled_sequences, str):
+        disabled_sequences = [disabled_sequences]
+    context_events = cfg.get("context_events", ["SOS", "SOW", "BC", "SPRING"])
+    if context_events is None:
+        context_events = ["SOS", "SOW", "BC", "SPRING"]
+    if isinstance(context_events, (str, bytes)):
+        context_events = [context_events]
+    return {
+        "forward_windows": cfg.get("forward_windows", [5, 10, 20, 40]),
+        "regime_benchmark": bool(cfg.get("regime_benchmark", True)),
+        "regime_detector": str(cfg.get("regime_detector", "baseline")),
+        "quantile_accuracy": _quantile_accuracy(cfg),
+        "transition_min_prior_bars": int(cfg.get("transition_min_prior_bars", 5)),
+        "sequence_max_gap_default": int(
+            cfg.get("sequence_max_gap_default", cfg.get("sequence_max_gap", 30))
+        ),
+        "sequence_max_gap_map": sequence_max_gap_map,
+        "disabled_sequences": disabled_sequences,
+        "contextual_lookback": int(cfg.get("contextual_lookback", 1)),
+        "context_events": [str(event).upper() for event in context_events],
     }
-    forward_parts: List[pd.DataFrame] = []
 
-    for symbol in symbols:
-        symbol_events = events_by_symbol.get(symbol)
-        if symbol_events is None or symbol_events.empty:
-            continue
 
-        price_df = _io.read_symbol_data(symbol, ohlcv_path, lookback_days)
-        if price_df is None or price_df.empty:
+def _keyed(columns: List[str], df: pd.DataFrame) -> List[str]:
+    """`columns` plus whichever integer event keys (`bar_index`, `day`) `df` carries."""
+    return columns + [c for c in EVENT_INDEX_COLUMNS if c in df.columns]
+
+
+def _stage_events(
+    bars: SymbolBars,
+    events_by_detector: Dict[str, pd.DataFrame],
+    settings: Dict[str, object],
+) -> Dict[str, Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Regime-derived benchmark events for one symbol.
+
+    Returns `{stage: (events, eval_events)}` for the regime daily labels and
+    the transition, sequence and contextual families; `eval_events` carries
+    the `event`/`detector` columns forward returns are evaluated on.
+    """
+    empty_events = pd.DataFrame(columns=["symbol", "date", "event"])
+    regime_events = events_by_detector.get(settings["regime_detector"])
+    baseline_events = events_by_detector.get("baseline")
+    baseline_events = (
+        baseline_events[_keyed(["symbol", "date", "event"], baseline_events)]
+        if baseline_events is not None
+        else empty_events
+    )
+
+    stages: Dict[str, Tuple[pd.DataFrame, pd.DataFrame]] = {}
+    regime_df = pd.DataFrame(columns=["symbol", "date", "regime"])
+    if settings["regime_benchmark"] and settings["regime_detector"] in events_by_detector:
+        symbol_events = (
+            regime_events[_keyed(["date", "event"], regime_events)]
+            if regime_events is not None and not regime_events.empty
+            else pd.DataFrame(columns=["date", "event"])
+        )
+        regime_df = classify_regime_daily(bars, symbol_events)
+        stages["regime"] = (regime_df, regime_df)
+
+    transition_events_df = label_regime_transitions(regime_df, settings["transition_min_prior_bars"])
+    transition_eval_df = transition_events_df.copy()
+    if not transition_eval_df.empty:
+        transition_eval_df["event"] = transition_eval_df["transition"]
+        transition_eval_df["detector"] = "transition"
+    stages["transition"] = (transition_events_df, transition_eval_df)
+
+    sequence_events_df = label_event_sequences(
+        baseline_events,
+        settings["sequence_max_gap_default"],
+        settings["sequence_max_gap_map"],
+        settings["disabled_sequences"],
+    )
+    sequence_eval_df = sequence_events_df.copy()
+    if not sequence_eval_df.empty:
+        sequence_eval_df["event"] = sequence_eval_df["sequence_id"]
+        sequence_eval_df["detector"] = "sequence"
+    stages["sequence"] = (sequence_events_df, sequence_eval_df)
+
+    context_events = settings["context_events"]
+    contextual_events_df = attach_prior_regime(
+        baseline_events, regime_df, settings["contextual_lookback"], context_events
+    )
+    contextual_events_df = contextual_events_df[
+        contextual_events_df["event"].isin(context_events)
+    ].copy()
+    contextual_events_df = contextual_events_df.dropna(subset=["prior_regime"])
+    if not contextual_events_df.empty:
+        contextual_events_df["event"] = (
+            contextual_events_df["event"].astype(str).str.upper()
+        )
+        contextual_events_df["prior_regime"] = (
+            contextual_events_df["prior_regime"].astype(str).str.upper()
+        )
+        allowed_regimes = {"ACCUMULATION", "MARKUP", "DISTRIBUTION", "MARKDOWN"}
+        contextual_events_df = contextual_events_df[
+            contextual_events_df["prior_regime"].isin(allowed_regimes)
+        ]
+    contextual_events_df = contextual_events_df.reindex(
+        columns=_keyed(["symbol", "date", "event", "prior_regime"], contextual_events_df)
+    )
+    contextual_eval_df = contextual_events_df.copy()
+    if not contextual_eval_df.empty:
+        contextual_eval_df["event"] = (
+            contextual_eval_df["event"].astype(str)
+            + "_after_"
+            + contextual_eval_df["prior_regime"].astype(str)
+        )
+        contextual_eval_df["detector"] = "contextual_event"
+    stages["contextual"] = (contextual_events_df, contextual_eval_df)
+    return stages
+
+
+def _symbol_stages(
+    bars: SymbolBars,
+    events_by_detector: Dict[str, pd.DataFrame],
+    settings: Dict[str, object],
+) -> Dict[str, pd.DataFrame]:
+    """Fused per-symbol stages: regime labels plus each benchmark family's events and forward returns."""
+    forward_windows = settings["forward_windows"]
+    artifacts: Dict[str, pd.DataFrame] = {}
+    for stage, (events, eval_events) in _stage_events(bars, events_by_detector, settings).items():
+        if stage == "regime":
+            daily_fwd = add_forward_returns_daily(bars, forward_windows)
+            artifacts["stages/regime/daily"] = events
+            artifacts["stages/regime/partials"] = regime_partials(
+                events, daily_fwd, settings["quantile_accuracy"]
+            )
             continue
+        artifacts[f"stages/{stage}/events"] = events
+        if not eval_events.empty:
+            # Every family reads rows of the symbol's cached forward-return matrix.
+            artifacts[f"stages/{stage}/forward"] = add_forward_returns(eval_events, bars, forward_windows)
+    return artifacts
+
+
+def _prime_features(
+    detectors: List[Tuple[str, DetectorFn]],
+    bars_list: List[Optional[SymbolBars]],
+    feature_store: Optional[FeatureStore] = None,
+) -> None:
+    """Batch detectors' rolling features across symbols (or load them from the store) before running them one by one."""
+    columns: Dict[str, List[str]] = {}
+    for name in detector_order(name for name, _ in detectors):
+        for feature_set, needed in DETECTOR_FEATURES.get(name, {}).items():
+            wanted = columns.setdefault(feature_set, [])
+            wanted.extend(column for column in needed if column not in wanted)
+    for feature_set, wanted in columns.items():
+        FEATURE_SETS[feature_set](bars_list, store=feature_store, columns=tuple(wanted))
+
+
+def _run_symbol(
+    load_bars: Callable[[], Optional[SymbolBars]],
+    detectors: List[Tuple[str, DetectorFn]],
+    cfg: dict,
+    settings: Dict[str, object],
+    result_cache: Optional[ResultCache] = None,
+    data_fingerprint: Optional[str] = None,
+) -> Tuple[float, Dict[str, pd.DataFrame]]:
+    """
+    One symbol's whole job: detectors, forward returns and the fused stages.
+
+    Returns years covered and the non-empty output frames keyed by artifact
+    name (`detectors/<name>/events`, `stages/regime/daily`, ...), each of
+    which becomes one merged result file.
+    """
+    loaded: List[Optional[SymbolBars]] = []
+
+    def load_once() -> Optional[SymbolBars]:
+        if not loaded:
+            loaded.append(load_bars())
+        return loaded[0]
+
+    years_covered, events_list, forward_list = _detect_symbol(
+        load_once, detectors, cfg, result_cache, data_fingerprint
+    )
+    artifacts: Dict[str, pd.DataFrame] = {}
+    events_by_detector: Dict[str, pd.DataFrame] = {}
+    for events in events_list:
+        events_by_detector[events["detector"].iloc[0]] = events
+        artifacts[f"detectors/{events['detector'].iloc[0]}/events"] = events
+    for forward in forward_list:
+        artifacts[f"detectors/{forward['detector'].iloc[0]}/forward"] = forward
+    # Detectors that ran but found nothing still feed the stages an empty frame.
+    for detector_name, _ in detectors:
+        events_by_detector.setdefault(detector_name, None)
+
+    bars = load_once()
+    if bars is not None and not bars.empty:
+        artifacts.update(_symbol_stages(bars, events_by_detector, settings))
+    # Integer event keys are internal to the per-symbol job; results keep `date` only.
+    return years_covered, {
+        name: df.drop(columns=[c for c in EVENT_INDEX_COLUMNS if c in df.columns])
+        for name, df in artifacts.items()
+        if not df.empty
+    }
 
-        forward_parts.append(add_forward_returns(symbol_events, price_df, forward_windows))
 
-    if not forward_parts:
-        return pd.DataFrame(columns=list(events_df.columns) + [f"fwd_{w}" for w in forward_windows])
+def _read_ahead(
+    symbols: Iterable[str],
+    load: Callable[[str], object],
+    threads: int,
+    depth: int,
+) -> Iterator[Tuple[str, object]]:
+    """
+    Yield `(symbol, load(symbol))` in order while up to `depth` upcoming
+    symbols load on a small thread pool.
+
+    pyarrow decoding and hashing release the GIL, so the caller's compute
+    overlaps with the next symbols' I/O. `threads <= 0` loads inline.
+    """
+    if threads <= 0:
+        for symbol in symbols:
+            yield symbol, load(symbol)
+        return
+
+    pending: deque = deque()
+    remaining = iter(symbols)
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="read-ahead") as pool:
+        for symbol in remaining:
+            pending.append((symbol, pool.submit(load, symbol)))
+            if len(pending) >= max(1, depth):
+                break
+        while pending:
+            symbol, future = pending.popleft()
+            upcoming = next(remaining, None)
+            if upcoming is not None:
+                pending.append((upcoming, pool.submit(load, upcoming)))
+            yield symbol, future.result()
+
+
+def _init_worker(
+    ohlcv_path: str,
+    lookback_days: int,
+    cfg: dict,
+    detector_names: List[str],
+    bar_cache_dir: Optional[str] = None,
+    result_cache_dir: Optional[str] = None,
+    shard_dir: Optional[str] = None,
+    feature_store_dir: Optional[str] = None,
+) -> None:
+    """Process pool initializer: ship config and resolve detectors/caches once per worker."""
+    _WORKER_STATE.clear()
+    _WORKER_STATE.update(
+        shard_dir=shard_dir,
+        ohlcv_path=ohlcv_path,
+        lookback_days=lookback_days,
+        cfg=cfg,
+        settings=_stage_settings(cfg),
+        detectors=[(name, DETECTORS[name]) for name in detector_names],
+        # Workers only populate the shared spill; the parent owns the LRU.
+        bar_cache=(
+            BarCache(ohlcv_path, lookback_days, spill_dir=bar_cache_dir, max_bytes=0)
+            if bar_cache_dir is not None
+            else None
+        ),
+        result_cache=ResultCache(result_cache_dir) if result_cache_dir is not None else None,
+        feature_store=FeatureStore(feature_store_dir) if feature_store_dir is not None else None,
+    )
+
 
-    return pd.concat(forward_parts, ignore_index=True)
+def _process_batch(
+    batch: List[Tuple[str, Optional[str]]],
+) -> Tuple[Dict[str, float], Dict[str, pd.DataFrame]]:
+    """
+    Run the whole per-symbol job over a batch of `(symbol, data_fingerprint)` in a pool worker.
+
+    Returns years covered per symbol plus one concatenated frame per
+    artifact, so results leave the worker once per batch instead of once
+    per symbol.
+    """
+    state = _WORKER_STATE
+    ohlcv_path = state["ohlcv_path"]
+    bar_cache = state["bar_cache"]
+    result_cache = state["result_cache"]
+
+    def load(symbol: str) -> Optional[SymbolBars]:
+        if bar_cache is not None:
+            return bar_cache.get(symbol)
+        return _io.read_symbol_bars(symbol, ohlcv_path, state["lookback_days"])
+
+    # The fused stages need every symbol's bars anyway, so load the batch up
+    # front and compute detector features for all of it in one pass.
+    bars_by_symbol = {symbol: load(symbol) for symbol, _ in batch}
+    _prime_features(state["detectors"], list(bars_by_symbol.values()), state.get("feature_store"))
+
+    years_by_symbol: Dict[str, float] = {}
+    parts: Dict[str, List[pd.DataFrame]] = defaultdict(list)
+    for symbol, data_fingerprint in batch:
+        if result_cache is not None and data_fingerprint is None:
+            data_fingerprint = _io.symbol_data_fingerprint(symbol, ohlcv_path)
+        bars = bars_by_symbol[symbol]
+        years_covered, artifacts = _run_symbol(
+            lambda: bars, state["detectors"], state["cfg"], state["settings"], result_cache, data_fingerprint
+        )
+        years_by_symbol[symbol] = years_covered
+        for name, df in artifacts.items():
+            parts[name].append(df)
+
+    return years_by_symbol, {name: pd.concat(frames, ignore_index=True) for name, frames in parts.items()}
+
+
+def _shard_path(shard_dir: str, artifact: str, index: int) -> Path:
+    return Path(shard_dir) / f"{artifact}-{index:06d}.parquet"
+
+
+def _write_batch_shards(shard_index: int, batch: List[Tuple[str, Optional[str]]]) -> Dict[str, float]:
+    """Pool task: run a batch and write each artifact as a symbol-sorted shard under the worker's shard dir."""
+    years_by_symbol, artifacts = _process_batch(batch)
+    shard_dir = _WORKER_STATE["shard_dir"]
+    for name, df in artifacts.items():
+        with _io.ParquetSink(_shard_path(shard_dir, name, shard_index)) as sink:
+            sink.write(df)
+    return years_by_symbol
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    chunk: list = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _batched(
+    ready_symbols: Iterable[Tuple[str, Tuple[Optional[str], Optional[SymbolBars]]]],
+    batch_rows: int,
+    max_batch_symbols: int,
+) -> Iterator[List[Tuple[str, Optional[str]]]]:
+    """Group read-ahead output into `(symbol, fingerprint)` batches of roughly `batch_rows` bars."""
+    batch: List[Tuple[str, Optional[str]]] = []
+    rows = 0
+    for symbol, (data_fingerprint, bars) in ready_symbols:
+        batch.append((symbol, data_fingerprint))
+        rows += len(bars) if bars is not None else 0
+        if rows >= batch_rows or len(batch) >= max_batch_symbols:
+            yield batch
+            batch, rows = [], 0
+    if batch:
+        yield batch
+
+
+# Columns of a benchmark family's events table when no symbol produced any.
+_EMPTY_STAGE_COLUMNS = {
+    "transition": ["symbol", "date", "transition", "prior_regime", "new_regime"],
+    "sequence": ["symbol", "date", "sequence_id"],
+    "contextual": ["symbol", "date", "event", "prior_regime"],
+}
+
+
+def _merge_artifact(
+    shard_dir: str,
+    artifact: str,
+    path: Path,
+    replaced_symbols: Optional[List[str]] = None,
+) -> None:
+    """Merge an artifact's shards into `path`; incremental runs splice them into the existing file."""
+    shards = sorted(Path(shard_dir).glob(f"{artifact}-*.parquet"))
+    if replaced_symbols is None:
+        _io.merge_shards(shards, path)
+        return
+    refresh_path = _refresh_path(path)
+    _io.merge_shards(shards, refresh_path)
+    _io.merge_results(path, refresh_path, replaced_symbols)
 
 
 def _write_benchmark_outputs(
-    events_df: pd.DataFrame,
-    eval_df: pd.DataFrame,
+    shard_dir: str,
     output_dir: Path,
     prefix: str,
-    symbols: List[str],
-    ohlcv_path: str,
-    lookback_days: int,
     forward_windows: List[int],
     coverage_years: float,
     bootstrap_ci_enabled: bool,
     bootstrap_resamples: int,
+    export_csv: bool,
+    replaced_symbols: Optional[List[str]] = None,
+    summary_accuracy: float = 0.0,
+    bootstrap_seed: int = 0,
+    bootstrap_workers: int = 1,
 ) -> None:
-    events_path = output_dir / f"{prefix}_events.csv"
-    forward_path = output_dir / f"{prefix}_forward_returns.csv"
+    """Merge one benchmark family's per-symbol shards and write its summary tables."""
+    events_path = output_dir / f"{prefix}_events.parquet"
+    forward_path = output_dir / f"{prefix}_forward_returns.parquet"
     summary_path = output_dir / f"{prefix}_summary.csv"
     comparison_path = output_dir / f"{prefix}_comparison.csv"
 
-    for p in [events_path, forward_path, summary_path, comparison_path]:
+    for p in [summary_path, comparison_path]:
         if p.exists():
             p.unlink()
 
-    events_df.to_csv(events_path, index=False)
+    _merge_artifact(shard_dir, f"stages/{prefix}/events", events_path, replaced_symbols)
+    _merge_artifact(shard_dir, f"stages/{prefix}/forward", forward_path, replaced_symbols)
+    if not events_path.exists():
+        _io.write_results(pd.DataFrame(columns=_EMPTY_STAGE_COLUMNS[prefix]), events_path)
+    if not forward_path.exists():
+        empty_columns = ["symbol", "date", "event", "detector"] + [f"fwd_{w}" for w in forward_windows]
+        _io.write_results(pd.DataFrame(columns=empty_columns), forward_path)
 
-    forward_df = _build_forward_returns_for_events(
-        eval_df, symbols, ohlcv_path, lookback_days, forward_windows
-    )
-    forward_df.to_csv(forward_path, index=False)
+    if export_csv:
+        _io.export_csv(events_path, events_path.with_suffix(".csv"))
+        _io.export_csv(forward_path, forward_path.with_suffix(".csv"))
 
+    forward_source = (
+        _io.ResultRowGroups(forward_path) if summary_accuracy else _io.read_results(forward_path)
+    )
     summary_df = summarize_forward_returns(
-        forward_df, coverage_years, bootstrap_ci_enabled, bootstrap_resamples
+        forward_source,
+        coverage_years,
+        bootstrap_ci_enabled,
+        bootstrap_resamples,
+        summary_accuracy,
+        bootstrap_seed,
+        bootstrap_workers,
     )
     summary_df.to_csv(summary_path, index=False)
 
@@ -168,7 +584,31 @@ def _write_benchmark_outputs(
     comparison_df.to_csv(comparison_path, index=False)
 
 
-def main() -> None:
+def _refresh_path(path: Path) -> Path:
+    """Side file an incremental run writes refreshed rows to before merging them into `path`."""
+    refresh_path = path.with_suffix(".refresh.parquet")
+    if refresh_path.exists():
+        refresh_path.unlink()
+    return refresh_path
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m harness.run")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="recompute every symbol instead of reusing the per-symbol result cache and feature store",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only recompute symbols whose data changed since the last incremental run",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
     repo_root = Path(__file__).resolve().parents[1]
     config_path = repo_root / "config" / "run_config.yaml"
     if not config_path.exists():
@@ -195,33 +635,52 @@ def main() -> None:
         contextual_output_value = str(repo_root / contextual_output_value)
     contextual_output_path = _io.ensure_output_path(contextual_output_value)
     lookback_days = int(cfg.get("lookback_days", 0))
-    forward_windows = cfg.get("forward_windows", [5, 10, 20, 40])
+    settings = _stage_settings(cfg)
+    forward_windows = settings["forward_windows"]
     sos_after_bc_lookback_days = int(cfg.get("sos_after_bc_lookback_days", 60))
-    transition_min_prior_bars = int(cfg.get("transition_min_prior_bars", 5))
-    sequence_max_gap_default = int(
-        cfg.get("sequence_max_gap_default", cfg.get("sequence_max_gap", 30))
-    )
-    sequence_max_gap_map = cfg.get("sequence_max_gap_map", {}) or {}
-    if not isinstance(sequence_max_gap_map, dict):
-        sequence_max_gap_map = {}
-    disabled_sequences = cfg.get("disabled_sequences", []) or []
-    if isinstance(disabled_sequences, str):
-        disabled_sequences = [disabled_sequences]
+    conditional_rules = [
+        (str(rule["event"]).upper(), str(rule["after"]).upper(), int(rule["within_days"]))
+        for rule in cfg.get("conditional_effects")
+        or [{"event": "SOS", "after": "BC", "within_days": sos_after_bc_lookback_days}]
+    ]
+    effect_events = [str(event).upper() for event in cfg.get("effect_events", DEFAULT_EFFECT_EVENTS)]
+    path_tolerance_days = int(cfg.get("path_dependency_tolerance_days", DEFAULT_PATH_TOLERANCE_DAYS))
     min_sequence_samples = int(cfg.get("min_sequence_samples", 50))
-    contextual_lookback = int(cfg.get("contextual_lookback", 1))
-    context_events = cfg.get("context_events", ["SOS", "SOW", "BC", "SPRING"])
-    if context_events is None:
-        context_events = ["SOS", "SOW", "BC", "SPRING"]
-    if isinstance(context_events, (str, bytes)):
-        context_events = [context_events]
-    context_events = [str(event).upper() for event in context_events]
     max_workers = int(cfg.get("workers", 8))
-    regime_benchmark = bool(cfg.get("regime_benchmark", True))
-    regime_detector = str(cfg.get("regime_detector", "baseline"))
+    read_ahead_threads = int(cfg.get("read_ahead_threads", DEFAULT_READ_AHEAD_THREADS))
+    read_ahead_depth = int(cfg.get("read_ahead_depth", 4 * max(1, read_ahead_threads)))
+    batch_rows = int(cfg.get("batch_rows", DEFAULT_BATCH_ROWS))
+    regime_benchmark = settings["regime_benchmark"]
+    regime_detector = settings["regime_detector"]
     regime_output_prefix = str(cfg.get("regime_output_prefix", "regime"))
     regime_baseline_regime = str(cfg.get("regime_baseline_regime", "UNKNOWN"))
     bootstrap_ci_enabled = bool(cfg.get("bootstrap_ci_enabled", False))
     bootstrap_resamples = int(cfg.get("bootstrap_resamples", 1000))
+    bootstrap_seed = int(cfg.get("bootstrap_seed", 0))
+    summary_accuracy = settings["quantile_accuracy"]
+    if "summary_quantile_accuracy" not in cfg and "regime_quantile_accuracy" in cfg:
+        logging.warning("regime_quantile_accuracy is deprecated; set summary_quantile_accuracy instead")
+    bar_cache_max_bytes = int(
+        float(cfg.get("bar_cache_max_mb", DEFAULT_MAX_BYTES / (1024 * 1024))) * 1024 * 1024
+    )
+    export_csv = bool(cfg.get("export_csv", True))
+    result_cache_enabled = bool(cfg.get("result_cache", True)) and not args.no_cache
+    result_cache_max_bytes = int(
+        float(cfg.get("result_cache_max_mb", RESULT_CACHE_MAX_BYTES / (1024 * 1024))) * 1024 * 1024
+    )
+    result_cache_dir = cfg.get("result_cache_dir", ".cache/results")
+    if not Path(result_cache_dir).is_absolute():
+        result_cache_dir = str(repo_root / result_cache_dir)
+    feature_store_enabled = bool(cfg.get("feature_store", True)) and not args.no_cache
+    feature_store_max_bytes = int(
+        float(cfg.get("feature_store_max_mb", FEATURE_STORE_MAX_BYTES / (1024 * 1024))) * 1024 * 1024
+    )
+    feature_store_dir = cfg.get("feature_store_dir", ".cache/features")
+    if not Path(feature_store_dir).is_absolute():
+        feature_store_dir = str(repo_root / feature_store_dir)
+    bar_cache_base_dir = cfg.get("bar_cache_dir")
+    if bar_cache_base_dir and not Path(bar_cache_base_dir).is_absolute():
+        bar_cache_base_dir = str(repo_root / bar_cache_base_dir)
 
     detectors = _resolve_detectors(cfg.get("detectors", ["baseline", "variant"]))
     symbols = _io.list_symbols(ohlcv_path)
@@ -230,27 +689,76 @@ def main() -> None:
         print(f"No symbols found under {ohlcv_path}")
         sys.exit(0)
 
+    detector_names = [name for name, _ in detectors]
+
+    # Incremental runs recompute only symbols whose source data changed and
+    # merge their rows into the outputs of the previous run.
+    refresh: Optional[RefreshManifest] = None
+    work_symbols = symbols
+    replaced_symbols: Optional[List[str]] = None
+    if args.incremental:
+        refresh = RefreshManifest.load(output_path, run_fingerprint(cfg, detector_names))
+        if refresh.valid:
+            work_symbols, removed_symbols = refresh.diff(symbols, ohlcv_path)
+            replaced_symbols = work_symbols + removed_symbols
+            refresh.drop(removed_symbols)
+            print(
+                f"[incremental] changed={len(work_symbols)} removed={len(removed_symbols)} "
+                f"unchanged={len(symbols) - len(work_symbols)}"
+            )
+        else:
+            RefreshManifest.discard(output_path)
+            print("[incremental] no manifest for this config; rebuilding every symbol")
+    else:
+        RefreshManifest.discard(output_path)
+    merging = replaced_symbols is not None
+
+    # One decode per symbol per run; every stage below reads through this cache.
+    # Only pool workers read the spill, so serial runs keep bars in the LRU alone.
+    bar_cache = BarCache(
+        ohlcv_path,
+        lookback_days,
+        max_bytes=bar_cache_max_bytes,
+        base_dir=bar_cache_base_dir,
+        spill=max_workers > 1,
+    )
+    result_cache = (
+        ResultCache(result_cache_dir, result_cache_max_bytes) if result_cache_enabled else None
+    )
+    feature_store = (
+        FeatureStore(feature_store_dir, feature_store_max_bytes) if feature_store_enabled else None
+    )
+
     # ------------------------------------------------------------------
     # Build per-detector output paths
     # ------------------------------------------------------------------
     paths: Dict[str, Dict[str, Path]] = {}
     for detector_name, _ in detectors:
         paths[detector_name] = {
-            "events": output_path / f"{detector_name}_events.csv",
-            "forward": output_path / f"{detector_name}_forward_returns.csv",
+            "events": output_path / f"{detector_name}_events.parquet",
+            "forward": output_path / f"{detector_name}_forward_returns.parquet",
+            "events_csv": output_path / f"{detector_name}_events.csv",
+            "forward_csv": output_path / f"{detector_name}_forward_returns.csv",
             "summary": output_path / f"{detector_name}_summary_by_detector.csv",
             "comparison": output_path / f"{detector_name}_comparison.csv",
         }
-        for p in paths[detector_name].values():
+        for key, p in paths[detector_name].items():
+            if merging and key in ("events", "forward"):
+                continue
             if p.exists():
                 p.unlink()
 
+    # Events and forward returns are written as symbol-sorted shards (one per
+    # pool batch, or a single one when serial) and k-way merged at the end,
+    # so output bytes do not depend on the worker count.
+    shard_dir = tempfile.TemporaryDirectory(prefix="wfb_shards_", dir=output_path)
+
     # ------------------------------------------------------------------
     # Baseline sanity check (unchanged behavior)
     # ------------------------------------------------------------------
     baseline_entry = next((fn for name, fn in detectors if name == "baseline"), None)
     sample_symbol = symbols[0]
-    sample_df = _io.read_symbol_data(sample_symbol, ohlcv_path, lookback_days)
+    sample_df = bar_cache.get(sample_symbol)
     if baseline_entry and sample_df is not None and not sample_df.empty:
         sample_events = baseline_entry(sample_df, cfg)
         unique_events = sorted(sample_events["event"].dropna().unique().tolist()) if not sample_events.empty else []
@@ -267,106 +775,118 @@ def main() -> None:
         )
 
     # ------------------------------------------------------------------
-    # Per-detector buffers
+    # Single pass: detectors plus the fused regime/benchmark stages
     # ------------------------------------------------------------------
-    events_buffers: Dict[str, List[pd.DataFrame]] = {name: [] for name, _ in detectors}
-    forward_buffers: Dict[str, List[pd.DataFrame]] = {name: [] for name, _ in detectors}
-
-    coverage_years = 0.0
+    years_by_symbol: Dict[str, float] = {}
     flush_every = 25
 
-    detector_names = [name for name, _ in detectors]
-
-    if max_workers <= 1:
-        for idx, symbol in enumerate(symbols, start=1):
-            df = _io.read_symbol_data(symbol, ohlcv_path, lookback_days)
-            if df is None or df.empty:
-                continue
-
-            coverage_years += _io.compute_years_covered(df)
-
-            for detector_name, detector_fn in detectors:
-                events = detector_fn(df, cfg)
-                if events.empty:
-                    continue
+    def read_symbol(symbol: str) -> Tuple[Optional[str], Optional[SymbolBars]]:
+        # Runs on read-ahead threads. With a pool the parent only fills the
+        # spill for workers; serially the bars are used here, through the LRU.
+        data_fingerprint = (
+            _io.symbol_data_fingerprint(symbol, ohlcv_path) if result_cache is not None else None
+        )
+        if max_workers > 1:
+            return data_fingerprint, bar_cache.load(symbol)
+        return data_fingerprint, bar_cache.get(symbol)
 
-                events["detector"] = detector_name
-                forward = add_forward_returns(events, df, forward_windows)
-                forward["detector"] = detector_name
+    ready_symbols = _read_ahead(work_symbols, read_symbol, read_ahead_threads, read_ahead_depth)
 
-                events_buffers[detector_name].append(events)
-                forward_buffers[detector_name].append(forward)
+    if max_workers <= 1:
+        buffers: Dict[str, List[pd.DataFrame]] = defaultdict(list)
+        sinks: Dict[str, _io.ParquetSink] = {}
+        idx = 0
+        for chunk in _chunked(ready_symbols, flush_every):
+            _prime_features(detectors, [bars for _, (_, bars) in chunk], feature_store)
+            for symbol, (data_fingerprint, bars) in chunk:
+                idx += 1
+                years_covered, artifacts = _run_symbol(
+                    lambda: bars, detectors, cfg, settings, result_cache, data_fingerprint
+                )
+                years_by_symbol[symbol] = years_covered
+                for name, df in artifacts.items():
+                    buffers[name].append(df)
 
             if idx % flush_every == 0:
-                for detector_name, _ in detectors:
-                    _flush_buffers(
-                        events_buffers[detector_name],
-                        forward_buffers[detector_name],
-                        paths[detector_name]["events"],
-                        paths[detector_name]["forward"],
-                    )
-                    events_buffers[detector_name].clear()
-                    forward_buffers[detector_name].clear()
-                print(f"Processed {idx}/{len(symbols)} symbols")
+                _flush_buffers(buffers, sinks, shard_dir.name)
+                print(f"Processed {idx}/{len(work_symbols)} symbols")
+
+        _flush_buffers(buffers, sinks, shard_dir.name)
+        for sink in sinks.values():
+            sink.close()
     else:
         processed = 0
-        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Keep several batches per worker so a slow batch cannot stall the pool.
+        max_batch_symbols = max(1, -(-len(work_symbols) // (max_workers * 4)))
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(
+                ohlcv_path,
+                lookback_days,
+                cfg,
+                detector_names,
+                bar_cache.spill_dir,
+                str(result_cache.cache_dir) if result_cache is not None else None,
+                shard_dir.name,
+                str(feature_store.cache_dir) if feature_store is not None else None,
+            ),
+        ) as executor:
+            # Batches are submitted as soon as read-ahead has spilled their bars,
+            # so workers memory-map decoded arrays instead of reading Parquet.
+            # Workers write their own shards; only years covered come back.
             futures = [
-                executor.submit(
-                    _process_symbol,
-                    symbol,
-                    ohlcv_path,
-                    lookback_days,
-                    cfg,
-                    detector_names,
+                executor.submit(_write_batch_shards, shard_index, batch)
+                for shard_index, batch in enumerate(
+                    _batched(ready_symbols, batch_rows, max_batch_symbols)
                 )
-                for symbol in symbols
             ]
 
-            with tqdm(total=len(futures), desc="Processing symbols", unit="symbol") as pbar:
+            with tqdm(total=len(work_symbols), desc="Processing symbols", unit="symbol") as pbar:
                 for fut in as_completed(futures):
-                    symbol, years_covered, events_list, forward_list = fut.result()
-                    pbar.update(1)
-
-                    processed += 1
-                    coverage_years += years_covered
-
-                    if not events_list and not forward_list:
-                        continue
-
-                    for events in events_list:
-                        events_buffers[events["detector"].iloc[0]].append(events)
-
-                    for forward in forward_list:
-                        forward_buffers[forward["detector"].iloc[0]].append(forward)
-
-                    if processed % flush_every == 0:
-                        for detector_name, _ in detectors:
-                            _flush_buffers(
-                                events_buffers[detector_name],
-                                forward_buffers[detector_name],
-                                paths[detector_name]["events"],
-                                paths[detector_name]["forward"],
-                            )
-                            events_buffers[detector_name].clear()
-                            forward_buffers[detector_name].clear()
-                        print(f"Processed {processed}/{len(symbols)} symbols")
-
-    # Final flush
+                    batch_years = fut.result()
+                    pbar.update(len(batch_years))
+                    processed += len(batch_years)
+                    years_by_symbol.update(batch_years)
+        print(f"Processed {processed}/{len(work_symbols)} symbols")
+
+    # Final merge
     for detector_name, _ in detectors:
-        _flush_buffers(
-            events_buffers[detector_name],
-            forward_buffers[detector_name],
-            paths[detector_name]["events"],
-            paths[detector_name]["forward"],
-        )
+        for kind in ("events", "forward"):
+            _merge_artifact(
+                shard_dir.name,
+                f"detectors/{detector_name}/{kind}",
+                paths[detector_name][kind],
+                replaced_symbols,
+            )
+        if export_csv:
+            _io.export_csv(paths[detector_name]["events"], paths[detector_name]["events_csv"])
+            _io.export_csv(paths[detector_name]["forward"], paths[detector_name]["forward_csv"])
+
+    if result_cache is not None:
+        evicted = result_cache.evict()
+        if evicted:
+            print(f"[result cache] evicted {evicted} entries over the size limit")
+    if feature_store is not None:
+        evicted = feature_store.evict()
+        if evicted:
+            print(f"[feature store] evicted {evicted} entries over the size limit")
+
+    if refresh is not None:
+        for symbol in work_symbols:
+            refresh.record(symbol, ohlcv_path, years_by_symbol.get(symbol, 0.0))
+        coverage_years = refresh.coverage_years(symbols)
+    else:
+        coverage_years = sum(years_by_symbol.get(symbol, 0.0) for symbol in work_symbols)
 
     # ------------------------------------------------------------------
     # Summaries per detector
     # ------------------------------------------------------------------
-    baseline_forward_df = None
+    forward_columns = ["symbol", "date", "event", "detector"] + [
+        f"fwd_{w}" for w in sorted({int(w) for w in forward_windows})
+    ]
+    baseline_forward_source = None
     for detector_name, _ in detectors:
-        events_path = paths[detector_name]["events"]
         forward_path = paths[detector_name]["forward"]
         summary_path = paths[detector_name]["summary"]
         comparison_path = paths[detector_name]["comparison"]
@@ -374,37 +894,60 @@ def main() -> None:
         if not forward_path.exists():
             continue
 
-        forward_df = pd.read_csv(forward_path, parse_dates=["date"])
+        # Sketch mode streams the file; exact mode reads it once and reuses it.
+        if summary_accuracy:
+            forward_source = _io.ResultRowGroups(forward_path, forward_columns)
+        else:
+            forward_source = _io.read_results(forward_path, forward_columns)
         if detector_name == "baseline":
-            baseline_forward_df = forward_df
+            baseline_forward_source = forward_source
         summary_df = summarize_forward_returns(
-            forward_df, coverage_years, bootstrap_ci_enabled, bootstrap_resamples
+            forward_source,
+            coverage_years,
+            bootstrap_ci_enabled,
+            bootstrap_resamples,
+            summary_accuracy,
+            bootstrap_seed,
+            max_workers,
         )
         summary_df.to_csv(summary_path, index=False)
 
         comparison_df = build_comparison_table(summary_df)
         comparison_df.to_csv(comparison_path, index=False)
 
-    if baseline_forward_df is not None:
-        bc_effect_df = evaluate_bc_effect(baseline_forward_df, forward_windows)
+    if baseline_forward_source is not None:
+        # One grouped pass answers BC plus every configured effect event.
+        effects_df = evaluate_event_effects(
+            baseline_forward_source, forward_windows, ["BC", *effect_events], summary_accuracy
+        )
+        bc_effect_df = bc_effect_table(effects_df[effects_df["event"] == "BC"])
         bc_effect_df.to_csv(output_path / "bc_effect_summary.csv", index=False)
 
-        ar_effect_df = evaluate_event_effect(baseline_forward_df, forward_windows, "AR")
-        ar_top_effect_df = evaluate_event_effect(baseline_forward_df, forward_windows, "AR_TOP")
-        sow_effect_df = evaluate_event_effect(baseline_forward_df, forward_windows, "SOW")
-        sos_effect_df = evaluate_event_effect(baseline_forward_df, forward_windows, "SOS")
-        sos_after_bc_effect_df = evaluate_sos_after_bc_effect(
-            baseline_forward_df, forward_windows, sos_after_bc_lookback_days
+        # "A within N days after B" matching needs each symbol's events, so it reads the table.
+        baseline_forward_df = (
+            _io.read_results(paths["baseline"]["forward"], forward_columns)
+            if summary_accuracy
+            else baseline_forward_source
+        )
+        conditional_df = evaluate_conditional_effects(
+            baseline_forward_df, forward_windows, conditional_rules, summary_accuracy
         )
 
-        ar_effect_df.to_csv(output_path / "ar_effect_summary.csv", index=False)
-        ar_top_effect_df.to_csv(output_path / "ar_top_effect_summary.csv", index=False)
-        sow_effect_df.to_csv(output_path / "sow_effect_summary.csv", index=False)
-        sos_effect_df.to_csv(output_path / "sos_effect_summary.csv", index=False)
-        sos_after_bc_effect_df.to_csv(output_path / "sos_after_bc_effect_summary.csv", index=False)
+        effect_frames = []
+        for event_name in effect_events:
+            effect_df = effects_df[effects_df["event"] == event_name].reset_index(drop=True)
+            effect_df.to_csv(output_path / f"{event_name.lower()}_effect_summary.csv", index=False)
+            effect_frames.append(effect_df)
+        for event_name, after_name, lookback in conditional_rules:
+            label = f"{event_name}_AFTER_{after_name}"
+            rule_df = conditional_df[
+                (conditional_df["event"] == label) & (conditional_df["lookback_days"] == lookback)
+            ].reset_index(drop=True)
+            rule_df.to_csv(output_path / f"{label.lower()}_effect_summary.csv", index=False)
+            effect_frames.append(rule_df)
 
         combined = pd.concat(
-            [ar_effect_df, ar_top_effect_df, sow_effect_df, sos_effect_df, sos_after_bc_effect_df],
+            effect_frames,
             ignore_index=True,
             sort=False,
         )
@@ -414,70 +957,46 @@ def main() -> None:
         baseline_events_path = paths["baseline"]["events"]
         incremental_events_path = paths["incremental_baseline"]["events"]
         if baseline_events_path.exists() and incremental_events_path.exists():
-            baseline_events = pd.read_csv(baseline_events_path)
-            incremental_events = pd.read_csv(incremental_events_path)
-            path_dep_summary = evaluate_path_dependency(baseline_events, incremental_events)
+            baseline_events = _io.read_results(baseline_events_path, ["symbol", "event", "date"])
+            incremental_events = _io.read_results(incremental_events_path, ["symbol", "event", "date"])
+            path_dep_summary = evaluate_path_dependency(
+                baseline_events, incremental_events, path_tolerance_days
+            )
             path_dep_summary.to_csv(output_path / "path_dependency_summary.csv", index=False)
             print("[path-dependency] incremental benchmark completed.")
 
+    regime_daily_path = output_path / f"{regime_detector}_{regime_output_prefix}s_daily.parquet"
     if regime_benchmark:
-        events_path = output_path / f"{regime_detector}_events.csv"
-        events_df = None
-        if events_path.exists():
-            events_df = pd.read_csv(events_path, parse_dates=["date"])
-        else:
-            fallback_path = output_path / "events.csv"
-            if fallback_path.exists():
-                events_df = pd.read_csv(fallback_path, parse_dates=["date"])
-                if "detector" in events_df.columns:
-                    events_df = events_df[events_df["detector"] == regime_detector]
-
-        if events_df is None:
+        if regime_detector not in detector_names:
             print(f"[regime] No events file found for detector '{regime_detector}'. Skipping regime benchmark.")
         else:
-            events_df = events_df[["symbol", "date", "event"]].copy() if not events_df.empty else events_df
-            events_by_symbol = {
-                symbol: group[["date", "event"]].copy()
-                for symbol, group in events_df.groupby("symbol", sort=False)
-            }
-
-            regime_daily_path = output_path / f"{regime_detector}_{regime_output_prefix}s_daily.csv"
+            regime_daily_csv_path = regime_daily_path.with_suffix(".csv")
             regime_summary_path = output_path / f"{regime_detector}_{regime_output_prefix}_summary.csv"
             regime_pairwise_path = output_path / f"{regime_detector}_{regime_output_prefix}_pairwise.csv"
 
-            for p in [regime_daily_path, regime_summary_path, regime_pairwise_path]:
+            for p in [regime_daily_csv_path, regime_summary_path, regime_pairwise_path]:
                 if p.exists():
                     p.unlink()
-
-            regime_daily_buffer: List[pd.DataFrame] = []
-            merged_buffers: List[pd.DataFrame] = []
-
-            for idx, symbol in enumerate(symbols, start=1):
-                price_df = _io.read_symbol_data(symbol, ohlcv_path, lookback_days)
-                if price_df is None or price_df.empty:
-                    continue
-
-                symbol_events = events_by_symbol.get(symbol, pd.DataFrame(columns=["date", "event"]))
-                regime_daily = classify_regime_daily(price_df, symbol_events)
-                daily_fwd = add_forward_returns_daily(price_df, forward_windows)
-
-                regime_daily_buffer.append(regime_daily)
-                merged_buffers.append(
-                    regime_daily.merge(daily_fwd, on=["symbol", "date"], how="inner")
+            _merge_artifact(shard_dir.name, "stages/regime/daily", regime_daily_path, replaced_symbols)
+            if export_csv:
+                _io.export_csv(regime_daily_path, regime_daily_csv_path)
+
+            # Per-symbol regime x forward-return aggregates are merged in
+            # symbol order and folded into the summary one row group at a
+            # time. Incremental runs keep them so unchanged symbols are not
+            # reclassified.
+            if refresh is not None:
+                regime_partials_path = (
+                    refresh.state_dir / f"{regime_detector}_{regime_output_prefix}_partials.parquet"
                 )
-
-                if idx % flush_every == 0:
-                    _io.append_to_csv(pd.concat(regime_daily_buffer, ignore_index=True), regime_daily_path)
-                    regime_daily_buffer.clear()
-
-            if regime_daily_buffer:
-                _io.append_to_csv(pd.concat(regime_daily_buffer, ignore_index=True), regime_daily_path)
-
-            if merged_buffers:
-                merged_all = pd.concat(merged_buffers, ignore_index=True)
-                regime_daily_all = merged_all[["symbol", "date", "regime"]]
-                daily_fwd_all = merged_all.drop(columns=["regime"])
-                regime_summary_df = summarize_regimes(regime_daily_all, daily_fwd_all)
+            else:
+                regime_partials_path = Path(shard_dir.name) / "regime_partials.parquet"
+            _merge_artifact(
+                shard_dir.name, "stages/regime/partials", regime_partials_path, replaced_symbols
+            )
+
+            if regime_partials_path.exists():
+                regime_summary_df = summarize_regime_partials(_io.iter_results(regime_partials_path))
                 regime_summary_df.to_csv(regime_summary_path, index=False)
 
                 pairwise_df = pairwise_vs_baseline(regime_summary_df, regime_baseline_regime)
@@ -486,62 +1005,34 @@ def main() -> None:
     # ------------------------------------------------------------------
     # Transition/sequence/context benchmarks (additive)
     # ------------------------------------------------------------------
-    baseline_events_path = output_path / "baseline_events.csv"
-    baseline_events_df = _read_csv_or_empty(
-        baseline_events_path, ["symbol", "date", "event"]
-    )
-    if not baseline_events_path.exists():
+    if not (output_path / "baseline_events.parquet").exists():
         print("[extra benchmarks] baseline events file missing; outputs will be empty.")
-
-    regime_daily_path = output_path / f"{regime_detector}_{regime_output_prefix}s_daily.csv"
-    regime_daily_df = _read_csv_or_empty(
-        regime_daily_path, ["symbol", "date", "regime"]
-    )
     if not regime_daily_path.exists():
         print("[extra benchmarks] regime daily file missing; outputs will be empty.")
 
-    transition_events_df = label_regime_transitions(
-        regime_daily_df, transition_min_prior_bars
-    )
-    transition_eval_df = transition_events_df.copy()
-    if transition_eval_df.empty:
-        transition_eval_df = pd.DataFrame(
-            columns=["symbol", "date", "event", "detector"]
+    for prefix, benchmark_output_path in [
+        ("transition", transition_output_path),
+        ("sequence", sequence_output_path),
+        ("contextual", contextual_output_path),
+    ]:
+        _write_benchmark_outputs(
+            shard_dir.name,
+            benchmark_output_path,
+            prefix,
+            forward_windows,
+            coverage_years,
+            bootstrap_ci_enabled,
+            bootstrap_resamples,
+            export_csv,
+            replaced_symbols,
+            summary_accuracy,
+            bootstrap_seed,
+            max_workers,
         )
-    else:
-        transition_eval_df["event"] = transition_eval_df["transition"]
-        transition_eval_df["detector"] = "transition"
 
-    _write_benchmark_outputs(
-        transition_events_df,
-        transition_eval_df,
-        transition_output_path,
-        "transition",
-        symbols,
-        ohlcv_path,
-        lookback_days,
-        forward_windows,
-        coverage_years,
-        bootstrap_ci_enabled,
-        bootstrap_resamples,
-    )
-
-    sequence_events_df = label_event_sequences(
-        baseline_events_df,
-        sequence_max_gap_default,
-        sequence_max_gap_map,
-        disabled_sequences,
-    )
-    sequence_eval_df = sequence_events_df.copy()
-    if sequence_eval_df.empty:
-        sequence_eval_df = pd.DataFrame(
-            columns=["symbol", "date", "event", "detector"]
-        )
-    else:
-        sequence_eval_df["event"] = sequence_eval_df["sequence_id"]
-        sequence_eval_df["detector"] = "sequence"
-        sequence_counts = sequence_eval_df["event"].value_counts()
-        for seq_id, count in sequence_counts.items():
+    sequence_ids = _io.read_results(sequence_output_path / "sequence_events.parquet", ["sequence_id"])
+    if sequence_ids is not None and not sequence_ids.empty:
+        for seq_id, count in sequence_ids["sequence_id"].value_counts().items():
             if count < min_sequence_samples:
                 logging.warning(
                     "Low sample sequence: %s (%s events, min=%s)",
@@ -550,70 +1041,11 @@ def main() -> None:
                     min_sequence_samples,
                 )
 
-    _write_benchmark_outputs(
-        sequence_events_df,
-        sequence_eval_df,
-        sequence_output_path,
-        "sequence",
-        symbols,
-        ohlcv_path,
-        lookback_days,
-        forward_windows,
-        coverage_years,
-        bootstrap_ci_enabled,
-        bootstrap_resamples,
-    )
-
-    contextual_events_df = attach_prior_regime(
-        baseline_events_df, regime_daily_df, contextual_lookback, context_events
-    )
-    contextual_events_df = contextual_events_df[
-        contextual_events_df["event"].isin(context_events)
-    ].copy()
-    contextual_events_df = contextual_events_df.dropna(subset=["prior_regime"])
-    if not contextual_events_df.empty:
-        contextual_events_df["event"] = (
-            contextual_events_df["event"].astype(str).str.upper()
-        )
-        contextual_events_df["prior_regime"] = (
-            contextual_events_df["prior_regime"].astype(str).str.upper()
-        )
-        allowed_regimes = {"ACCUMULATION", "MARKUP", "DISTRIBUTION", "MARKDOWN"}
-        contextual_events_df = contextual_events_df[
-            contextual_events_df["prior_regime"].isin(allowed_regimes)
-        ]
-    contextual_events_df = contextual_events_df.reindex(
-        columns=["symbol", "date", "event", "prior_regime"]
-    )
-
-    contextual_eval_df = contextual_events_df.copy()
-    if contextual_eval_df.empty:
-        contextual_eval_df = pd.DataFrame(
-            columns=["symbol", "date", "event", "detector"]
-        )
-    else:
-        contextual_eval_df["event"] = (
-            contextual_eval_df["event"].astype(str)
-            + "_after_"
-            + contextual_eval_df["prior_regime"].astype(str)
-        )
-        contextual_eval_df["detector"] = "contextual_event"
-
-    _write_benchmark_outputs(
-        contextual_events_df,
-        contextual_eval_df,
-        contextual_output_path,
-        "contextual",
-        symbols,
-        ohlcv_path,
-        lookback_days,
-        forward_windows,
-        coverage_years,
-        bootstrap_ci_enabled,
-        bootstrap_resamples,
-    )
-
-    print(f"Processed {len(symbols)} symbols. Outputs written to {output_path}")
+    shard_dir.cleanup()
+    if refresh is not None:
+        refresh.save()
+    bar_cache.close()
+    print(f"Processed {len(work_symbols)} symbols. Outputs written to {output_path}")
 
 
 if __name__ == "__main__":
@@ -2,8 +2,11 @@ from __future__ import annotations
 
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from harness.bars import day_numbers_to_datetime, to_day_numbers
+
 
 _SEQUENCES = {
     "SEQ_ACCUM_BREAKOUT": ["SC", "AR", "SPRING", "SOS"],
@@ -15,7 +18,7 @@ _SEQUENCES = {
 
 
 def _find_sequence_positions(
-    events: List[Tuple[pd.Timestamp, str]], pattern: List[str], max_gap: int
+    events: List[Tuple[int, str]], pattern: List[str], max_gap: int
 ) -> List[int]:
     positions: List[int] = []
     i = 0
@@ -36,7 +39,7 @@ def _find_sequence_positions(
             if j >= len(events):
                 valid = False
                 break
-            if (events[j][0] - start_date).days > max_gap:
+            if events[j][0] - start_date > max_gap:
                 valid = False
                 break
             current_idx = j
@@ -51,7 +54,7 @@ def _find_sequence_positions(
 
 
 def _find_failed_accum_positions(
-    events: List[Tuple[pd.Timestamp, str]], max_gap: int
+    events: List[Tuple[int, str]], max_gap: int
 ) -> List[int]:
     positions: List[int] = []
     i = 0
@@ -68,7 +71,7 @@ def _find_failed_accum_positions(
             if events[j][1] == "AR":
                 ar_idx = j
                 break
-        if ar_idx is None or (events[ar_idx][0] - start_date).days > max_gap:
+        if ar_idx is None or events[ar_idx][0] - start_date > max_gap:
             i += 1
             continue
 
@@ -77,13 +80,13 @@ def _find_failed_accum_positions(
             if events[j][1] == "SPRING":
                 spring_idx = j
                 break
-        if spring_idx is None or (events[spring_idx][0] - start_date).days > max_gap:
+        if spring_idx is None or events[spring_idx][0] - start_date > max_gap:
             i += 1
             continue
 
         has_sos = False
         for j in range(spring_idx + 1, len(events)):
-            if (events[j][0] - start_date).days > max_gap:
+            if events[j][0] - start_date > max_gap:
                 break
             if events[j][1] == "SOS":
                 has_sos = True
@@ -105,6 +108,10 @@ def label_event_sequences(
 ) -> pd.DataFrame:
     """
     Emits sequence completion events when ordered patterns occur within a rolling window.
+
+    Gaps are measured on the int64 `day` column when events carry one (dates
+    are parsed otherwise); `bar_index` and `day` are passed through to the
+    completing event.
     """
     columns = ["symbol", "date", "sequence_id"]
     if events_df is None or events_df.empty:
@@ -114,11 +121,13 @@ def label_event_sequences(
     if "symbol" not in data.columns or "date" not in data.columns or "event" not in data.columns:
         return pd.DataFrame(columns=columns)
 
-    data["date"] = pd.to_datetime(data["date"], errors="coerce")
-    data = data.dropna(subset=["date"])
+    if "day" not in data.columns:
+        data["day"] = to_day_numbers(data["date"])
+        data = data[data["day"] != np.iinfo(np.int64).min]
     data["event"] = data["event"].astype(str).str.upper()
     data["_order"] = range(len(data))
-    data = data.sort_values(["symbol", "date", "_order"]).reset_index(drop=True)
+    data = data.sort_values(["symbol", "day", "_order"]).reset_index(drop=True)
+    keys = [c for c in ("bar_index", "day") if c in data.columns]
 
     rows: List[dict] = []
 
@@ -129,7 +138,8 @@ def label_event_sequences(
     disabled = {str(seq).upper() for seq in (disabled_sequences or [])}
 
     for symbol, group in data.groupby("symbol", sort=False):
-        events = list(zip(group["date"].tolist(), group["event"].tolist()))
+        events = list(zip(group["day"].tolist(), group["event"].tolist()))
+        group_keys = group[keys].to_numpy(dtype=np.int64)
 
         for sequence_id, pattern in _SEQUENCES.items():
             if sequence_id in disabled:
@@ -141,16 +151,13 @@ def label_event_sequences(
                 positions = _find_sequence_positions(events, pattern, sequence_max_gap)
 
             for idx in positions:
-                rows.append(
-                    {
-                        "symbol": symbol,
-                        "date": events[idx][0],
-                        "sequence_id": sequence_id,
-                    }
-                )
+                row = {"symbol": symbol, "sequence_id": sequence_id}
+                row.update(zip(keys, group_keys[idx].tolist()))
+                rows.append(row)
 
     if not rows:
         return pd.DataFrame(columns=columns)
 
-    result = pd.DataFrame(rows, columns=columns)
+    result = pd.DataFrame(rows, columns=["symbol", "sequence_id", *keys])
+    result.insert(1, "date", day_numbers_to_datetime(result["day"].to_numpy()))
     return result.sort_values(["symbol", "date", "sequence_id"]).reset_index(drop=True)
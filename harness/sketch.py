@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import math
+from typing import Callable, List, Optional
+
+import numpy as np
+
+# Values closer to zero than this are counted in the zero bucket.
+MIN_MAGNITUDE = 1e-9
+
+
+def _linear_quantile(value_at: Callable[[int], float], n: int, q: float) -> float:
+    """numpy's default (`linear`) quantile of `n` sorted values read through `value_at`, bit for bit."""
+    virtual = (n - 1) * np.float64(q)
+    if virtual >= n - 1:
+        return float(value_at(n - 1))
+    if virtual < 0:
+        return float(value_at(0))
+    lo = int(np.floor(virtual))
+    a, b = np.float64(value_at(lo)), np.float64(value_at(lo + 1))
+    gamma = virtual - lo
+    diff = b - a
+    # numpy interpolates from the nearer end.
+    return float(b - diff * (1 - gamma) if gamma >= 0.5 else a + diff * gamma)
+
+
+def _select_excluding(values: np.ndarray, removed: np.ndarray, k: int) -> float:
+    """k-th smallest (0-based) of sorted `values` once the sorted sub-multiset `removed` is taken out."""
+    lo, hi = 0, values.shape[0] - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        x = values[mid]
+        kept = np.searchsorted(values, x, side="right") - np.searchsorted(removed, x, side="right")
+        if kept > k:
+            hi = mid
+        else:
+            lo = mid + 1
+    return float(values[lo])
+
+
+class _BucketStore:
+    """Dense counts over a growing range of log-bucket indices."""
+
+    __slots__ = ("offset", "counts")
+
+    def __init__(self) -> None:
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, keys: np.ndarray, counts: np.ndarray) -> None:
+        if keys.size == 0:
+            return
+        lo, hi = int(keys.min()), int(keys.max())
+        if self.counts.size == 0:
+            self.offset = lo
+            self.counts = np.zeros(hi - lo + 1, dtype=np.int64)
+        elif lo < self.offset or hi >= self.offset + self.counts.size:
+            new_lo = min(lo, self.offset)
+            new_hi = max(hi, self.offset + self.counts.size - 1)
+            grown = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+            start = self.offset - new_lo
+            grown[start : start + self.counts.size] = self.counts
+            self.offset, self.counts = new_lo, grown
+        np.add.at(self.counts, keys - self.offset, counts)
+
+    def sparse(self):
+        nonzero = np.flatnonzero(self.counts)
+        return (nonzero + self.offset).astype(np.int64), self.counts[nonzero]
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with a relative error bound (DDSketch-style).
+
+    Values are counted in logarithmic buckets of ratio
+    `gamma = (1 + a) / (1 - a)` for `a = relative_accuracy`, so every
+    quantile returned is within `a * |exact value|` of the exact value at
+    that rank (values with `|x| < MIN_MAGNITUDE` are treated as zero).
+    Merging adds bucket counts, so the result does not depend on merge
+    order. `relative_accuracy=0` keeps every value and answers exactly.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.0) -> None:
+        relative_accuracy = float(relative_accuracy)
+        if not 0.0 <= relative_accuracy < 1.0:
+            raise ValueError(f"relative_accuracy must be in [0, 1), got {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        self.count = 0
+        self._values: List[np.ndarray] = []
+        self._sorted: Optional[np.ndarray] = None
+        self._zero = 0
+        self._positive = _BucketStore()
+        self._negative = _BucketStore()
+        if self.exact:
+            self._gamma = self._log_gamma = 0.0
+        else:
+            self._gamma = (1.0 + relative_accuracy) / (1.0 - relative_accuracy)
+            self._log_gamma = math.log(self._gamma)
+
+    @property
+    def exact(self) -> bool:
+        return self.relative_accuracy == 0.0
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, relative_accuracy: float = 0.0) -> "QuantileSketch":
+        sketch = cls(relative_accuracy)
+        sketch.add(values)
+        return sketch
+
+    def _keys(self, magnitudes: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def add(self, values: np.ndarray) -> None:
+        """Add finite values; NaNs are ignored."""
+        values = np.asarray(values, dtype="float64").ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.count += int(values.size)
+        if self.exact:
+            self._values.append(values)
+            self._sorted = None
+            return
+        magnitudes = np.abs(values)
+        small = magnitudes < MIN_MAGNITUDE
+        self._zero += int(small.sum())
+        for store, mask in ((self._positive, values > 0), (self._negative, values < 0)):
+            keys, counts = np.unique(self._keys(magnitudes[mask & ~small]), return_counts=True)
+            store.add(keys, counts.astype(np.int64))
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self.count += other.count
+        if self.exact:
+            self._values.extend(other._values)
+            self._sorted = None
+            return
+        self._zero += other._zero
+        for mine, theirs in ((self._positive, other._positive), (self._negative, other._negative)):
+            mine.add(*theirs.sparse())
+
+    def _all_values(self) -> np.ndarray:
+        if len(self._values) > 1:
+            self._values = [np.concatenate(self._values)]
+        return self._values[0] if self._values else np.zeros(0)
+
+    def _sorted_values(self) -> np.ndarray:
+        if self._sorted is None:
+            self._sorted = np.sort(self._all_values())
+        return self._sorted
+
+    def without(self, part: "QuantileSketch") -> "QuantileSketch":
+        """
+        This sketch minus `part`, which must have been merged into it.
+
+        Approximate sketches subtract bucket counts. Exact ones keep a
+        reference to this sketch's sorted values and answer quantiles by
+        rank selection, so many complements of one total cost
+        O(log^2 n) per quantile instead of a copy of the population each.
+        Answers equal those of a sketch built from the remaining values.
+        """
+        if part.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot subtract sketches with different relative accuracy")
+        if self.exact:
+            return _ExactRemainder(self._sorted_values(), part._sorted_values())
+        remainder = QuantileSketch(self.relative_accuracy)
+        remainder.count = self.count - part.count
+        remainder._zero = self._zero - part._zero
+        for dest, mine, theirs in (
+            (remainder._positive, self._positive, part._positive),
+            (remainder._negative, self._negative, part._negative),
+        ):
+            dest.add(*mine.sparse())
+            keys, counts = theirs.sparse()
+            dest.add(keys, -counts)
+        return remainder
+
+    def values(self) -> np.ndarray:
+        """Every value added, in no particular order (exact sketches only)."""
+        if not self.exact:
+            raise ValueError("values() needs an exact sketch (relative_accuracy=0)")
+        return self._all_values()
+
+    def buckets(self):
+        """`(representative values, counts)` in ascending value order (approximate sketches only)."""
+        if self.exact:
+            raise ValueError("buckets() needs an approximate sketch (relative_accuracy > 0)")
+        neg_keys, neg_counts = self._negative.sparse()
+        pos_keys, pos_counts = self._positive.sparse()
+        # Most negative bucket first, then zero, then positives.
+        weights = 2.0 / (self._gamma + 1.0)
+        values = np.concatenate(
+            (
+                -np.exp(neg_keys[::-1] * self._log_gamma) * weights,
+                [0.0],
+                np.exp(pos_keys * self._log_gamma) * weights,
+            )
+        )
+        counts = np.concatenate((neg_counts[::-1], [self._zero], pos_counts))
+        return values, counts
+
+    def _value_at_ranks(self, ranks: np.ndarray) -> np.ndarray:
+        values, counts = self.buckets()
+        bucket = np.searchsorted(np.cumsum(counts), ranks, side="right")
+        return values[np.minimum(bucket, len(values) - 1)]
+
+    def quantile(self, q: float) -> float:
+        """Linearly interpolated quantile (numpy's default method); NaN when empty."""
+        if self.count == 0:
+            return float("nan")
+        if self.exact:
+            return float(np.quantile(self._all_values(), q))
+        rank = float(q) * (self.count - 1)
+        lo, hi = self._value_at_ranks(np.array([math.floor(rank), math.ceil(rank)]))
+        return float(lo + (hi - lo) * (rank - math.floor(rank)))
+
+    def median(self) -> float:
+        if self.count == 0:
+            return float("nan")
+        if self.exact:
+            return float(np.median(self._all_values()))
+        return self.quantile(0.5)
+
+    def to_bytes(self) -> bytes:
+        header = np.array([self.relative_accuracy], dtype="<f8").tobytes()
+        if self.exact:
+            return header + self._all_values().astype("<f8").tobytes()
+        neg_keys, neg_counts = self._negative.sparse()
+        pos_keys, pos_counts = self._positive.sparse()
+        sizes = np.array([self._zero, pos_keys.size, neg_keys.size], dtype="<i8")
+        arrays = (sizes, pos_keys, pos_counts, neg_keys, neg_counts)
+        return header + b"".join(np.asarray(a, dtype="<i8").tobytes() for a in arrays)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "QuantileSketch":
+        (relative_accuracy,) = np.frombuffer(payload, dtype="<f8", count=1)
+        sketch = cls(float(relative_accuracy))
+        body = payload[8:]
+        if sketch.exact:
+            sketch.add(np.frombuffer(body, dtype="<f8"))
+            return sketch
+        data = np.frombuffer(body, dtype="<i8")
+        zero, n_pos, n_neg = (int(v) for v in data[:3])
+        cursor = 3
+        parts: List[np.ndarray] = []
+        for size in (n_pos, n_pos, n_neg, n_neg):
+            parts.append(data[cursor : cursor + size])
+            cursor += size
+        sketch._zero = zero
+        sketch._positive.add(parts[0], parts[1])
+        sketch._negative.add(parts[2], parts[3])
+        sketch.count = zero + int(parts[1].sum()) + int(parts[3].sum())
+        return sketch
+
+
+class _ExactRemainder(QuantileSketch):
+    """Read-only exact sketch of `values` (sorted) minus the sub-multiset `removed` (sorted)."""
+
+    def __init__(self, values: np.ndarray, removed: np.ndarray) -> None:
+        super().__init__(0.0)
+        self.count = int(values.shape[0] - removed.shape[0])
+        self._total = values
+        self._removed = removed
+
+    def _at(self, rank: int) -> float:
+        return _select_excluding(self._total, self._removed, rank)
+
+    def add(self, values: np.ndarray) -> None:
+        raise TypeError("Sketch remainders are read-only")
+
+    def merge(self, other: "QuantileSketch") -> None:
+        raise TypeError("Sketch remainders are read-only")
+
+    def _all_values(self) -> np.ndarray:
+        # Drop one occurrence per removed value: repeats of a value take
+        # successive copies of it in `values`.
+        repeat = np.arange(self._removed.shape[0]) - np.searchsorted(self._removed, self._removed, side="left")
+        keep = np.ones(self._total.shape[0], dtype=bool)
+        keep[np.searchsorted(self._total, self._removed, side="left") + repeat] = False
+        return self._total[keep]
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return float("nan")
+        return _linear_quantile(self._at, self.count, q)
+
+    def median(self) -> float:
+        if self.count == 0:
+            return float("nan")
+        half = self.count // 2
+        if self.count % 2:
+            return self._at(half)
+        return float((np.float64(self._at(half - 1)) + np.float64(self._at(half))) / 2)
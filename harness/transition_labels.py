@@ -16,7 +16,8 @@ _ALLOWED_TRANSITIONS: List[Tuple[str, str]] = [
 def label_regime_transitions(regime_df: pd.DataFrame, min_prior_bars: int = 5) -> pd.DataFrame:
     """
     Input: per-symbol daily regime labels.
-    Output: sparse transition events on the first bar of a new regime.
+    Output: sparse transition events on the first bar of a new regime,
+    keeping the bar's `bar_index`/`day` when the labels carry them.
     """
     columns = ["symbol", "date", "transition", "prior_regime", "new_regime"]
     if regime_df is None or regime_df.empty:
@@ -30,6 +31,7 @@ def label_regime_transitions(regime_df: pd.DataFrame, min_prior_bars: int = 5) -
     data = data.dropna(subset=["date"])
     data["regime"] = data["regime"].astype(str).str.upper()
     data = data.sort_values(["symbol", "date"]).reset_index(drop=True)
+    keys = [c for c in ("bar_index", "day") if c in data.columns]
 
     min_prior_bars = max(1, int(min_prior_bars))
     transitions: List[dict] = []
@@ -62,10 +64,11 @@ def label_regime_transitions(regime_df: pd.DataFrame, min_prior_bars: int = 5) -
                         "transition": f"{prior_regime}->{current_regime}",
                         "prior_regime": prior_regime,
                         "new_regime": current_regime,
+                        **{key: getattr(row, key) for key in keys},
                     }
                 )
 
             prior_regime = current_regime
             prior_count = 1
 
-    return pd.DataFrame(transitions, columns=columns)
+    return pd.DataFrame(transitions, columns=columns + keys)
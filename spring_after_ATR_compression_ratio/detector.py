@@ -1,10 +1,17 @@
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, Optional
 
+import numpy as np
 import pandas as pd
 
-from baseline.adapter import run_baseline_structural
+from baseline.adapter import EVENT_COLUMNS, run_baseline_structural
+from harness.bars import BarsLike, SymbolBars, as_frame, bars_symbol
+from harness.features import atr_features, structural_features
+
+
+# Stored ATR features this detector reads.
+FEATURE_COLUMNS = ("atr_ratio",)
 
 
 def _compute_atr(df: pd.DataFrame, window: int) -> pd.Series:
@@ -26,36 +33,43 @@ def _compute_atr(df: pd.DataFrame, window: int) -> pd.Series:
     return tr.rolling(window=window, min_periods=window).mean()
 
 
-def spring_after_ATR_compression_ratio_detector(df: pd.DataFrame, cfg: Dict) -> pd.DataFrame:
+def spring_after_ATR_compression_ratio_detector(
+    df: BarsLike, cfg: Dict, upstream: Optional[Dict[str, pd.DataFrame]] = None
+) -> pd.DataFrame:
     if df is None or df.empty:
-        return pd.DataFrame(columns=["symbol", "date", "event", "score"])
+        return pd.DataFrame(columns=EVENT_COLUMNS)
 
-    if "symbol" in df.columns and not df["symbol"].isna().all():
-        symbol = str(df["symbol"].iloc[0])
+    # The harness passes the baseline events it already computed for these bars.
+    if upstream is not None and "baseline" in upstream:
+        baseline_events = upstream["baseline"]
     else:
-        symbol = str(cfg.get("symbol", "UNKNOWN"))
-
-    baseline_events = run_baseline_structural(df, symbol, None)
+        baseline_events = run_baseline_structural(
+            as_frame(df), bars_symbol(df, cfg), None, features=structural_features(df)
+        )
     if baseline_events.empty:
         return baseline_events
 
-    events = baseline_events.copy()
-    events["date"] = pd.to_datetime(events["date"], errors="coerce")
-    spring = events[events["event"].str.upper() == "SPRING"].copy()
+    spring = baseline_events[baseline_events["event"].str.upper() == "SPRING"]
     if spring.empty:
         return spring.reset_index(drop=True)
 
-    data = df.copy()
-    data["date"] = pd.to_datetime(data["date"], errors="coerce")
-    data = data.sort_values("date").reset_index(drop=True)
+    features = atr_features(df, FEATURE_COLUMNS)
+    if features is not None:
+        atr_ratio = features["atr_ratio"]
+    else:
+        data = as_frame(df)
+        if not isinstance(df, SymbolBars):
+            data = data.copy()
+            data["date"] = pd.to_datetime(data["date"], errors="coerce")
+            data = data.sort_values("date").reset_index(drop=True)
 
-    atr_fast = _compute_atr(data, 14)
-    atr_slow = _compute_atr(data, 60)
-    atr_ratio = atr_fast / atr_slow
+        atr_fast = _compute_atr(data, 14)
+        atr_slow = _compute_atr(data, 60)
+        atr_ratio = (atr_fast / atr_slow).to_numpy(dtype="float64")
 
-    atr_df = pd.DataFrame({"date": data["date"], "atr_ratio": atr_ratio})
-    merged = spring.merge(atr_df, on="date", how="left")
+    # Bar indices address the same date-sorted bars the ratio was computed on.
+    spring_ratio = atr_ratio[spring["bar_index"].to_numpy(dtype=np.int64)]
     # Retest v2: relaxed ATR compression threshold (0.85)
-    filtered = merged[(merged["atr_ratio"] <= 0.85) & merged["atr_ratio"].notna()]
+    filtered = spring[(spring_ratio <= 0.85) & ~np.isnan(spring_ratio)]
 
-    return filtered[["symbol", "date", "event", "score"]].reset_index(drop=True)
+    return filtered.reset_index(drop=True)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+# Packages a harness run needs; copied so each run gets its own config/ and caches.
+_RUN_SOURCES = ("baseline", "harness", "spring_after_sc", "spring_after_ATR_compression_ratio")
+
+RUN_DETECTORS = ["baseline", "spring_after_sc", "spring_after_ATR_compression_ratio", "incremental_baseline"]
+
+
+def write_universe(root: Path, n_symbols: int = 12, seed: int = 7) -> Path:
+    """
+    Synthetic Parquet universe, one `symbol=<SYM>` directory per symbol.
+
+    Random walks with occasional range/volume spikes so the structural
+    detector finds events. Every fifth symbol omits the `symbol` column
+    and every fourth ships its own `atr.average_true_range` column.
+    """
+    rng = np.random.default_rng(seed)
+    for index in range(n_symbols):
+        symbol = f"S{index:03d}"
+        n = int(rng.integers(300, 1200))
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, n) + 0.0005 * np.sin(np.arange(n) / 50)))
+        spread = np.abs(rng.normal(0, 0.02, n)) * close
+        spike = rng.random(n) < 0.03
+        spread[spike] *= 4
+        high = close + spread * rng.random(n)
+        low = close - spread * rng.random(n)
+        volume = rng.lognormal(12, 0.4, n)
+        volume[spike] *= 5
+        df = pd.DataFrame(
+            {
+                "symbol": symbol,
+                "date": pd.bdate_range(end="2025-12-31", periods=n),
+                "open": low + (high - low) * rng.random(n),
+                "high": high,
+                "low": low,
+                "close": close,
+                "volume": volume,
+            }
+        )
+        if index % 5 == 0:
+            df = df.drop(columns=["symbol"])
+        if index % 4 == 1:
+            df["atr.average_true_range"] = spread * 1.1
+        path = root / f"symbol={symbol}"
+        path.mkdir(parents=True, exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path / "part-0.parquet", row_group_size=250)
+    return root
+
+
+@pytest.fixture(scope="session")
+def ohlcv_path(tmp_path_factory) -> str:
+    return str(write_universe(tmp_path_factory.mktemp("ohlcv")))
+
+
+def run_harness(
+    tmp_path: Path,
+    ohlcv_path: str,
+    output_path: Path,
+    workers: int = 1,
+    args: Iterable[str] = (),
+    extra_config: Optional[str] = None,
+) -> None:
+    """Run `python -m harness.run` on a private copy of the repo with a test config."""
+    work = tmp_path / "repo"
+    if not work.exists():
+        for name in _RUN_SOURCES:
+            shutil.copytree(REPO_ROOT / name, work / name, ignore=shutil.ignore_patterns("__pycache__"))
+        (work / "config").mkdir()
+    config = f"""\
+output_path: {output_path}
+transition_output_path: {output_path}
+sequence_output_path: {output_path}
+contextual_output_path: {output_path}
+ohlcv_path: {ohlcv_path}
+detectors: {RUN_DETECTORS}
+workers: {workers}
+lookback_days: 730
+forward_windows: [5, 10, 20]
+regime_benchmark: true
+regime_detector: "baseline"
+bootstrap_ci_enabled: false
+result_cache: false
+feature_store: false
+export_csv: false
+"""
+    (work / "config" / "run_config.yaml").write_text(config + (extra_config or ""))
+    subprocess.run(
+        [sys.executable, "-m", "harness.run", *args],
+        cwd=work,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def output_files(output_path: Path) -> dict:
+    """Bytes of every top-level output file (state directories such as `.incremental/` excluded)."""
+    return {path.name: path.read_bytes() for path in sorted(output_path.iterdir()) if path.is_file()}
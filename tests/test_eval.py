@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from harness.eval import (
+    _match_nearest,
+    evaluate_conditional_effects,
+    evaluate_event_effects,
+    evaluate_path_dependency,
+)
+
+
+def _events(rows) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["symbol", "event", "date"])
+
+
+def _greedy_gaps(base: np.ndarray, inc: np.ndarray, tolerance: int) -> list:
+    """Closest-first greedy over every candidate pair, the matching `_match_nearest` must reproduce."""
+    candidates = sorted(
+        (abs(int(b) - int(i)), x, y)
+        for x, b in enumerate(base)
+        for y, i in enumerate(inc)
+        if abs(int(b) - int(i)) <= tolerance
+    )
+    used_base, used_inc, gaps = set(), set(), []
+    for gap, x, y in candidates:
+        if x not in used_base and y not in used_inc:
+            used_base.add(x)
+            used_inc.add(y)
+            gaps.append(gap)
+    return sorted(gaps)
+
+
+def test_match_nearest_is_greedy_closest_first():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        base = np.sort(rng.integers(0, 40, rng.integers(0, 15)))
+        inc = np.sort(rng.integers(0, 40, rng.integers(0, 15)))
+        base_pos, inc_pos = _match_nearest(base, inc, 3)
+        assert np.unique(base_pos).size == base_pos.size
+        assert np.unique(inc_pos).size == inc_pos.size
+        assert sorted(np.abs(base[base_pos] - inc[inc_pos]).tolist()) == _greedy_gaps(base, inc, 3)
+
+
+def test_match_nearest_matches_a_chain_in_one_pass():
+    keys = np.arange(200_000, dtype=np.int64)
+    base_pos, inc_pos = _match_nearest(keys[0::2], keys[1::2], 5)
+    assert base_pos.size == 100_000
+    np.testing.assert_array_equal(base_pos, inc_pos)
+
+
+def test_path_dependency_one_to_one_tolerance_and_duplicates():
+    baseline = _events(
+        [
+            ("AAA", "SC", "2024-01-10"),
+            ("AAA", "SC", "2024-01-10"),  # duplicate date: both match, to distinct events
+            ("AAA", "SC", "2024-03-01"),  # nearest incremental is 21 days away: unmatched
+            ("AAA", "BC", "2024-01-10"),
+            ("BBB", "SC", "2024-01-10"),
+        ]
+    )
+    incremental = _events(
+        [
+            ("AAA", "SC", "2024-01-10"),
+            ("AAA", "SC", "2024-01-12"),
+            ("AAA", "SC", "2024-03-22"),
+            ("AAA", "BC", "2024-01-15"),
+            ("AAA", "BC", "2024-01-16"),  # only one BC to match: one-to-one
+            ("CCC", "SC", "2024-01-10"),  # other symbol never matches BBB
+        ]
+    )
+    out = evaluate_path_dependency(baseline, incremental, tolerance_days=20).set_index("event")
+
+    assert list(out.index) == ["ALL", "BC", "SC"]
+    sc, bc, total = out.loc["SC"], out.loc["BC"], out.loc["ALL"]
+    assert (sc["total_events"], sc["incremental_events"], sc["matched_events"]) == (4, 4, 2)
+    assert (sc["moved_events"], sc["max_date_delta"], sc["mean_signed_delta"]) == (1, 2.0, 1.0)
+    assert (sc["unmatched_baseline"], sc["unmatched_incremental"]) == (2, 2)
+    assert (bc["matched_events"], bc["unmatched_incremental"], bc["mean_signed_delta"]) == (1, 1, 5.0)
+    assert (total["total_events"], total["incremental_events"], total["matched_events"]) == (5, 6, 3)
+    assert total["match_rate"] == 3 / 5
+    assert total["moved_events"] == 2
+    assert total["median_date_delta"] == 2.0
+
+    # One day more tolerance picks up the 21-day pair.
+    wider = evaluate_path_dependency(baseline, incremental, tolerance_days=21).set_index("event")
+    assert wider.loc["SC", "matched_events"] == 3
+    assert wider.loc["SC", "max_date_delta"] == 21.0
+
+
+def test_path_dependency_empty_sides():
+    baseline = _events([("AAA", "SC", "2024-01-10")])
+    out = evaluate_path_dependency(baseline, _events([])).set_index("event")
+    assert out.loc["ALL", "matched_events"] == 0
+    assert out.loc["ALL", "unmatched_baseline"] == 1
+    assert np.isnan(out.loc["ALL", "mean_date_delta"])
+
+
+def _after_mask_iterrows(df: pd.DataFrame, event: str, after: str, lookback_days: int) -> pd.Series:
+    """The pre-vectorization loop, with same-day A rows visited before same-day B rows."""
+    mask = pd.Series(False, index=df.index)
+    order = df.assign(_b=df["event"] == after).sort_values(["date", "_b"], kind="stable")
+    for _, group in order.groupby("symbol", sort=False):
+        last_date = None
+        for idx, row in group.iterrows():
+            if row["event"] == after:
+                last_date = row["date"]
+                continue
+            if row["event"] == event and last_date is not None:
+                if 0 < (row["date"] - last_date).days <= lookback_days:
+                    mask.at[idx] = True
+    return mask
+
+
+def test_conditional_effects_match_iterrows_loop():
+    rng = np.random.default_rng(3)
+    n = 2_000
+    df = pd.DataFrame(
+        {
+            "symbol": rng.choice(["AAA", "BBB", "CCC"], n),
+            "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 200, n), unit="D"),
+            "event": rng.choice(["BC", "SOS", "SC"], n, p=[0.3, 0.4, 0.3]),
+            "fwd_5": rng.normal(0, 0.05, n),
+        }
+    )
+    # A SOS sharing its day with one BC and falling 5 days after another.
+    extra = pd.DataFrame(
+        {
+            "symbol": ["DDD"] * 3,
+            "date": pd.to_datetime(["2024-03-01", "2024-03-06", "2024-03-06"]),
+            "event": ["BC", "BC", "SOS"],
+            "fwd_5": [0.01, 0.02, 0.03],
+        }
+    )
+    df = pd.concat([df, extra], ignore_index=True)
+
+    out = evaluate_conditional_effects(df, [5], [("SOS", "BC", 10)])
+    expected = df.loc[_after_mask_iterrows(df, "SOS", "BC", 10), "fwd_5"]
+    assert out.loc[0, "event"] == "SOS_AFTER_BC"
+    assert out.loc[0, "count_event"] == expected.shape[0]
+    assert out.loc[0, "median_event"] == expected.median()
+    assert out.loc[0, "count_baseline"] == int((df["event"] == "BC").sum())
+
+    single = evaluate_conditional_effects(extra, [5], [("SOS", "BC", 10)])
+    assert single.loc[0, "count_event"] == 1
+
+
+def test_event_effects_baseline_is_every_other_row():
+    rng = np.random.default_rng(5)
+    n = 1_000
+    df = pd.DataFrame(
+        {
+            "event": rng.choice(np.array(["BC", "SOS", "SC", None], dtype=object), n),
+            "fwd_5": rng.normal(0, 0.05, n),
+            "fwd_10": rng.normal(0, 0.05, n),
+        }
+    )
+    df.loc[rng.random(n) < 0.1, "fwd_10"] = np.nan
+
+    out = evaluate_event_effects(df, [5, 10], ["BC", "BC", "SOS", "AR"])
+    assert list(zip(out["event"], out["window"])) == [
+        ("BC", 5), ("BC", 10), ("SOS", 5), ("SOS", 10), ("AR", 5), ("AR", 10)
+    ]
+    for row in out.itertuples():
+        col = f"fwd_{row.window}"
+        event_vals = df.loc[df["event"] == row.event, col].dropna()
+        base_vals = df.loc[df["event"] != row.event, col].dropna()
+        assert (row.count_event, row.count_baseline) == (event_vals.shape[0], base_vals.shape[0])
+        assert row.median_baseline == base_vals.median()
+        assert row.win_rate_baseline == (base_vals > 0).mean()
+        assert row.p5_baseline == base_vals.quantile(0.05)
+        if not event_vals.empty:
+            assert row.median_event == event_vals.median()
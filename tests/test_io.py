@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from harness import io as _io
+from harness.bars import PRICE_FIELDS
+
+
+@pytest.mark.parametrize("lookback_days", [0, 365])
+def test_pack_matches_parquet(ohlcv_path, tmp_path, lookback_days):
+    pack_path = tmp_path / "universe.pack"
+    symbols = _io.list_symbols(ohlcv_path)
+    rows = sum(len(_io.read_symbol_bars(symbol, ohlcv_path, 0)) for symbol in symbols)
+    assert _io.pack_universe(ohlcv_path, pack_path) == rows
+    assert _io.list_symbols(str(pack_path)) == symbols
+
+    for symbol in symbols:
+        expected = _io.read_symbol_bars(symbol, ohlcv_path, lookback_days)
+        actual = _io.read_symbol_bars(symbol, str(pack_path), lookback_days)
+        assert actual.symbol == expected.symbol
+        for name in ("date",) + PRICE_FIELDS:
+            np.testing.assert_array_equal(getattr(actual, name), getattr(expected, name), err_msg=f"{symbol}.{name}")
+        assert actual.extra.keys() == expected.extra.keys(), symbol
+        for name, values in expected.extra.items():
+            np.testing.assert_array_equal(actual.extra[name], values, err_msg=f"{symbol}.{name}")
+        assert _io.read_symbol_max_date(symbol, str(pack_path)) == _io.read_symbol_max_date(symbol, ohlcv_path)
+
+
+def test_parquet_sink_promotes_all_null_columns(tmp_path):
+    path = tmp_path / "events.parquet"
+    with _io.ParquetSink(path) as sink:
+        sink.write(pd.DataFrame({"symbol": ["AAA"], "note": [None], "score": [1.0]}))
+        sink.write(pd.DataFrame({"symbol": ["BBB"], "note": ["x"], "score": [2.0]}))
+        sink.write(pd.DataFrame({"symbol": ["CCC"], "note": [None], "score": [3.0]}))
+    assert sink.rows == 3
+    out = _io.read_results(path)
+    assert out["symbol"].tolist() == ["AAA", "BBB", "CCC"]
+    assert out["note"].isna().tolist() == [True, False, True]
+    assert out.loc[1, "note"] == "x"
+    assert pq.ParquetFile(path).num_row_groups == 3
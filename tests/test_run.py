@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from conftest import RUN_DETECTORS, output_files, run_harness, write_universe
+from harness import io as _io
+from harness.run import _init_worker, _process_batch
+
+
+def test_batches_match_serial(ohlcv_path):
+    symbols = _io.list_symbols(ohlcv_path)
+    cfg = {"forward_windows": [5, 10, 20], "regime_benchmark": True, "regime_detector": "baseline"}
+    initargs = (ohlcv_path, 730, cfg, RUN_DETECTORS)
+
+    # Serial reference: the whole universe as one batch in this process.
+    _init_worker(*initargs)
+    serial_years, serial = _process_batch([(s, None) for s in symbols])
+
+    batches = [[(s, None) for s in symbols[i : i + 3]] for i in range(0, len(symbols), 3)]
+    with ProcessPoolExecutor(max_workers=2, initializer=_init_worker, initargs=initargs) as executor:
+        batched = list(executor.map(_process_batch, batches))
+
+    batched_years = {}
+    for years, _ in batched:
+        batched_years.update(years)
+    assert batched_years == serial_years
+
+    # Batches are consecutive symbol slices, so their artifacts concatenate
+    # to the serial rows in the same order.
+    assert set(serial) == {name for _, artifacts in batched for name in artifacts}
+    for name, expected in serial.items():
+        parts = [artifacts[name] for _, artifacts in batched if name in artifacts]
+        pd.testing.assert_frame_equal(pd.concat(parts, ignore_index=True), expected, obj=name)
+
+
+def test_outputs_do_not_depend_on_workers(ohlcv_path, tmp_path):
+    run_harness(tmp_path, ohlcv_path, tmp_path / "serial", workers=1)
+    run_harness(tmp_path, ohlcv_path, tmp_path / "pool", workers=2)
+    serial = output_files(tmp_path / "serial")
+    assert serial
+    assert output_files(tmp_path / "pool") == serial
+
+
+def test_incremental_matches_full(tmp_path):
+    data = write_universe(tmp_path / "data", n_symbols=8)
+    run_harness(tmp_path, str(data), tmp_path / "incremental", args=["--incremental"])
+
+    # Extend one symbol, drop another and touch a third without changing it.
+    path = next((data / "symbol=S003").glob("*.parquet"))
+    df = pd.read_parquet(path)
+    tail = df.iloc[[-1] * 7].reset_index(drop=True)
+    tail["date"] = df["date"].iloc[-1] + pd.to_timedelta(range(1, 8), unit="D")
+    for column in ("open", "high", "low", "close"):
+        tail[column] = tail[column] * (1 + 0.02 * (tail.index + 1))
+    pd.concat([df, tail], ignore_index=True).astype(df.dtypes.to_dict()).to_parquet(path, index=False)
+    shutil.rmtree(data / "symbol=S005")
+    os.utime(next((data / "symbol=S006").glob("*.parquet")))
+
+    run_harness(tmp_path, str(data), tmp_path / "incremental", args=["--incremental"])
+    run_harness(tmp_path, str(data), tmp_path / "full")
+    full = output_files(tmp_path / "full")
+    assert full
+    assert output_files(tmp_path / "incremental") == full
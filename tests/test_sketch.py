@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from harness.sketch import MIN_MAGNITUDE, QuantileSketch
+
+QUANTILES = [0.0, 0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.999, 1.0]
+
+
+def _returns(rng: np.random.Generator, n: int) -> np.ndarray:
+    values = rng.normal(0.002, 0.05, n)
+    # Repeats and exact zeros, as rounded prices produce.
+    values[rng.random(n) < 0.1] = 0.0
+    values[rng.random(n) < 0.1] = 0.01
+    return values
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 1000, 1001])
+def test_exact_matches_numpy(n):
+    values = _returns(np.random.default_rng(n), n)
+    sketch = QuantileSketch()
+    for part in np.array_split(values, 3):
+        sketch.merge(QuantileSketch.from_values(part))
+    assert sketch.count == n
+    assert sketch.median() == np.median(values)
+    for q in QUANTILES:
+        assert sketch.quantile(q) == np.quantile(values, q)
+
+
+@pytest.mark.parametrize("n_total, n_part", [(1000, 0), (1000, 1), (1001, 400), (1000, 999), (50, 50)])
+def test_exact_without_matches_numpy_bit_for_bit(n_total, n_part):
+    rng = np.random.default_rng(n_total + n_part)
+    values = _returns(rng, n_total)
+    in_part = np.zeros(n_total, dtype=bool)
+    in_part[rng.choice(n_total, n_part, replace=False)] = True
+
+    part = QuantileSketch.from_values(values[in_part])
+    total = QuantileSketch.from_values(values[~in_part])
+    total.merge(part)
+    rest = total.without(part)
+    remaining = values[~in_part]
+
+    assert rest.count == remaining.size
+    np.testing.assert_array_equal(np.sort(rest.values()), np.sort(remaining))
+    if remaining.size == 0:
+        assert np.isnan(rest.median()) and np.isnan(rest.quantile(0.05))
+        return
+    assert rest.median() == np.median(remaining)
+    for q in QUANTILES:
+        assert rest.quantile(q) == np.quantile(remaining, q)
+    with pytest.raises(TypeError):
+        rest.add(np.ones(1))
+
+
+@pytest.mark.parametrize("accuracy", [0.01, 0.001])
+def test_approximate_rank_values_within_relative_error(accuracy):
+    values = _returns(np.random.default_rng(1), 20_001)
+    exact = np.sort(values)
+    sketch = QuantileSketch.from_values(values, accuracy)
+    n = values.size
+    for q in QUANTILES:
+        # Quantiles that land on a rank are a single value at that rank.
+        rank = int(round(q * (n - 1)))
+        approx = sketch.quantile(rank / (n - 1))
+        assert abs(approx - exact[rank]) <= accuracy * abs(exact[rank]) * (1 + 1e-12), (q, approx, exact[rank])
+        # Interpolated quantiles stay within the error of the two ranks they blend.
+        lo, hi = int(np.floor(q * (n - 1))), int(np.ceil(q * (n - 1)))
+        bound = accuracy * max(abs(exact[lo]), abs(exact[hi]))
+        assert abs(sketch.quantile(q) - np.quantile(values, q)) <= bound * (1 + 1e-12) + MIN_MAGNITUDE
+
+
+def test_approximate_merge_and_without_match_a_sketch_of_the_values():
+    rng = np.random.default_rng(2)
+    a, b, c = (_returns(rng, n) for n in (3000, 1500, 500))
+    merged = QuantileSketch.from_values(a, 0.01)
+    merged.merge(QuantileSketch.from_values(b, 0.01))
+    merged.merge(QuantileSketch.from_values(c, 0.01))
+    other_order = QuantileSketch.from_values(c, 0.01)
+    other_order.merge(QuantileSketch.from_values(np.concatenate([b, a]), 0.01))
+
+    rest = merged.without(QuantileSketch.from_values(b, 0.01))
+    direct = QuantileSketch.from_values(np.concatenate([a, c]), 0.01)
+    assert rest.count == direct.count == a.size + c.size
+    for q in QUANTILES:
+        assert merged.quantile(q) == other_order.quantile(q)
+        assert rest.quantile(q) == direct.quantile(q)
+    assert merged.to_bytes() == other_order.to_bytes()
+
+
+@pytest.mark.parametrize("accuracy", [0.0, 0.01])
+def test_bytes_round_trip(accuracy):
+    values = _returns(np.random.default_rng(3), 999)
+    sketch = QuantileSketch.from_values(values, accuracy)
+    restored = QuantileSketch.from_bytes(sketch.to_bytes())
+    assert restored.count == sketch.count
+    for q in QUANTILES:
+        assert restored.quantile(q) == sketch.quantile(q)
+
+
+def test_merge_rejects_mixed_accuracy():
+    with pytest.raises(ValueError):
+        QuantileSketch(0.0).merge(QuantileSketch(0.01))
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).without(QuantileSketch(0.0))
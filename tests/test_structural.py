@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import json
+from dataclasses import replace
+
+import pytest
+
+from baseline.structural import WyckoffStructuralConfig, detect_structural_wyckoff
+from harness import io as _io
+from structural_reference import detect_structural_wyckoff_reference
+
+# Default config plus variants that reach the optional branches
+# (no trend filter, soft markdown, looser thresholds, wider re-entry).
+CONFIGS = [
+    WyckoffStructuralConfig(),
+    replace(
+        WyckoffStructuralConfig(),
+        require_prior_trend_for_sc_bc=False,
+        allow_soft_markdown_without_sow=True,
+        extend_first_phase_to_start=False,
+        extend_last_phase_to_end=False,
+    ),
+    replace(
+        WyckoffStructuralConfig(),
+        range_z_scale=1.5,
+        volume_z_scale=1.5,
+        spring_break_pct=0.0,
+        ut_break_pct=0.0,
+        spring_reentry_bars=5,
+        ut_reentry_bars=5,
+        spring_vol_z=-10.0,
+    ),
+]
+
+
+def _canonical(result: dict) -> str:
+    # json keeps float reprs exact and renders NaN scores comparably.
+    return json.dumps(result, sort_keys=True)
+
+
+@pytest.mark.parametrize("cfg", CONFIGS, ids=["default", "optional-branches", "loose"])
+def test_kernel_matches_reference(ohlcv_path, cfg):
+    events = 0
+    for symbol in _io.list_symbols(ohlcv_path):
+        frame = _io.read_symbol_bars(symbol, ohlcv_path, 0).to_frame()
+        expected = detect_structural_wyckoff_reference(frame, cfg)
+        actual = detect_structural_wyckoff(frame, cfg)
+        assert _canonical(actual) == _canonical(expected), symbol
+        for level in ("events", "phases"):
+            partial = detect_structural_wyckoff(frame, cfg, output=level)
+            assert _canonical(partial) == _canonical({key: actual[key] for key in partial}), (symbol, level)
+        events += len(expected["events"])
+    assert events > 0